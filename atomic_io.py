@@ -0,0 +1,43 @@
+"""原子文件写入 - 先写临时文件并刷到磁盘，再原子替换目标文件
+
+os.replace 只保证替换本身是原子的：如果临时文件的内容还在系统缓存里，
+断电后可能留下一个长度为 0 或内容残缺的新文件。这里在替换前 fsync 临时文件，
+替换后 fsync 所在目录，确保替换完成时新内容和目录项都已落盘。
+"""
+import os
+
+
+def fsync_directory(path: str):
+    """把目录项的变更（新建、重命名、删除文件）刷到磁盘；Windows 不支持打开目录，跳过"""
+    if os.name == "nt":
+        return
+    fd = os.open(path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_file(path: str):
+    """把已写入的文件内容刷到磁盘"""
+    fd = os.open(path, os.O_WRONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, data: bytes, before_replace=None):
+    """原子地写入整个文件
+
+    before_replace 在临时文件落盘之后、替换目标文件之前调用（例如保留旧文件作为备份）。
+    """
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if before_replace is not None:
+        before_replace()
+    os.replace(tmp_file, path)
+    fsync_directory(os.path.dirname(path))
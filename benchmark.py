@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""性能基准脚本 - 在 offscreen 模式下测量关键路径的耗时
+
+用法: python benchmark.py [基准名 ...] [--quick] [--json 结果.json] [--compare 基线.json]
+  不带基准名时运行全部；--quick 跳过 10^6 规模的数据；
+  --json 把全部结果保存为 JSON，--compare 与之前保存的结果比较，变慢超过阈值（默认 20%）时返回非零退出码。
+  比较的两次运行应在同一台机器上、尽量空闲时进行。
+
+数据都由合成数据生成器产生（make_tasks / make_history / make_data_file），每次运行的数据相同。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Optional
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# 全部结果 {"基准名/项目": {"value", "unit", "lower_is_better"}}，由 record 登记
+RESULTS: Dict[str, Dict] = {}
+_current = ""  # 正在运行的基准名
+QUICK = False  # --quick：跳过 10^6 规模的数据
+_work_dirs: List[str] = []  # 正在运行的基准创建的临时目录，基准结束后删除
+
+
+def record(case: str, value: float, unit: str, lower_is_better: Optional[bool] = True):
+    """登记一项结果；lower_is_better 为 None 的项目（例如实际刷新率）只记录，不参与回退比较"""
+    RESULTS[f"{_current}/{case}"] = {"value": value, "unit": unit, "lower_is_better": lower_is_better}
+
+
+def scales():
+    """数据规模：10^2、10^4、10^6（--quick 时不含 10^6）"""
+    return (10 ** 2, 10 ** 4) if QUICK else (10 ** 2, 10 ** 4, 10 ** 6)
+
+
+def measure(func, repeat: int, rounds: int = 3) -> float:
+    """分 rounds 轮、每轮调用 func repeat 次，返回最快一轮的平均每次耗时（微秒）
+
+    取最快的一轮而不是全部的平均，减少其他进程和垃圾回收的干扰，便于比较两次运行的结果。
+    """
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1e6
+
+
+def qt_app():
+    """获取（或创建）QApplication"""
+    from PySide6 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+def work_dir() -> str:
+    """创建临时目录（所在的基准结束后删除）"""
+    path = tempfile.mkdtemp(prefix="todo-bench-")
+    _work_dirs.append(path)
+    return path
+
+
+def make_tasks(count: int):
+    """生成合成任务数据"""
+    return [{"id": f"t{i}", "text": f"任务{i}", "checked": i % 3 == 0, "total_elapsed": float(i * 7 % 3600)}
+            for i in range(count)]
+
+
+def data_manager(lists):
+    """在临时目录中创建数据管理器，lists 为 {列表名: 任务列表}"""
+    from data_manager import DataManager
+
+    dm = DataManager(os.path.join(work_dir(), "todo_data.json"))
+    for name, tasks in lists.items():
+        dm.replace_tasks(name, tasks)
+    return dm
+
+
+def task_view(rows: int):
+    """创建显示 rows 个任务的任务列表视图"""
+    from widgets import TaskListModel, TaskListView
+
+    model = TaskListModel(data_manager({"基准": make_tasks(rows)}))
+    view = TaskListView()
+    view.setModel(model)
+    model.set_list("基准")
+    view.resize(600, 400)
+    view.show()
+    qt_app().processEvents()
+    return model, view
+
+
+def make_data_file(tasks: int, stats: int, days: int = 365) -> str:
+    """生成含 tasks 个任务（10 个列表）和 stats 条统计记录（均匀分布在截至 2024 年底的 days 天中）的数据文件"""
+    from datetime import date, timedelta
+    from json_codec import codec
+    from stats_store import StatsStore
+
+    data_file = os.path.join(work_dir(), "todo_data.json")
+    lists = {f"列表{i}": make_tasks(tasks // 10) for i in range(10)}
+    for i, items in enumerate(lists.values()):
+        for task in items:
+            task["id"] = f"{i}-{task['id']}"
+    with open(data_file, 'wb') as f:
+        f.write(codec.dumps({"schema": 1, "tasks": lists, "timer": None, "generation": 1}))
+    history_dir = data_file[:-len(".json")] + ".history"
+    os.makedirs(history_dir)
+    first = date(2024, 12, 31) - timedelta(days=days - 1)
+    stores: Dict[str, StatsStore] = {}
+    for i in range(stats):
+        day = first + timedelta(days=i * days // stats)
+        store = stores.setdefault(day.strftime("%Y-%m"), StatsStore())
+        store.append(day.isoformat(), f"任务{i % 200}", 60.0 + i % 600, 1.4e9 + i * 60)
+    for month, store in stores.items():
+        store.save(os.path.join(history_dir, month + ".stats"), 1)
+    return data_file
+
+
+def bench_task_highlight(frames: int = 200):
+    """运行中任务的 RGB 高亮：每帧耗时（只重绘运行任务所在的行）"""
+    from widgets import RunningTask
+
+    app = qt_app()
+    print(f"{'列表任务数':>10} {'每帧 µs':>10}")
+    for rows in (10, 1000):
+        model, view = task_view(rows)
+        model.set_running(RunningTask("t1", 0.0))
+        # 由基准循环逐帧驱动，不使用帧时钟
+        view.stop_animation()
+        app.processEvents()
+
+        def frame():
+            view._animate_rgb()
+            app.processEvents()
+
+        us = measure(frame, frames)
+        record(f"{rows} 行 每帧", us, "µs")
+        print(f"{rows:>10} {us:>10.1f}")
+        view.close()
+        view.deleteLater()
+        app.processEvents()
+
+
+def bench_list_switch(repeat: int = 20):
+    """切换任务列表：替换模型数据并完成首帧绘制的耗时"""
+    from widgets import TaskListModel, TaskListView
+
+    app = qt_app()
+    view = TaskListView()
+    view.resize(600, 400)
+    view.show()
+    print(f"{'列表任务数':>10} {'每次切换 ms':>12}")
+    for rows in (100, 1000, 10000):
+        model = TaskListModel(data_manager({"甲": make_tasks(rows), "乙": make_tasks(rows)}))
+        view.setModel(model)
+
+        def switch():
+            for name in ("甲", "乙"):
+                model.set_list(name)
+                app.processEvents()
+
+        ms = measure(switch, repeat) / 2 / 1000
+        record(f"{rows} 行 每次切换", ms, "ms")
+        print(f"{rows:>10} {ms:>12.2f}")
+    view.close()
+
+
+def bench_timer_tick(ticks: int = 1000):
+    """有任务计时时的稳态：主窗口每次计时刷新 (_update_all_timers) 的耗时和净内存分配（1000 个任务的列表）"""
+    from PySide6 import QtCore
+    from frame_clock import frame_clock
+
+    app = qt_app()
+    dm = data_manager({"基准": make_tasks(1000)})
+    dm.close()
+    win = open_main_window(dm.data_file)
+    win.list_widget.setCurrentItem(win.list_widget.findItems("基准", QtCore.Qt.MatchFlag.MatchExactly)[0])
+    win._start_running_task(1)  # t1（t0 已完成）
+    # 由基准循环逐次驱动，不使用帧时钟（RGB 高亮、自动保存也不参与）
+    frame_clock().unsubscribe(win._update_all_timers)
+    frame_clock().unsubscribe(win._autosave)
+    win.task_view.stop_animation()
+
+    def tick():
+        win._update_all_timers()
+        app.processEvents()
+
+    tick()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    elapsed = measure(tick, ticks)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    record("每次刷新", elapsed, "µs")
+    record(f"{ticks} 次刷新后净分配", growth, "B")
+    print(f"每次刷新 {elapsed:.1f} µs，{ticks} 次刷新后净分配 {growth} 字节")
+    close_main_window(win)
+
+
+def bench_time_rings(frames: int = 200):
+    """时间圆环：每帧绘制耗时（分层缓存 vs 每帧丢弃缓存全部重绘）"""
+    from time_rings import TimeRingWidget
+
+    app = qt_app()
+    widget = TimeRingWidget()
+    widget.resize(450, 450)
+    widget.show()
+    app.processEvents()
+
+    def cached():
+        widget.repaint()
+
+    def uncached():
+        widget.invalidate_layers()
+        widget.repaint()
+
+    print(f"{'绘制方式':>10} {'每帧 µs':>10}")
+    for label, frame in (("分层缓存", cached), ("全部重绘", uncached)):
+        frame()
+        us = measure(frame, frames)
+        record(f"{label} 每帧", us, "µs")
+        print(f"{label:>10} {us:>10.1f}")
+    widget.close()
+
+
+def bench_ring_refresh(seconds: float = 5.0):
+    """时间圆环：自适应刷新在流畅 / 省电模式下实际达到的刷新率"""
+    from PySide6 import QtCore
+    from time_rings import REFRESH_POWER_SAVER, REFRESH_SMOOTH, TimeRingWidget
+
+    qt_app()
+    widget = TimeRingWidget()
+    widget.resize(450, 450)
+    widget.show()
+    print(f"{'刷新策略':>12} {'次/秒':>8}")
+    for mode in (REFRESH_SMOOTH, REFRESH_POWER_SAVER):
+        widget.set_refresh_mode(mode)
+        loop = QtCore.QEventLoop()
+        QtCore.QTimer.singleShot(int(seconds * 1000), loop.quit)
+        loop.exec()
+        record(f"{mode} 刷新率", widget.repaint_rate, "次/秒", lower_is_better=None)
+        print(f"{mode:>12} {widget.repaint_rate:>8.2f}")
+    widget.close()
+
+
+def open_main_window(data_file: str, startup_timer=None):
+    """打开主窗口，等待启动完成（数据加载完毕，时间圆环和系统托盘已创建）"""
+    from PySide6 import QtCore
+    from main_window import MainWindow
+    from phase_timer import PhaseTimer
+
+    qt_app()
+    startup_timer = startup_timer or PhaseTimer()
+    win = MainWindow(data_file, startup_timer)
+    win.show()
+    startup_timer.mark("显示窗口")
+    loop = QtCore.QEventLoop()
+    win.startup_finished.connect(loop.quit)
+    loop.exec()
+    return win
+
+
+def close_main_window(win):
+    """停止计时，保存并关闭数据，隐藏主窗口（不退出应用）"""
+    win._stop_running_task()
+    win.save_timer.stop()
+    win.data_manager.close()
+    win.hide()
+    qt_app().processEvents()
+
+
+def bench_startup(tasks_per_list: int = 1000, stat_days: int = 365):
+    """启动：主窗口各阶段耗时（3 个列表 × 1000 个任务，一年的统计记录）"""
+    from PySide6 import QtCore
+    from phase_timer import PhaseTimer
+
+    dm = data_manager({f"列表{i}": make_tasks(tasks_per_list) for i in range(3)})
+    for day in range(stat_days):
+        date = (QtCore.QDate(2024, 1, 1).addDays(day)).toString("yyyy-MM-dd")
+        for i in range(5):
+            dm.record_task_completion(f"任务{i}", 600.0, date=date)
+    dm.compact()
+    dm.close()
+
+    startup_timer = PhaseTimer()
+    win = open_main_window(dm.data_file, startup_timer)
+    for name, ms in startup_timer.phases:
+        record(name, ms, "ms")
+    record("合计", startup_timer.total_ms, "ms")
+    for name, ms in startup_timer.background:
+        record(f"{name}（后台）", ms, "ms")
+    print(startup_timer.report())
+    close_main_window(win)
+
+
+def make_history(years: int, per_day: int) -> str:
+    """生成按月分段的统计历史（截至 2024 年底），返回数据文件路径"""
+    import json
+    from datetime import date, timedelta
+    from stats_store import StatsStore
+
+    data_file = os.path.join(work_dir(), "todo_data.json")
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump({"tasks": {"我的任务": []}, "timer": None, "generation": 1}, f)
+    history_dir = data_file[:-len(".json")] + ".history"
+    os.makedirs(history_dir)
+    day = date(2025 - years, 1, 1)
+    while day.year < 2025:
+        store = StatsStore()
+        month = day.strftime("%Y-%m")
+        while day.strftime("%Y-%m") == month:
+            for i in range(per_day):
+                store.append(day.isoformat(), f"任务{(day.toordinal() + i) % 200}", 60.0 + i, 1.4e9 + i * 600)
+            day += timedelta(days=1)
+        store.save(os.path.join(history_dir, month + ".stats"), 1)
+    return data_file
+
+
+def bench_stats_history(per_day: int = 20):
+    """统计历史：1 年 / 10 年记录（每天 20 条），启动（加载 + 本周 / 本月统计）的耗时和内存、翻到冷月份的耗时"""
+    from data_manager import DataManager
+
+    print(f"{'历史':>6} {'启动 ms':>9} {'常驻 MB':>9} {'冷月份 ms':>10} {'遍历全部 ms':>12} {'遍历后常驻月数':>14}")
+    for years in (1, 10):
+        data_file = make_history(years, per_day)
+        def startup():
+            dm = DataManager(data_file)
+            dm.get_weekly_stats("2024-12-30")
+            dm.get_monthly_stats("2024-12")
+            return dm
+
+        startup_ms = measure(lambda: startup().close(), 5) / 1000
+        tracemalloc.start()
+        dm = startup()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        dm.get_weekly_stats("2024-03-04")
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for y in range(2025 - years, 2025):
+            for m in range(1, 13):
+                dm.get_monthly_stats(f"{y}-{m:02d}")
+        scan_ms = (time.perf_counter() - start) * 1000
+        record(f"{years} 年 启动", startup_ms, "ms")
+        record(f"{years} 年 常驻内存", current / 1e6, "MB")
+        record(f"{years} 年 冷月份", cold_ms, "ms")
+        record(f"{years} 年 遍历全部", scan_ms, "ms")
+        print(f"{years:>4} 年 {startup_ms:>9.1f} {current / 1e6:>9.2f} {cold_ms:>10.2f} {scan_ms:>12.1f} "
+              f"{len(dm.history.resident_months()):>14}")
+        dm.close()
+
+
+def bench_stats_query(years: int = 10, per_day: int = 20):
+    """区间查询：十年统计历史上构建索引的耗时，以及各种分组的区间查询耗时"""
+    from data_manager import DataManager
+
+    dm = DataManager(make_history(years, per_day))
+    start = time.perf_counter()
+    dm.stats_index
+    build_ms = (time.perf_counter() - start) * 1000
+    record("构建索引", build_ms, "ms")
+    print(f"构建索引: {build_ms:.1f} ms")
+    first = f"{2025 - years}-01-01"
+    queries = [
+        ("一周 按任务", lambda: dm.query_stats("2024-03-04", "2024-03-10")),
+        ("一年 按任务 前 10", lambda: dm.query_stats("2024-01-01", "2024-12-31", top=10)),
+        ("全部 按任务 前 10", lambda: dm.query_stats(first, "2024-12-31", top=10)),
+        ("全部 按列表", lambda: dm.query_stats(first, "2024-12-31", "list")),
+        ("全部 按星期", lambda: dm.query_stats(first, "2024-12-31", "weekday")),
+        ("全部 按小时", lambda: dm.query_stats(first, "2024-12-31", "hour")),
+        ("一年 按日期", lambda: dm.query_stats("2024-01-01", "2024-12-31", "day")),
+        ("全部 总时长", lambda: dm.total_time(first, "2024-12-31")),
+    ]
+    for name, query in queries:
+        us = measure(query, 20)
+        record(name, us, "µs")
+        print(f"{name:<16} {us:>10.1f} µs")
+    dm.close()
+
+
+def bench_storage(years: int = 10, per_day: int = 275):
+    """存储后端：约一百万条统计记录时 JSON / SQLite 的启动、冷月份周统计、逐月统计和单次保存的耗时"""
+    from data_manager import DataManager
+    from storage import migrate
+
+    json_file = make_history(years, per_day)
+    db_file = os.path.splitext(json_file)[0] + ".db"
+    start = time.perf_counter()
+    _, rows = migrate(json_file, db_file)
+    migrate_s = time.perf_counter() - start
+    record("迁移到 SQLite", migrate_s, "s")
+    print(f"{rows} 条统计记录，迁移到 SQLite: {migrate_s:.1f} 秒")
+    print(f"{'后端':>8} {'启动 ms':>9} {'冷月份周统计 ms':>15} {'逐月统计 ms':>12} {'单次保存 ms':>12}")
+    for name, data_file in (("JSON", json_file), ("SQLite", db_file)):
+        def startup():
+            dm = DataManager(data_file)
+            dm.get_weekly_stats("2024-12-30")
+            dm.get_monthly_stats("2024-12")
+            return dm
+
+        startup_ms = measure(lambda: startup().close(), 5) / 1000
+        dm = startup()
+        task_id = dm.add_task("我的任务", {"text": "基准", "checked": False, "total_elapsed": 0})
+        dm.save()
+        start = time.perf_counter()
+        dm.get_weekly_stats("2019-03-04")
+        cold_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for y in range(2025 - years, 2025):
+            for m in range(1, 13):
+                dm.get_monthly_stats(f"{y}-{m:02d}")
+        scan_ms = (time.perf_counter() - start) * 1000
+        counter = iter(range(1, 1000000))
+        save_ms = measure(lambda: (dm.update_task(task_id, total_elapsed=next(counter)), dm.save()), 50) / 1000
+        record(f"{name} 启动", startup_ms, "ms")
+        record(f"{name} 冷月份周统计", cold_ms, "ms")
+        record(f"{name} 逐月统计", scan_ms, "ms")
+        record(f"{name} 单次保存", save_ms, "ms")
+        print(f"{name:>8} {startup_ms:>9.1f} {cold_ms:>15.2f} {scan_ms:>12.1f} {save_ms:>12.2f}")
+        dm.close()
+
+
+def bench_durability(rounds: int = 500, tasks: int = 1000):
+    """持久化：每次保存都刷盘与按组提交刷盘时，连续保存的平均耗时；写完整快照（含备份）的耗时"""
+    from data_manager import DataManager
+
+    print(f"{'刷盘间隔 s':>10} {'每次保存 ms':>12} {'写快照 ms':>10}")
+    for interval in (0.0, 1.0):
+        data_file = os.path.join(work_dir(), "todo_data.json")
+        dm = DataManager(data_file, compact_threshold=rounds * 2, sync_interval=interval)
+        dm.replace_tasks("基准", make_tasks(tasks))
+        dm.save()
+        start = time.perf_counter()
+        for i in range(rounds):
+            dm.update_task(f"t{i % tasks}", total_elapsed=float(i))
+            dm.save_async()
+        dm.flush()
+        save_ms = (time.perf_counter() - start) / rounds * 1000
+        snapshot_ms = measure(dm.compact, 10) / 1000
+        record(f"刷盘间隔 {interval:g}s 每次保存", save_ms, "ms")
+        record(f"刷盘间隔 {interval:g}s 写快照", snapshot_ms, "ms")
+        print(f"{interval:>10.1f} {save_ms:>12.3f} {snapshot_ms:>10.2f}")
+        dm.close()
+
+
+def bench_codec(sizes=(1000, 10000, 50000)):
+    """快照编解码：各 JSON 编解码器紧凑 / 缩进输出时的文件大小、保存和加载耗时（含原来的 json.dump 流式写入）"""
+    import json
+    from atomic_io import atomic_write
+    from json_codec import available_codecs
+
+    path = os.path.join(work_dir(), "todo_data.json")
+
+    def legacy_save(snapshot):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+
+    def legacy_load():
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    print(f"{'任务数':>7} {'编解码器':>16} {'大小 KB':>9} {'保存 ms':>9} {'加载 ms':>9}")
+    for size in sizes:
+        snapshot = {"tasks": {f"列表{i}": make_tasks(size // 10) for i in range(10)},
+                    "timer": None, "generation": 1}
+        variants = [("json.dump 缩进", lambda: legacy_save(snapshot), legacy_load)]
+        for name, codec in available_codecs().items():
+            for pretty in (False, True):
+                def save(codec=codec, pretty=pretty):
+                    atomic_write(path, codec.dumps(snapshot, pretty))
+
+                def load(codec=codec):
+                    with open(path, 'rb') as f:
+                        return codec.loads(f.read())
+
+                variants.append((f"{name} {'缩进' if pretty else '紧凑'}", save, load))
+        repeat = max(3, 30000 // size)
+        for label, save, load in variants:
+            save_ms = measure(save, repeat) / 1000
+            kb = os.path.getsize(path) / 1024
+            load_ms = measure(load, repeat) / 1000
+            record(f"{size} 任务 {label} 保存", save_ms, "ms")
+            record(f"{size} 任务 {label} 加载", load_ms, "ms")
+            print(f"{size:>7} {label:>16} {kb:>9.0f} {save_ms:>9.2f} {load_ms:>9.2f}")
+
+
+def bench_task_memory(count: int = 100000):
+    """任务模型：普通 dict 与带 __slots__ 的 Task 对象每个任务占用的内存（不含共享的字符串）"""
+    from models import Task
+
+    raw = make_tasks(count)
+    for label, build in (("dict", lambda: [dict(task) for task in raw]),
+                         ("Task", lambda: [Task.from_dict(task) for task in raw])):
+        tracemalloc.start()
+        tasks = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        record(f"{label} 每个任务", size / count, "B")
+        print(f"{label:>6}: 每个任务 {size / count:.0f} 字节")
+        del tasks
+
+
+def bench_data_io():
+    """DataManager 读写：10^2 ~ 10^6 个任务和统计记录时加载、读入全部统计、写完整快照和单次增量保存的耗时"""
+    from data_manager import DataManager
+
+    print(f"{'规模':>9} {'加载 ms':>10} {'读入统计 ms':>12} {'写快照 ms':>10} {'增量保存 ms':>12}")
+    for size in scales():
+        data_file = make_data_file(size, size)
+        repeat = 1 if size >= 10 ** 6 else 10
+        load_ms = measure(lambda: DataManager(data_file).close(), repeat) / 1000
+        dm = DataManager(data_file)
+
+        def read_stats():
+            dm.history.reset()
+            for month in dm.history.months():
+                dm.history.partition(month)
+
+        stats_ms = measure(read_stats, repeat) / 1000
+        snapshot_ms = measure(dm.compact, repeat) / 1000
+        task_id = dm.data["列表0"][0].id
+        counter = iter(range(1, 1000000))
+        save_ms = measure(lambda: (dm.update_task(task_id, total_elapsed=float(next(counter))), dm.save()), 50) / 1000
+        dm.close()
+        for case, value in (("加载", load_ms), ("读入统计", stats_ms), ("写快照", snapshot_ms), ("增量保存", save_ms)):
+            record(f"{size} 条 {case}", value, "ms")
+        print(f"{size:>9} {load_ms:>10.1f} {stats_ms:>12.1f} {snapshot_ms:>10.1f} {save_ms:>12.2f}")
+
+
+def bench_stats_periods():
+    """日 / 周 / 月统计：10^2 ~ 10^6 条统计记录（一年）时，首次查询（需要汇总）和再次查询（命中汇总表）的耗时"""
+    from data_manager import DataManager
+
+    print(f"{'统计记录数':>10} {'日统计 µs':>10} {'周统计首次 µs':>14} {'周统计再次 µs':>14} "
+          f"{'月统计首次 µs':>14} {'月统计再次 µs':>14}")
+    for size in scales():
+        dm = DataManager(make_data_file(100, size))
+        dm.get_monthly_stats("2024-12")  # 读入查询涉及的月份，只测汇总本身
+
+        def cold(query):
+            def run():
+                dm._rebuild_rollups()
+                query()
+            return run
+
+        daily = lambda: dm.get_daily_stats("2024-12-18")
+        weekly = lambda: dm.get_weekly_stats("2024-12-16")
+        monthly = lambda: dm.get_monthly_stats("2024-12")
+        values = [("日统计", measure(daily, 200)),
+                  ("周统计首次", measure(cold(weekly), 50)), ("周统计再次", measure(weekly, 200)),
+                  ("月统计首次", measure(cold(monthly), 20)), ("月统计再次", measure(monthly, 200))]
+        for case, us in values:
+            record(f"{size} 条 {case}", us, "µs")
+        print(f"{size:>10} " + " ".join(f"{us:>{14 if i else 10}.1f}" for i, (_, us) in enumerate(values)))
+        dm.close()
+
+
+def bench_histogram(frames: int = 200):
+    """报告窗口的周直方图：每帧绘制耗时"""
+    from datetime import date
+    from main_window import HistogramWidget
+
+    app = qt_app()
+    monday = date(2024, 12, 16)
+    widget = HistogramWidget(monday)
+    widget.set_data(monday, [3600.0 * (i + 1) for i in range(7)])
+    widget.resize(700, 300)
+    widget.show()
+    app.processEvents()
+    us = measure(widget.repaint, frames)
+    record("每帧", us, "µs")
+    print(f"每帧 {us:.1f} µs")
+    widget.close()
+
+
+BENCHMARKS = {
+    "task_highlight": bench_task_highlight,
+    "list_switch": bench_list_switch,
+    "timer_tick": bench_timer_tick,
+    "time_rings": bench_time_rings,
+    "ring_refresh": bench_ring_refresh,
+    "startup": bench_startup,
+    "stats_history": bench_stats_history,
+    "stats_query": bench_stats_query,
+    "storage": bench_storage,
+    "durability": bench_durability,
+    "codec": bench_codec,
+    "task_memory": bench_task_memory,
+    "data_io": bench_data_io,
+    "stats_periods": bench_stats_periods,
+    "histogram": bench_histogram,
+}
+
+
+def save_results(path: str):
+    """把全部结果连同运行环境写入 JSON 文件"""
+    from json_codec import codec
+
+    meta = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "json_codec": codec.name,
+        "quick": QUICK,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"meta": meta, "results": RESULTS}, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {path}（{len(RESULTS)} 项）")
+
+
+def compare_results(path: str, threshold: float) -> int:
+    """与基线结果比较，列出变化超过阈值的项目，返回变慢的项目数"""
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print("=" * 60)
+    print(f"与基线比较: {path}（阈值 {threshold:.0%}）")
+    print("=" * 60)
+    for key, result in RESULTS.items():
+        base = baseline.get(key)
+        lower_is_better = result["lower_is_better"]
+        if base is None or lower_is_better is None or not base["value"]:
+            continue
+        change = result["value"] / base["value"] - 1
+        if abs(change) < threshold:
+            continue
+        worse = change > 0 if lower_is_better else change < 0
+        regressions += worse
+        print(f"{'变慢' if worse else '变快'} {change:>+8.1%}  {key}: "
+              f"{base['value']:.4g} → {result['value']:.4g} {result['unit']}")
+    print(f"共 {regressions} 项变慢")
+    return regressions
+
+
+def main(argv=None) -> int:
+    global QUICK, _current
+
+    parser = argparse.ArgumentParser(description="性能基准")
+    parser.add_argument("names", nargs="*", help=f"基准名（可选: {', '.join(BENCHMARKS)}）")
+    parser.add_argument("--quick", action="store_true", help="跳过 10^6 规模的数据")
+    parser.add_argument("--json", help="把结果保存为 JSON 文件")
+    parser.add_argument("--compare", help="与之前保存的 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.2, help="比较时视为变化的相对幅度（默认 0.2）")
+    args = parser.parse_args(argv)
+    QUICK = args.quick
+    for name in args.names:
+        if name not in BENCHMARKS:
+            print(f"未知的基准: {name}（可选: {', '.join(BENCHMARKS)}）")
+            return 1
+    for name in args.names or BENCHMARKS:
+        print("=" * 60)
+        print(f"{name}: {BENCHMARKS[name].__doc__}")
+        print("=" * 60)
+        _current = name
+        try:
+            BENCHMARKS[name]()
+        finally:
+            while _work_dirs:
+                shutil.rmtree(_work_dirs.pop(), ignore_errors=True)
+    if args.json:
+        save_results(args.json)
+    if args.compare:
+        return 1 if compare_results(args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""批量导入 / 导出模块 - 在数据管理器之上流式读写 CSV 和 JSON Lines
+
+- 导入逐行读取、校验、去重，整个批次在一个事务中提交，只持久化一次
+- 导出逐行写出任务或统计历史，内存占用与文件大小无关
+- 不依赖 Qt，可以在没有图形界面的服务器上运行
+
+用法:
+    python bulk_io.py import 任务.csv [--list 默认列表]
+    python bulk_io.py export-tasks 任务.jsonl [--list 列表 ...]
+    python bulk_io.py export-stats 统计.csv [--from 2024-01-01] [--to 2024-12-31]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from data_manager import DataManager
+from storage import DataFileLocked
+from todolist import DATA_FILE
+
+DEFAULT_LIST = "我的任务"
+
+# 导入时字段名；CSV 的表头与 JSON Lines 的键相同
+TASK_FIELDS = ["list", "id", "text", "checked", "total_elapsed"]
+STAT_FIELDS = ["date", "task", "task_id", "duration", "timestamp"]
+
+# 导入报告中最多保留的错误条数
+MAX_REPORTED_ERRORS = 20
+
+FORMATS = ("csv", "jsonl")
+
+
+class ImportResult:
+    """导入结果统计"""
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[str] = []  # 前 MAX_REPORTED_ERRORS 条错误说明
+
+    def add_error(self, line: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"第 {line} 行: {message}")
+
+    def __str__(self):
+        return f"导入 {self.imported} 条，重复 {self.duplicates} 条，无效 {self.invalid} 条"
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """根据参数或扩展名确定文件格式"""
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = "jsonl" if ext in (".jsonl", ".ndjson") else "csv" if ext == ".csv" else None
+    if fmt not in FORMATS:
+        raise ValueError(f"无法确定文件格式: {path}（可选: {', '.join(FORMATS)}）")
+    return fmt
+
+
+def _read_rows(path: str, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """逐行读取，产生 (行号, 行数据, 错误说明)"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, None
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, None, f"JSON 解析失败: {e}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_no, None, "每行必须是一个 JSON 对象"
+                    continue
+                yield line_no, row, None
+
+
+def _parse_checked(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    text = str(value).strip().lower()
+    if text in ("", "0", "false", "no", "n", "否"):
+        return False
+    if text in ("1", "true", "yes", "y", "是"):
+        return True
+    raise ValueError(f"无法识别的完成状态: {value!r}")
+
+
+def _parse_task(row: Dict, default_list: str) -> Tuple[str, Dict]:
+    """校验一行任务数据，返回 (列表名, 任务)"""
+    text = str(row.get("text") or "").strip()
+    if not text:
+        raise ValueError("任务内容为空")
+    list_name = str(row.get("list") or "").strip() or default_list
+    elapsed = row.get("total_elapsed")
+    elapsed = float(elapsed) if elapsed not in (None, "") else 0.0
+    if not math.isfinite(elapsed):
+        raise ValueError(f"累计时间必须是有限的数值: {elapsed}")
+    if elapsed < 0:
+        raise ValueError(f"累计时间不能为负数: {elapsed}")
+    task = {"text": text, "checked": _parse_checked(row.get("checked")), "total_elapsed": elapsed}
+    task_id = str(row.get("id") or "").strip()
+    if task_id:
+        task["id"] = task_id
+    return list_name, task
+
+
+def import_tasks(dm: DataManager, path: str, fmt: Optional[str] = None,
+                 default_list: str = DEFAULT_LIST) -> ImportResult:
+    """从 CSV / JSON Lines 流式导入任务
+
+    同一 id 的任务、或同一列表中内容相同的任务视为重复，跳过。
+    整个文件在一个事务中提交：只持久化一次，读取出错时不留下半个批次。
+    """
+    fmt = detect_format(path, fmt)
+    result = ImportResult()
+    # 去重键：已有任务和本批次已导入的任务
+    seen = {(name, task.text) for name, tasks in dm.data.items() for task in tasks}
+    with dm.transaction():
+        for line_no, row, error in _read_rows(path, fmt):
+            if error is not None:
+                result.add_error(line_no, error)
+                continue
+            try:
+                list_name, task = _parse_task(row, default_list) # type: ignore
+            except (TypeError, ValueError) as e:
+                result.add_error(line_no, str(e))
+                continue
+            key = (list_name, task["text"])
+            if key in seen or ("id" in task and dm.get_task(task["id"]) is not None):
+                result.duplicates += 1
+                continue
+            seen.add(key)
+            if list_name not in dm.data:
+                dm.add_list(list_name)
+            dm.add_task(list_name, task)
+            result.imported += 1
+    return result
+
+
+def _write_rows(path: str, fmt: str, fields: List[str], rows: Iterable[Dict]) -> int:
+    """逐行写出，返回行数"""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps({k: row.get(k) for k in fields}, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+def export_tasks(dm: DataManager, path: str, fmt: Optional[str] = None,
+                 lists: Optional[List[str]] = None) -> int:
+    """导出任务（默认全部列表），返回导出的行数"""
+    fmt = detect_format(path, fmt)
+    names = lists if lists is not None else list(dm.data)
+
+    def rows():
+        for name in names:
+            for task in dm.data.get(name, []):
+                yield {"list": name, **task.to_dict()}
+
+    return _write_rows(path, fmt, TASK_FIELDS, rows())
+
+
+def export_stats(dm: DataManager, path: str, fmt: Optional[str] = None,
+                 start: Optional[str] = None, end: Optional[str] = None) -> int:
+    """按日期顺序导出统计历史（可选日期范围，格式 YYYY-MM-DD，包含两端），返回导出的行数"""
+    fmt = detect_format(path, fmt)
+
+    def rows():
+        # 逐月读入，只读需要的月份
+        for month in dm.history.months():
+            if (start and month < start[:7]) or (end and month > end[:7]):
+                continue
+            for date in dm.history.partition(month).dates():
+                if (start and date < start) or (end and date > end):
+                    continue
+                for entry in dm.history.entries(date):
+                    yield {"date": date, **entry}
+
+    return _write_rows(path, fmt, STAT_FIELDS, rows())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ToDo 任务清单批量导入 / 导出")
+    parser.add_argument("--data", default=DATA_FILE, help="数据文件路径")
+    parser.add_argument("--format", choices=FORMATS, help="文件格式（默认按扩展名判断）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="导入任务")
+    p_import.add_argument("file")
+    p_import.add_argument("--list", default=DEFAULT_LIST, help="没有 list 列时导入到的列表")
+
+    p_tasks = sub.add_parser("export-tasks", help="导出任务")
+    p_tasks.add_argument("file")
+    p_tasks.add_argument("--list", action="append", dest="lists", help="只导出指定列表（可重复）")
+
+    p_stats = sub.add_parser("export-stats", help="导出统计历史")
+    p_stats.add_argument("file")
+    p_stats.add_argument("--from", dest="start", help="开始日期 YYYY-MM-DD")
+    p_stats.add_argument("--to", dest="end", help="结束日期 YYYY-MM-DD")
+
+    args = parser.parse_args(argv)
+    try:
+        dm = DataManager(args.data)
+    except DataFileLocked as e:
+        print(e)
+        return 1
+    try:
+        if args.command == "import":
+            result = import_tasks(dm, args.file, args.format, args.list)
+            print(result)
+            for error in result.errors:
+                print(f"  {error}")
+        elif args.command == "export-tasks":
+            print(f"导出 {export_tasks(dm, args.file, args.format, args.lists)} 个任务")
+        else:
+            print(f"导出 {export_stats(dm, args.file, args.format, args.start, args.end)} 条统计记录")
+    except (OSError, ValueError) as e:
+        print(f"操作失败: {e}")
+        return 1
+    finally:
+        for path in dm.take_damaged_segments():
+            print(f"统计分段无法读取，已改名保留: {path}")
+        dm.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
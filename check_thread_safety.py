@@ -1,32 +1,159 @@
 #!/usr/bin/env python3
-"""线程安全性验证脚本"""
+"""线程安全性验证脚本
 
-import sys
+主线程持续修改数据并频繁提交保存，写盘线程同时序列化和写入；
+结束后重新加载，检查磁盘上的数据与内存中的数据完全一致，且写盘过程中没有出错；
+再把快照文件截断一半，检查加载时能从最新的备份恢复，损坏的文件被保留下来；
+损坏一个月的统计分段，检查它被改名保留，之后的保存不会覆盖原来的记录。
+JSON 和 SQLite 两种存储后端各检查一遍（SQLite 没有快照文件，不做恢复检查）。
+
+用法: python check_thread_safety.py [变更轮数]
+"""
+
+import json
+import math
 import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from data_manager import DataManager
+from models import dump_tasks
+
+# 用较小的压缩阈值，让快照写入和日志追加交替发生
+COMPACT_THRESHOLD = 50
+# 统计记录和计时会话分布在一年中的各个月份，常驻分区数很小，让分区频繁淘汰和重新读入
+RESIDENT_MONTHS = 3
+
+
+def same_totals(a, b) -> bool:
+    """两份 {任务: 秒数} 一致（聚合查询与内存汇总的求和顺序不同，允许舍入误差）"""
+    return a.keys() == b.keys() and all(math.isclose(a[k], b[k], rel_tol=1e-9) for k in a)
+
+
+def stress(rounds: int, file_name: str = "todo_data.json") -> bool:
+    print("=" * 60)
+    print(f"线程安全性检查 ({file_name})")
+    print("=" * 60)
+
+    work_dir = tempfile.mkdtemp(prefix="todo-thread-check-")
+    data_file = os.path.join(work_dir, file_name)
+    dm = DataManager(data_file, compact_threshold=COMPACT_THRESHOLD)
+    dm.history.capacity = RESIDENT_MONTHS
+    rng = random.Random(0)
+    lists = ["列表A", "列表B", "列表C"]
+    for name in lists:
+        dm.add_list(name)
+
+    print(f"\n✓ 主线程修改数据 {rounds} 轮，同时由写盘线程保存...")
+    start = time.perf_counter()
+    submit_cost = 0.0
+    for i in range(rounds):
+        list_name = rng.choice(lists)
+        tasks = dm.data[list_name]
+        action = rng.random()
+        if action < 0.4 or not tasks:
+            dm.add_task(list_name, {"text": f"任务{i}", "checked": False, "total_elapsed": 0})
+        elif action < 0.8:
+            task = rng.choice(tasks)
+            dm.update_task(task.id, total_elapsed=task.total_elapsed + 1, checked=rng.random() < 0.2)
+        elif action < 0.9:
+            dm.remove_task(rng.choice(tasks).id)
+        elif action < 0.95:
+            date = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            dm.record_task_completion(f"任务{i}", rng.random() * 100, date=date, task_id=rng.choice(tasks).id)
+        else:
+            # 计时会话，常常跨越午夜甚至月末
+            begin = datetime(2024, rng.randint(1, 12), rng.randint(1, 28)).timestamp() + rng.uniform(0, 86400)
+            dm.log_session(rng.choice(tasks).id, begin, begin + rng.uniform(0, 3 * 86400))
+        if i % 7 == 0:
+            t = time.perf_counter()
+            dm.save_async()
+            submit_cost = max(submit_cost, time.perf_counter() - t)
+    ok = dm.save()  # 最后一轮之后的变更也要保存
+    elapsed = time.perf_counter() - start
+    print(f"  - 耗时 {elapsed:.2f} 秒，单次提交保存最长 {submit_cost * 1000:.2f} ms")
+    print("  - 写盘线程没有出错:", ok)
+
+    print("\n✓ 重新加载并比较...")
+    reloaded = DataManager(data_file)
+    reloaded.history.capacity = RESIDENT_MONTHS
+    same_monthly = all(same_totals(reloaded.get_monthly_stats(f"2024-{m:02d}"), dm.get_monthly_stats(f"2024-{m:02d}"))
+                       for m in range(1, 13))
+    same_tasks = reloaded.data == dm.data
+    same_stats = reloaded.stats == dm.stats
+    print("  - 任务数据一致:", same_tasks)
+    print("  - 统计数据一致:", same_stats and same_monthly)
+    print("  - 没有残留的临时文件:", not any(name.endswith(".tmp") for _, _, names in os.walk(work_dir) for name in names))
+    reloaded.close()
+    dm.close()
+
+    passed = ok and same_tasks and same_stats and same_monthly
+    if file_name.endswith(".json"):
+        passed = check_recovery(data_file) and passed
+        passed = check_segment_recovery(os.path.join(work_dir, "segments.json")) and passed
+    print("\n✓ 所有检查完成！" if passed else "\n✗ 检查失败！")
+    print("\n关键设计：")
+    print("  • 主线程: 唯一修改数据的线程，保存时只交出日志记录或复制快照")
+    print("  • 写盘线程: 只序列化交给它的数据，快照先写临时文件并刷盘再原子替换，日志按组提交刷盘")
+    print("  • 报告线程: 只读取主线程准备的统计快照，结果通过信号交回主线程")
+    print("=" * 60)
+    return passed
+
+
+def check_recovery(data_file: str) -> bool:
+    """截断快照文件，模拟断电后的残缺快照，检查从最新的备份恢复"""
+    print("\n✓ 截断快照文件后重新加载...")
+    with open(data_file + ".1", 'r', encoding='utf-8') as f:
+        backup = json.load(f)
+    with open(data_file, 'r+b') as f:
+        f.truncate(os.path.getsize(data_file) // 2)
+    recovered = DataManager(data_file)
+    same_backup = dump_tasks(recovered.data) == backup["tasks"]
+    kept = os.path.exists(data_file + ".corrupt")
+    saved = recovered.save() and os.path.exists(data_file)
+    recovered.close()
+    print("  - 从备份恢复:", same_backup)
+    print("  - 损坏的快照已保留:", kept)
+    print("  - 恢复后可以保存:", saved)
+    return same_backup and kept and saved
+
+
+def check_segment_recovery(data_file: str) -> bool:
+    """损坏某个月的统计分段的头部，检查加载后它被改名保留，再次保存也不会覆盖其中的记录"""
+    print("\n✓ 损坏统计分段后继续记录并保存...")
+    dm = DataManager(data_file)
+    dm.record_task_completion("读书", 80.0, date="2024-09-01")
+    dm.record_task_completion("读书", 120.0, date="2024-09-02")
+    dm.compact()
+    dm.close()
+    segment = dm.history.segment_path("2024-09")
+    with open(segment, "r+b") as f:
+        original = f.read()
+        f.seek(0)
+        f.write(b"\0" * 8)
+
+    damaged = DataManager(data_file)
+    damaged.record_task_completion("读书", 50.0, date="2024-09-03")
+    saved = damaged.compact()
+    reported = damaged.take_damaged_segments()
+    damaged.close()
+    kept = False
+    if os.path.exists(segment + ".corrupt"):
+        with open(segment + ".corrupt", "rb") as f:
+            kept = f.read()[8:] == original[8:]
+    total = DataManager(data_file)
+    only_new = total.total_time("2024-09-01", "2024-09-30") == 50.0
+    total.close()
+    print("  - 损坏的分段已报告:", len(reported) == 1)
+    print("  - 损坏的分段已保留、未被覆盖:", kept)
+    print("  - 之后的记录照常保存:", saved and only_new)
+    return len(reported) == 1 and kept and saved and only_new
+
 
-# 检查代码中是否有线程不安全的操作
-print("=" * 60)
-print("线程安全性检查")
-print("=" * 60)
-
-with open('main_window.py', 'r', encoding='utf-8') as f:
-    content = f.read()
-    
-# 检查后台线程中的可疑操作
-print("\n✓ 检查后台线程代码...")
-thread_section = content[content.find('def background_worker'):content.find('def background_worker') + 1000]
-print("  - 不应该访问 self.tasks_layout:", 'tasks_layout' not in thread_section)
-print("  - 不应该访问 self.current_list_label:", 'current_list_label' not in thread_section)
-print("  - 不应该启动/停止定时器:", 'timer.start' not in thread_section and 'timer.stop' not in thread_section)
-
-# 检查是否有正确的线程隔离
-print("\n✓ 检查线程隔离...")
-print("  - 已添加 UI 同步定时器:", 'sync_timer' in content)
-print("  - 后台线程仅做数据保存:", 'self.data_manager.save()' in thread_section)
-
-print("\n✓ 所有检查完成！")
-print("\n关键设计：")
-print("  • 后台线程: 仅保存数据，不触及Qt对象")
-print("  • UI同步定时器: 在主线程中定期同步UI数据")
-print("  • 信号机制: 线程安全的通信方式")
-print("=" * 60)
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    results = [stress(rounds, name) for name in ("todo_data.json", "todo_data.db")]
+    sys.exit(0 if all(results) else 1)
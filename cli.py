@@ -0,0 +1,240 @@
+"""命令行工具 - 不启动图形界面、不导入 Qt，直接操作数据文件
+
+用法:
+    python cli.py lists                      # 列出所有列表
+    python cli.py tasks [列表]                # 列出任务（默认全部列表）
+    python cli.py add 任务内容 [--list 列表]
+    python cli.py done 任务                   # 标记完成；任务可以是 id 前缀或完整的任务内容
+    python cli.py start 任务 / stop / status  # 计时，与图形界面共用同一个计时状态
+    （图形界面运行期间锁定数据文件，命令行拒绝执行，先退出图形界面）
+    python cli.py stats daily [YYYY-MM-DD] | weekly [YYYY-MM-DD] | monthly [YYYY-MM]
+    python cli.py report 开始 结束 [--by task|list|weekday|hour|day] [--top N]   # 任意区间的分组统计
+
+批量导入 / 导出见 bulk_io.py。
+"""
+import argparse
+import sys
+from datetime import date as Date
+from typing import List, Optional, Tuple
+
+from data_manager import DataManager
+from models import Task
+from stats_query import GROUP_BY
+from storage import DataFileLocked
+from todolist import DATA_FILE
+
+DEFAULT_LIST = "我的任务"
+# 列出任务时显示的 id 前缀长度
+SHORT_ID = 8
+
+
+class CliError(Exception):
+    """命令参数有误（找不到任务等）"""
+
+
+def format_duration(seconds: float) -> str:
+    """格式化时长显示"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    elif minutes > 0:
+        return f"{minutes}m {secs}s"
+    else:
+        return f"{secs}s"
+
+
+def find_task(dm: DataManager, key: str) -> Tuple[str, Task]:
+    """按 id 前缀或完整任务内容查找任务，返回 (列表名, 任务)"""
+    matches: List[Tuple[str, Task]] = []
+    for name, tasks in dm.data.items():
+        for task in tasks:
+            if task.id.startswith(key) or task.text == key:
+                matches.append((name, task))
+    if not matches:
+        raise CliError(f"找不到任务: {key}")
+    if len(matches) > 1:
+        candidates = ", ".join(f"{t.id[:SHORT_ID]} {t.text}" for _, t in matches[:5])
+        raise CliError(f"匹配到多个任务，请使用更长的 id 前缀: {candidates}")
+    return matches[0]
+
+
+def cmd_lists(dm: DataManager, args) -> None:
+    for name, tasks in dm.data.items():
+        done = sum(1 for t in tasks if t.checked)
+        print(f"{name}  ({done}/{len(tasks)})")
+
+
+def cmd_tasks(dm: DataManager, args) -> None:
+    if args.list is not None and args.list not in dm.data:
+        raise CliError(f"列表不存在: {args.list}")
+    running_id = dm.timer["id"] if dm.timer else None
+    for name in [args.list] if args.list is not None else list(dm.data):
+        print(f"[{name}]")
+        for task in dm.data[name]:
+            mark = "x" if task.checked else " "
+            if task.id == running_id:
+                elapsed = f"{format_duration(dm.timer_elapsed())} 计时中" # type: ignore
+            else:
+                elapsed = format_duration(task.total_elapsed)
+            print(f"  [{mark}] {task.id[:SHORT_ID]}  {task.text}  ({elapsed})")
+
+
+def cmd_add(dm: DataManager, args) -> None:
+    if args.list not in dm.data:
+        dm.add_list(args.list)
+    task_id = dm.add_task(args.list, {"text": args.text, "checked": False, "total_elapsed": 0})
+    print(f"已添加 {task_id[:SHORT_ID]} 到 {args.list}")
+
+
+def cmd_done(dm: DataManager, args) -> None:
+    _, task = find_task(dm, args.task)
+    # 与图形界面一致：完成正在计时的任务时停止计时（这段计时会话计入统计）
+    if dm.timer is not None and dm.timer["id"] == task.id:
+        dm.stop_timer()
+    dm.update_task(task.id, checked=True)
+    print(f"已完成: {task.text}")
+
+
+def cmd_start(dm: DataManager, args) -> None:
+    _, task = find_task(dm, args.task)
+    if task.checked:
+        raise CliError(f"任务已完成: {task.text}")
+    dm.start_timer(task.id)
+    print(f"开始计时: {task.text}")
+
+
+def cmd_stop(dm: DataManager, args) -> None:
+    task = dm.get_task(dm.timer["id"]) if dm.timer else None
+    total = dm.stop_timer()
+    if total is None:
+        print("没有正在计时的任务")
+    else:
+        print(f"停止计时: {task.text if task else ''}  累计 {format_duration(total)}")
+
+
+def cmd_status(dm: DataManager, args) -> None:
+    if dm.timer is None:
+        print("没有正在计时的任务")
+        return
+    task = dm.get_task(dm.timer["id"])
+    print(f"计时中: {task.text if task else ''}  累计 {format_duration(dm.timer_elapsed())}") # type: ignore
+
+
+def cmd_stats(dm: DataManager, args) -> None:
+    when = args.when
+    if when is not None:
+        # 与 report 一样先校验日期，格式错误时给出用法而不是异常
+        try:
+            if args.period == "monthly":
+                when = Date.fromisoformat(when + "-01").isoformat()[:7]
+            else:
+                when = Date.fromisoformat(when).isoformat()
+        except ValueError as e:
+            usage = "YYYY-MM" if args.period == "monthly" else "YYYY-MM-DD"
+            raise CliError(f"日期格式应为 {usage}: {e}")
+    if args.period == "daily":
+        stats = dm.get_daily_stats(when)
+    elif args.period == "weekly":
+        stats = dm.get_weekly_stats(when)
+    else:
+        stats = dm.get_monthly_stats(when)
+    if not stats:
+        print("没有统计数据")
+        return
+    for task, seconds in sorted(stats.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {format_duration(seconds):>10}  {task}")
+    print(f"  {format_duration(sum(stats.values())):>10}  合计")
+
+
+WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+
+def cmd_report(dm: DataManager, args) -> None:
+    try:
+        start, end = Date.fromisoformat(args.start), Date.fromisoformat(args.end)
+    except ValueError as e:
+        raise CliError(f"日期格式应为 YYYY-MM-DD: {e}")
+    if start > end:
+        raise CliError("开始日期晚于结束日期")
+    results = dm.query_stats(args.start, args.end, args.by, args.top)
+    if not results:
+        print("没有统计数据")
+        return
+    for key, seconds in results.items():
+        if args.by == "weekday":
+            label = WEEKDAY_NAMES[key]
+        elif args.by == "hour":
+            label = f"{key:02d}:00"
+        else:
+            label = "(已删除的任务)" if key is None else key
+        print(f"  {format_duration(seconds):>10}  {label}")
+    print(f"  {format_duration(dm.total_time(args.start, args.end)):>10}  合计")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ToDo 任务清单命令行工具")
+    parser.add_argument("--data", default=DATA_FILE, help="数据文件路径")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("lists", help="列出所有列表").set_defaults(func=cmd_lists)
+
+    p = sub.add_parser("tasks", help="列出任务")
+    p.add_argument("list", nargs="?", help="列表名（默认全部）")
+    p.set_defaults(func=cmd_tasks)
+
+    p = sub.add_parser("add", help="添加任务")
+    p.add_argument("text")
+    p.add_argument("--list", default=DEFAULT_LIST, help="列表名（不存在时自动创建）")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("done", help="标记任务完成")
+    p.add_argument("task", help="id 前缀或完整的任务内容")
+    p.set_defaults(func=cmd_done)
+
+    p = sub.add_parser("start", help="开始计时")
+    p.add_argument("task", help="id 前缀或完整的任务内容")
+    p.set_defaults(func=cmd_start)
+
+    sub.add_parser("stop", help="停止计时").set_defaults(func=cmd_stop)
+    sub.add_parser("status", help="查看计时状态").set_defaults(func=cmd_status)
+
+    p = sub.add_parser("stats", help="查看统计")
+    p.add_argument("period", choices=["daily", "weekly", "monthly"])
+    p.add_argument("when", nargs="?", help="日期 YYYY-MM-DD（月统计为 YYYY-MM），默认今天")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("report", help="任意区间的分组统计")
+    p.add_argument("start", help="开始日期 YYYY-MM-DD")
+    p.add_argument("end", help="结束日期 YYYY-MM-DD（包含）")
+    p.add_argument("--by", choices=GROUP_BY, default="task", help="分组方式（默认按任务）")
+    p.add_argument("--top", type=int, help="只显示时长最多的前 N 项")
+    p.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        dm = DataManager(args.data)
+    except DataFileLocked as e:
+        print(e)
+        return 1
+    try:
+        args.func(dm, args)
+    except CliError as e:
+        print(e)
+        return 1
+    finally:
+        for path in dm.take_damaged_segments():
+            print(f"统计分段无法读取，已改名保留: {path}")
+    # 没有变更时 save() 不写盘；旧数据加载时补齐的任务 id 也在这里持久化，保证 id 前缀在多次调用间稳定
+    if not dm.save():
+        print("保存数据失败")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
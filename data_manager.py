@@ -1,130 +1,571 @@
-"""数据持久化模块 - 处理 JSON 数据的读写"""
-import json
-import os
-from datetime import datetime, timedelta
-from typing import Dict, List
+"""数据持久化模块 - 内存中的任务数据和统计历史
+
+数据管理器在内存中维护任务列表、计时状态和统计历史；每次变更生成一条变更记录，
+保存时交给存储后端写入磁盘（见 storage.py）：默认是 JSON 快照 + 日志 + 按月分段的统计历史，
+数据文件为 .db / .sqlite 时使用 SQLite 数据库。
+每次变更都会递增 version，自上次保存以来没有变更时 save() 不做任何磁盘操作。
+
+统计数据按月分区、按天索引，日统计直接汇总当天的记录；周 / 月统计走汇总表（ISO 周 / 月 → 任务 → 秒数），
+某个周 / 月第一次被查询时汇总并缓存（后端支持聚合查询时由后端汇总），新的完成记录在写入时增量更新已缓存的汇总。
+任意区间的分组统计（按任务 / 列表 / 星期 / 小时 / 日期，取前 N 项）走前缀和索引（见 stats_query.py），
+索引在第一次区间查询时构建，之后随新记录增量更新。
+统计数据变化时会通知已注册的监听器（受影响的日期和任务），供报告界面按需刷新。
+
+任务是带 __slots__ 的 Task 对象（见 models.py），界面模型直接绑定 data 中的任务列表；
+变更记录和存储后端使用 JSON 对象，应用记录时转换为 Task。
+每个任务都带有持久的唯一 id，数据管理器维护 id → 任务的索引，
+任务的更新、删除和统计归属都按 id 定位；没有 id 的旧数据在加载时自动补齐。
+正在计时的任务（开始时间和开始前的累计时间）也保存在数据中，
+图形界面和命令行共用同一个计时状态。
+
+统计数据来自计时会话：每次停止计时都会记录一条会话 (任务 id, 开始, 结束)，
+会话在本地时间的零点处切开，每一段计入所在的那一天（记录的时间戳为该段的开始时间），
+跨越午夜的计时、以及从未完成的任务上花的时间都会准确地计入对应的日期。
+
+线程模型：数据只由一个线程（界面主线程）读写。保存时主线程只做廉价的准备工作——
+交出待写的变更记录，或复制一份快照数据——然后交给存储后端的写盘线程，
+序列化和文件写入都在写盘线程中完成，写盘线程从不访问 data / history。
+"""
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date as Date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from json_codec import ensure_finite
+from models import Task, load_tasks
+from stats_query import StatsIndex, top_n
+from stats_store import day_pieces, parse_timestamp
+from storage import COMPACT_THRESHOLD, SYNC_INTERVAL, StorageBackend, open_backend
+
+# 统计变更监听器：(受影响的日期, 受影响的任务)，None 表示全部
+StatsListener = Callable[[Optional[Set[str]], Optional[Set[str]]], None]
+
+
+def new_task_id() -> str:
+    """生成新的任务 id"""
+    return uuid.uuid4().hex
+
+
+def _week_key(day: Date) -> str:
+    """ISO 周的键 (格式: YYYY-Www)，ISO 周从周一开始"""
+    iso_year, iso_week, _ = day.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
 
 
 class DataManager:
     """数据管理类"""
-    
-    def __init__(self, data_file: str):
+
+    def __init__(self, data_file: str, compact_threshold: int = COMPACT_THRESHOLD, autoload: bool = True,
+                 backend: Optional[StorageBackend] = None, sync_interval: float = SYNC_INTERVAL):
         self.data_file = data_file
-        self.data: Dict[str, List[Dict]] = {}
-        self.stats: Dict[str, List[Dict]] = {}  # 统计数据
-        self.load()
-    
+        # 存储后端，默认按数据文件的扩展名选择（见 storage.open_backend）；
+        # sync_interval 是日志刷盘的组提交间隔（秒），0 表示每次保存都刷盘
+        if backend is None:
+            backend = open_backend(data_file, compact_threshold, sync_interval)
+        self.backend = backend
+        self.data: Dict[str, List[Task]] = {}
+        self.history = self.backend.history  # 统计数据（按月分区，按需读入）
+        # 正在计时的任务: {"id", "start": 开始时间戳, "base": 开始前的累计秒数}，没有时为 None
+        self.timer: Optional[Dict] = None
+        self._pending: List[Dict] = []  # 尚未交给存储后端的变更记录
+        self.version = 0  # 单调递增的变更版本号
+        self._saved_version = 0  # 最近一次成功持久化时的版本号
+        # 统计汇总表（按需汇总的缓存）：键 → {任务: 秒数}
+        self._weekly_rollup: Dict[str, Dict[str, float]] = {}
+        self._monthly_rollup: Dict[str, Dict[str, float]] = {}
+        self._stats_index: Optional[StatsIndex] = None  # 区间查询索引，第一次查询时构建
+        # 后台构建索引期间新增的统计记录，交回索引时补上；没有进行中的构建时为 None
+        self._index_backlog: Optional[List[Tuple]] = None
+        self._load_count = 0  # 每次 load() 加一，用来识别基于旧数据的后台结果
+        self._listeners: List[StatsListener] = []
+        # 任务索引：id → (列表名, 任务)
+        self._task_index: Dict[str, Tuple[str, Task]] = {}
+        # 事务：嵌套深度，以及事务期间合并的统计变更通知
+        self._transaction_depth = 0
+        self._transaction_dates: Set[str] = set()
+        self._transaction_tasks: Set[str] = set()
+        # autoload=False 时由调用方稍后调用 load()（例如在后台线程中加载，完成后再交给主线程使用）
+        if autoload:
+            self.load()
+
     def load(self):
-        """加载数据"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    loaded_data = json.load(f)
-                
-                # 兼容性处理：如果数据格式较老
-                if isinstance(loaded_data, list):
-                    # 老格式：直接是任务列表
-                    self.data = {"我的任务": loaded_data}
-                else:
-                    # 新格式：包含任务列表和统计数据
-                    self.data = loaded_data.get("tasks", {})
-                    self.stats = loaded_data.get("stats", {})
-                    
-                # 确保至少有一个默认列表
-                if not self.data:
-                    self.data = {"我的任务": []}
-            except Exception as e:
-                print(f"加载数据失败: {e}")
-                self.data = {"我的任务": []}
-        else:
+        """加载数据：先读取快照，再回放快照之后的变更记录"""
+        self._pending = []
+        self._saved_version = self.version
+        self._load_count += 1
+        tasks, self.timer = self.backend.load()
+        self.data = load_tasks(tasks)
+        self._rebuild_rollups()
+        self._stats_index = None
+        self._index_backlog = None
+        self._rebuild_task_index()
+        self._replay()
+
+        # 确保至少有一个默认列表（下一次保存时写入）
+        if not self.data:
             self.data = {"我的任务": []}
-    
+            self.backend.schedule_rewrite()
+
+        # 重新加载后所有统计都可能变化
+        self._notify_stats_changed(None, None)
+
+    @property
+    def stats(self) -> Dict[str, List[Dict]]:
+        """旧格式的统计数据 {日期: [记录]}（每次调用都会读入全部月份，大量数据请直接使用 history）"""
+        return {date: list(self.history.entries(date)) for date in self.history.dates()}
+
+    def _replay(self):
+        """回放存储后端中快照之后的变更记录（已包含在统计历史中的统计记录跳过）"""
+        saved = self.backend.stat_saved
+        for record in self.backend.replay():
+            if record["op"] == "session":
+                self._apply_session(record, skip=saved)
+            elif not (record["op"] == "stat" and saved(record["date"])):
+                self._apply(record)
+
+    @property
+    def is_dirty(self) -> bool:
+        """自上次保存以来是否有未持久化的变更"""
+        return self.version != self._saved_version or self.backend.needs_save
+
+    def _mark_saved(self, version: int):
+        """记录已交给写盘线程的版本"""
+        self._saved_version = version
+
+    def save_async(self):
+        """提交保存 - 主线程只交出待写记录或复制快照数据，序列化和写盘在写盘线程中完成"""
+        self.backend.begin_save()
+        if not self.is_dirty:
+            return
+        records, self._pending = self._pending, []
+        self.backend.save(records, self.data, self.timer)
+        self._mark_saved(self.version)
+
     def save(self) -> bool:
-        """保存数据"""
+        """保存数据并等待写盘完成 - 追加新的变更记录，必要时压缩为快照；没有变更时直接返回"""
+        self.save_async()
+        return self.flush()
+
+    def flush(self) -> bool:
+        """等待已提交的保存全部写入磁盘（包括尚未刷盘的日志追加），返回是否全部成功"""
+        return self.backend.flush()
+
+    @property
+    def flush_failed(self) -> bool:
+        """已完成的写盘中是否有失败（下一次保存会重写完整快照）"""
+        return self.backend.write_failed
+
+    def take_damaged_segments(self) -> List[str]:
+        """取走自上次调用以来发现的损坏统计分段（已改名为 .corrupt 保留），用于提示用户"""
+        damaged, self.history.damaged = self.history.damaged, []
+        return damaged
+
+    def close(self):
+        """保存剩余变更并结束写盘线程"""
+        self.save()
+        self.backend.close()
+
+    def compact(self) -> bool:
+        """把全部数据写成新快照（清空日志）"""
+        self.backend.schedule_rewrite()
+        return self.save()
+
+    # ========== 变更操作（每次变更都会生成一条日志记录）
+    def _commit(self, record: Dict):
+        """应用变更并登记到待写入日志（含 NaN / Infinity 的记录无法写成 JSON，直接拒绝）"""
+        ensure_finite(record)
+        self._apply(record)
+        self._pending.append(record)
+        self.version += 1
+        touched = self._stats_touched(record)
+        if touched is not None:
+            dates, task = touched
+            if self._transaction_depth:
+                self._transaction_dates |= dates
+                self._transaction_tasks.add(task)
+            else:
+                self._notify_stats_changed(dates, {task})
+
+    @staticmethod
+    def _stats_touched(record: Dict) -> Optional[Tuple[Set[str], str]]:
+        """统计记录 / 计时会话影响的 (日期, 任务)；其他记录返回 None"""
+        if record["op"] == "stat":
+            return {record["date"]}, record["entry"]["task"]
+        if record["op"] == "session":
+            return {date for date, _, _ in day_pieces(record["start"], record["end"])}, record["task"]
+        return None
+
+    @contextmanager
+    def transaction(self) -> Iterator["DataManager"]:
+        """批量变更：期间的统计通知合并为一次，结束时只持久化一次
+
+        出错时丢弃事务中的全部变更（从磁盘重新加载事务开始前的状态）并重新抛出异常。
+        可以嵌套，只有最外层事务负责保存。
+        """
+        if self._transaction_depth == 0:
+            # 先落盘事务之前的变更，出错时才能精确回到事务开始前的状态
+            self.save()
+        self._transaction_depth += 1
         try:
-            # 准备保存的数据
-            save_data = {
-                "tasks": self.data,
-                "stats": self.stats
-            }
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"保存数据失败: {e}")
-            return False
-    
-    def record_task_completion(self, task_text: str, duration: float, date: str = None): # type: ignore
-        """记录任务完成数据"""
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._transaction_dates.clear()
+                self._transaction_tasks.clear()
+                self.load()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            dates, tasks = self._transaction_dates, self._transaction_tasks
+            self._transaction_dates, self._transaction_tasks = set(), set()
+            if dates:
+                self._notify_stats_changed(dates, tasks)
+            self.save()
+
+    def _apply(self, record: Dict):
+        """把一条变更记录应用到内存数据（实时修改与日志回放共用）"""
+        op = record["op"]
+        if op == "add_list":
+            self.data.setdefault(record["list"], [])
+        elif op == "rename_list":
+            tasks = self.data[record["new"]] = self.data.pop(record["old"])
+            for task in tasks:
+                self._task_index[task.id] = (record["new"], task)
+        elif op == "delete_list":
+            for task in self.data.pop(record["list"], []):
+                self._task_index.pop(task.id, None)
+            self._drop_orphan_timer()
+        elif op == "set_list":
+            for task in self.data.get(record["list"], []):
+                self._task_index.pop(task.id, None)
+            # 原地替换，保持列表对象不变（界面模型直接绑定该列表）
+            tasks = self.data.setdefault(record["list"], [])
+            tasks[:] = [Task.from_dict(t) for t in record["tasks"]]
+            for task in tasks:
+                self._register_task(record["list"], task)
+            self._drop_orphan_timer()
+        elif op == "add_task":
+            task = Task.from_dict(record["task"])
+            self.data.setdefault(record["list"], []).append(task)
+            self._register_task(record["list"], task)
+        elif op == "update_task":
+            self._resolve_task(record).update(record["fields"])
+        elif op == "remove_task":
+            task = self._resolve_task(record)
+            tasks = self.data[record["list"]]
+            del tasks[next(i for i, t in enumerate(tasks) if t is task)]
+            self._task_index.pop(task.id, None)
+            self._drop_orphan_timer()
+        elif op == "start_timer":
+            self.timer = {"id": record["id"], "start": record["start"], "base": record["base"]}
+        elif op == "stop_timer":
+            self.timer = None
+        elif op == "stat":
+            entry = record["entry"]
+            self._add_stat(record["date"], entry["task"], entry["duration"],
+                           parse_timestamp(entry.get("timestamp")), entry.get("task_id"))
+        elif op == "session":
+            self._apply_session(record)
+
+    def _apply_session(self, record: Dict, skip: Optional[Callable[[str], bool]] = None):
+        """把计时会话按天切开计入统计；skip(日期) 为 True 的部分跳过（日志回放时已包含在统计分段中）"""
+        for date, start, seconds in day_pieces(record["start"], record["end"]):
+            if skip is not None and skip(date):
+                continue
+            self._add_stat(date, record["task"], seconds, start, record["id"])
+
+    def _add_stat(self, date: str, task: str, seconds: float, start: float, task_id: Optional[str]):
+        """把一条统计记录写入统计历史，并更新汇总表和区间查询索引"""
+        self.history.append(date, task, seconds, start, task_id)
+        self._add_to_rollups(date, task, seconds)
+        if self._stats_index is not None:
+            self._stats_index.add(date, task, seconds, start, task_id)
+        if self._index_backlog is not None:
+            self._index_backlog.append((date, task, seconds, start, task_id))
+
+    # ========== 任务索引
+    def _rebuild_task_index(self):
+        """重建 id → 任务索引，为缺少 id 的旧任务补齐 id"""
+        self._task_index = {}
+        for list_name, tasks in self.data.items():
+            for task in tasks:
+                self._register_task(list_name, task)
+
+    def _register_task(self, list_name: str, task: Task):
+        """登记任务到索引；没有 id 或 id 重复时分配新 id，并安排重写快照以持久化"""
+        task_id = task.id
+        if not task_id or task_id in self._task_index:
+            task_id = task.id = new_task_id()
+            self.backend.schedule_rewrite()
+        self._task_index[task_id] = (list_name, task)
+
+    def _resolve_task(self, record: Dict) -> Task:
+        """按记录中的 id 定位任务（兼容按下标记录的旧日志）"""
+        if "id" in record:
+            return self._task_index[record["id"]][1]
+        return self.data[record["list"]][record["index"]]
+
+    def _drop_orphan_timer(self):
+        """计时中的任务被删除后，计时状态随之清除"""
+        if self.timer is not None and self.timer["id"] not in self._task_index:
+            self.timer = None
+
+    def get_task(self, task_id: str) -> Optional[Task]:
+        """按 id 获取任务"""
+        entry = self._task_index.get(task_id)
+        return entry[1] if entry else None
+
+    def task_list_name(self, task_id: str) -> Optional[str]:
+        """按 id 获取任务所属的列表名"""
+        entry = self._task_index.get(task_id)
+        return entry[0] if entry else None
+
+    # ========== 统计变更通知
+    def add_listener(self, callback: StatsListener):
+        """注册统计变更监听器"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: StatsListener):
+        """移除统计变更监听器"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify_stats_changed(self, dates: Optional[Set[str]], tasks: Optional[Set[str]]):
+        """通知监听器哪些日期 / 任务的统计发生了变化"""
+        for callback in list(self._listeners):
+            try:
+                callback(dates, tasks)
+            except Exception as e:
+                print(f"统计变更通知失败: {e}")
+
+    # ========== 统计汇总表
+    def _rebuild_rollups(self):
+        """清空全部汇总表，之后的查询从统计数据重新汇总"""
+        self._weekly_rollup = {}
+        self._monthly_rollup = {}
+
+    def _add_to_rollups(self, date: str, task: str, duration: float):
+        """把一条记录累加到已缓存的周 / 月汇总表（未缓存的在查询时再汇总）"""
+        for table, key in ((self._weekly_rollup, _week_key(Date.fromisoformat(date))),
+                           (self._monthly_rollup, date[:7])):
+            totals = table.get(key)
+            if totals is not None:
+                totals[task] = totals.get(task, 0) + duration
+
+    def _rollup(self, table: Dict[str, Dict[str, float]], key: str, days: Iterator[Date]) -> Dict[str, float]:
+        """取汇总表中的一项，没有缓存时由存储后端聚合，或汇总 days 中每一天的统计数据"""
+        totals = table.get(key)
+        if totals is None:
+            days = list(days)
+            totals = self.backend.totals_by_task(days[0].isoformat(), days[-1].isoformat())
+            if totals is None:
+                totals = {}
+                for day in days:
+                    for task, duration in self.history.totals_by_task(day.isoformat()).items():
+                        totals[task] = totals.get(task, 0) + duration
+            table[key] = totals
+        return totals
+
+    def add_list(self, name: str):
+        """新建任务列表"""
+        self._commit({"op": "add_list", "list": name})
+
+    def rename_list(self, old: str, new: str):
+        """重命名任务列表"""
+        self._commit({"op": "rename_list", "old": old, "new": new})
+
+    def delete_list(self, name: str):
+        """删除任务列表（正在计时的任务在该列表中时先停止计时）"""
+        if self.timer is not None and self.task_list_name(self.timer["id"]) == name:
+            self.stop_timer()
+        self._commit({"op": "delete_list", "list": name})
+
+    def add_task(self, list_name: str, task: Dict) -> str:
+        """向列表末尾添加任务，返回任务 id"""
+        task = dict(task)
+        task.setdefault("id", new_task_id())
+        self._commit({"op": "add_task", "list": list_name, "task": task})
+        return task["id"]
+
+    def update_task(self, task_id: str, **fields):
+        """更新任务字段（text / checked / total_elapsed）"""
+        list_name = self._task_index[task_id][0]
+        record = {"op": "update_task", "list": list_name, "id": task_id, "fields": fields}
+        last = self._pending[-1] if self._pending else None
+        if (last is not None and last["op"] == "update_task"
+                and last.get("id") == task_id and last["list"] == list_name):
+            # 计时过程中同一任务的连续更新合并为一条记录
+            ensure_finite(fields)
+            self._apply(record)
+            last["fields"].update(fields)
+            self.version += 1
+            return
+        self._commit(record)
+
+    def remove_task(self, task_id: str):
+        """删除任务（正在计时的任务先停止计时，已花的时间计入统计）"""
+        if self.timer is not None and self.timer["id"] == task_id:
+            self.stop_timer()
+        self._commit({"op": "remove_task", "list": self._task_index[task_id][0], "id": task_id})
+
+    def replace_tasks(self, list_name: str, tasks: List[Dict]):
+        """用界面上的任务替换整个列表 - 任务顺序不变时只为实际变化的字段生成记录"""
+        old = self.data.get(list_name)
+        if old is not None and [t.id for t in old] == [t.get("id") for t in tasks]:
+            for before, after in zip(old, tasks):
+                fields = {k: v for k, v in after.items() if before.get(k) != v}
+                if fields:
+                    self.update_task(before.id, **fields)
+        else:
+            tasks = [dict(t) for t in tasks]
+            for task in tasks:
+                task.setdefault("id", new_task_id())
+            self._commit({"op": "set_list", "list": list_name, "tasks": tasks})
+
+    def record_task_completion(self, task_text: str, duration: float, date: str = None, task_id: str = None): # type: ignore
+        """直接记录一段时长（计时会话由 stop_timer 自动记录，用于导入等没有起止时间的数据）"""
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
-        
-        if date not in self.stats:
-            self.stats[date] = []
-        
-        self.stats[date].append({
+
+        entry = {
             "task": task_text,
             "duration": duration,  # 以秒为单位
             "timestamp": datetime.now().isoformat()
-        })
-    
+        }
+        if task_id is not None:
+            entry["task_id"] = task_id
+        self._commit({"op": "stat", "date": date, "entry": entry})
+
+    # ========== 计时
+    def start_timer(self, task_id: str):
+        """开始为任务计时（先停止正在计时的其他任务）"""
+        if self.timer is not None:
+            self.stop_timer()
+        base = self._task_index[task_id][1].total_elapsed
+        self._commit({"op": "start_timer", "id": task_id, "start": time.time(), "base": base})
+
+    def timer_elapsed(self) -> Optional[float]:
+        """计时中任务的实时累计时间（秒），没有计时时为 None"""
+        if self.timer is None:
+            return None
+        return self.timer["base"] + (time.time() - self.timer["start"])
+
+    def stop_timer(self) -> Optional[float]:
+        """停止计时并把累计时间写回任务，返回累计时间；没有计时时返回 None"""
+        if self.timer is None:
+            return None
+        task_id, start = self.timer["id"], self.timer["start"]
+        end = time.time()
+        total = self.timer["base"] + (end - start)
+        task = self.get_task(task_id)
+        if task is not None:
+            self.update_task(task_id, total_elapsed=total)
+            self.log_session(task_id, start, end)
+        self._commit({"op": "stop_timer"})
+        return total
+
+    def log_session(self, task_id: str, start: float, end: float):
+        """记录一段计时会话（epoch 秒），按天切开计入统计"""
+        if end <= start:
+            return
+        task = self._task_index[task_id][1]
+        self._commit({"op": "session", "id": task_id, "task": task.text, "start": start, "end": end})
+
+    # ========== 区间查询
+    @property
+    def stats_index(self) -> StatsIndex:
+        """区间查询索引，第一次使用时逐月读入统计历史构建"""
+        if self._stats_index is None:
+            index = StatsIndex()
+            for month in self.history.months():
+                store = self.history.partition(month)
+                for date in store.dates():
+                    index.add_day(date, store.rows(date))
+            self._stats_index = index
+        return self._stats_index
+
+    @property
+    def stats_index_ready(self) -> bool:
+        """区间查询索引是否已经构建"""
+        return self._stats_index is not None
+
+    def stats_snapshot(self, months: Optional[List[str]] = None) -> Dict:
+        """统计历史的快照（默认全部月份），供后台线程计算报告，见 StatsHistory.snapshot"""
+        return self.history.snapshot(self.history.months() if months is None else months)
+
+    def begin_index_build(self) -> Tuple[int, Dict]:
+        """开始在后台构建区间查询索引：返回 (加载序号, 全部月份的快照)
+
+        后台线程用 stats_query.build_index 构建索引，再由主线程交给 adopt_stats_index；
+        期间新增的统计记录会被记下，交回时补进索引。构建失败或被放弃时调用 cancel_index_build。
+        """
+        self._index_backlog = []
+        return self._load_count, self.stats_snapshot()
+
+    def cancel_index_build(self):
+        """放弃进行中的后台构建（结果不会再交回），不再记下之后新增的统计记录"""
+        self._index_backlog = None
+
+    def adopt_stats_index(self, load_count: int, index: StatsIndex) -> bool:
+        """接收后台构建的索引；数据已重新加载或没有进行中的构建时丢弃，返回是否采用"""
+        if load_count != self._load_count or self._index_backlog is None:
+            return False
+        backlog, self._index_backlog = self._index_backlog, None
+        if self._stats_index is None:
+            for record in backlog:
+                index.add(*record)
+            self._stats_index = index
+        return self._stats_index is index
+
+    def query_stats(self, start: str, end: str, group_by: str = "task", top: Optional[int] = None) -> Dict:
+        """区间统计：start ~ end（YYYY-MM-DD，包含两端）按 group_by 分组的总秒数
+
+        group_by: task / list / weekday（0 为周一）/ hour / day，见 stats_query.GROUP_BY。
+        task / list 按时长降序排列，weekday / hour / day 按键的顺序排列；
+        top 不为 None 时只返回时长最多的前 top 项（按时长降序）。
+        """
+        totals = self.stats_index.group(Date.fromisoformat(start), Date.fromisoformat(end),
+                                        group_by, self.task_list_name)
+        if top is not None or group_by in ("task", "list"):
+            return dict(top_n(totals, top))
+        return totals
+
+    def total_time(self, start: str, end: str) -> float:
+        """区间 start ~ end（包含两端）的总秒数"""
+        return self.stats_index.total(Date.fromisoformat(start), Date.fromisoformat(end))
+
+    def stats_date_range(self) -> Optional[Tuple[str, str]]:
+        """有统计记录的最早和最晚日期，没有记录时为 None"""
+        days = self.stats_index.overall.days
+        if not days:
+            return None
+        return Date.fromordinal(days[0]).isoformat(), Date.fromordinal(days[-1]).isoformat()
+
     def get_daily_stats(self, date: str = None) -> Dict[str, float]: # type: ignore
         """获取某天的统计数据"""
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
-        
-        stats = {}
-        if date in self.stats:
-            for entry in self.stats[date]:
-                task = entry["task"]
-                duration = entry["duration"]
-                if task in stats:
-                    stats[task] += duration
-                else:
-                    stats[task] = duration
-        return stats
-    
+        totals = self.backend.totals_by_task(date, date)
+        return totals if totals is not None else self.history.totals_by_task(date)
+
     def get_weekly_stats(self, start_date: str = None) -> Dict[str, float]: # type: ignore
         """获取周统计数据"""
         if start_date is None:
-            # 获取本周周一的日期
-            today = datetime.now()
-            start_of_week = today - timedelta(days=today.weekday())
-            start_date = start_of_week.strftime("%Y-%m-%d")
+            start_of_week = datetime.now().date()
         else:
-            start_of_week = datetime.strptime(start_date, "%Y-%m-%d")
-            # 确保是周一
-            start_of_week = start_of_week - timedelta(days=start_of_week.weekday())
-        
-        stats = {}
-        for i in range(7):
-            date = (start_of_week + timedelta(days=i)).strftime("%Y-%m-%d")
-            daily_stats = self.get_daily_stats(date)
-            for task, duration in daily_stats.items():
-                if task in stats:
-                    stats[task] += duration
-                else:
-                    stats[task] = duration
-        return stats
-    
+            start_of_week = datetime.strptime(start_date, "%Y-%m-%d").date()
+        # 周一开始的一周即 ISO 周，start_date 落在周内任意一天都对应同一周
+        monday = start_of_week - timedelta(days=start_of_week.weekday())
+        week = (monday + timedelta(days=i) for i in range(7))
+        return dict(self._rollup(self._weekly_rollup, _week_key(start_of_week), week))
+
     def get_monthly_stats(self, month: str = None) -> Dict[str, float]: # type: ignore
         """获取月统计数据 (格式: YYYY-MM)"""
         if month is None:
             month = datetime.now().strftime("%Y-%m")
-        
-        stats = {}
-        # 遍历当月每一天
-        year, mon = map(int, month.split('-'))
-        for day in range(1, 32):
-            try:
-                date = datetime(year, mon, day).strftime("%Y-%m-%d")
-                daily_stats = self.get_daily_stats(date)
-                for task, duration in daily_stats.items():
-                    if task in stats:
-                        stats[task] += duration
-                    else:
-                        stats[task] = duration
-            except ValueError:
-                # 日期无效（如2月30日），跳出循环
-                break
-        return stats
\ No newline at end of file
+        first = datetime.strptime(month, "%Y-%m").date()
+        days = (first + timedelta(days=i) for i in range(31))
+        return dict(self._rollup(self._monthly_rollup, month, (day for day in days if day.month == first.month)))
@@ -0,0 +1,101 @@
+"""全局帧时钟模块 - 所有动画和周期刷新共用一个定时器"""
+import time
+from typing import Callable, Dict, List
+
+from PySide6 import QtCore, QtWidgets
+
+# 窗口隐藏或最小化时的最短刷新间隔（毫秒），即最多 1Hz
+THROTTLED_INTERVAL = 1000
+
+
+class FrameClock(QtCore.QObject):
+    """帧时钟 - 按订阅者需要的最短间隔运行，没有订阅者时完全停止"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 回调 → [期望间隔ms, 上次触发时间]
+        self._subscribers: Dict[Callable[[], None], List[float]] = {}
+        self._throttled = False
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self._tick)
+
+    def subscribe(self, callback: Callable[[], None], interval_ms: int):
+        """订阅时钟，每隔 interval_ms 调用一次 callback（重复订阅只更新间隔）"""
+        if callback in self._subscribers:
+            self._subscribers[callback][0] = interval_ms
+        else:
+            self._subscribers[callback] = [interval_ms, time.monotonic()]
+        self._reschedule()
+
+    def unsubscribe(self, callback: Callable[[], None]):
+        """取消订阅"""
+        if self._subscribers.pop(callback, None) is not None:
+            self._reschedule()
+
+    def is_subscribed(self, callback: Callable[[], None]) -> bool:
+        """回调是否已订阅"""
+        return callback in self._subscribers
+
+    def set_throttled(self, throttled: bool):
+        """窗口隐藏/最小化时节流到 1Hz"""
+        if throttled != self._throttled:
+            self._throttled = throttled
+            self._reschedule()
+
+    @property
+    def is_throttled(self) -> bool:
+        """是否处于节流状态（窗口隐藏或最小化）"""
+        return self._throttled
+
+    @property
+    def is_running(self) -> bool:
+        """底层定时器是否在运行"""
+        return self._timer.isActive()
+
+    @property
+    def interval(self) -> int:
+        """当前定时器间隔（毫秒）"""
+        return self._timer.interval()
+
+    def _effective_interval(self, interval_ms: float) -> float:
+        """节流后的实际间隔"""
+        if self._throttled:
+            return max(interval_ms, THROTTLED_INTERVAL)
+        return interval_ms
+
+    def _reschedule(self):
+        """按订阅者中最短的间隔重新启动定时器，没有订阅者时停止"""
+        if not self._subscribers:
+            self._timer.stop()
+            return
+        interval = int(min(self._effective_interval(entry[0]) for entry in self._subscribers.values()))
+        if not self._timer.isActive() or self._timer.interval() != interval:
+            self._timer.start(interval)
+
+    def _tick(self):
+        """分发一帧：只调用到期的订阅者"""
+        now = time.monotonic()
+        for callback, entry in list(self._subscribers.items()):
+            if callback not in self._subscribers:
+                continue  # 在本帧中被其他回调取消了订阅
+            # 允许少许提前，避免定时器抖动导致跳帧
+            if (now - entry[1]) * 1000 < self._effective_interval(entry[0]) * 0.9:
+                continue
+            entry[1] = now
+            try:
+                callback()
+            except RuntimeError as e:
+                # 回调所属的 Qt 对象已被销毁
+                print(f"帧时钟回调失败，已取消订阅: {e}")
+                self.unsubscribe(callback)
+
+
+_clock = None
+
+
+def frame_clock() -> FrameClock:
+    """获取全局帧时钟（首次调用时创建）"""
+    global _clock
+    if _clock is None:
+        _clock = FrameClock(QtWidgets.QApplication.instance())
+    return _clock
@@ -0,0 +1,112 @@
+"""JSON 编解码层 - 存储后端读写快照和日志时使用
+
+序列化结果是一整块 UTF-8 字节，由调用方一次写入文件；读取时同样一次读入再解码。
+默认输出紧凑格式（无缩进、无多余空格，非 ASCII 字符原样输出），pretty=True 时缩进两格，便于手工查看。
+装有 orjson 或 msgspec 时自动使用（都比标准库快数倍），否则使用标准库 json；
+设置环境变量 TODO_JSON_CODEC=json / orjson / msgspec 可以指定编解码器。
+几种编解码器写出的 JSON 值相同、彼此都能读取，换用或卸载加速库不影响已有的数据文件；
+但输出的字节并不相同（例如浮点数的写法 1e20 / 1e+20），不能按字节比较不同编解码器写出的文件。
+
+NaN / Infinity 不是合法的 JSON：标准库会写出 NaN（其他编解码器读不了），orjson、msgspec 则静默写成 null。
+因此数据管理器在生成变更记录时用 ensure_finite 拒绝非有限的数值，标准库编码时也不允许 (allow_nan=False)。
+
+编解码器的约定：dumps(obj, pretty) 返回 bytes；loads(data) 接受 bytes 或 str，格式错误时抛出 ValueError。
+"""
+import json
+import math
+import os
+from typing import Any, Dict, Union
+
+
+class StdlibCodec:
+    """标准库 json（C 加速的紧凑输出；缩进输出走纯 Python 路径，明显更慢）"""
+
+    name = "json"
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=2).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """orjson：直接输出 UTF-8 字节"""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        return self._orjson.dumps(obj, option=self._orjson.OPT_INDENT_2 if pretty else 0)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._orjson.loads(data)  # JSONDecodeError 是 ValueError 的子类
+
+
+class MsgspecCodec:
+    """msgspec：无类型解码为 dict / list，与另外两种编解码器的结果相同"""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self._msgspec = msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any, pretty: bool = False) -> bytes:
+        data = self._encoder.encode(obj)
+        return self._msgspec.json.format(data, indent=2) if pretty else data
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+
+def ensure_finite(obj: Any):
+    """检查对象中没有 NaN / Infinity（各编解码器对它们的处理不一致），有则抛出 ValueError"""
+    if isinstance(obj, float):
+        if not math.isfinite(obj):
+            raise ValueError(f"不能保存非有限的数值: {obj}")
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            ensure_finite(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            ensure_finite(value)
+
+
+# 按优先顺序排列
+_CODEC_CLASSES = (OrjsonCodec, MsgspecCodec, StdlibCodec)
+
+
+def available_codecs() -> Dict[str, Any]:
+    """当前环境中可用的编解码器 {名称: 编解码器}，按优先顺序排列"""
+    codecs = {}
+    for cls in _CODEC_CLASSES:
+        try:
+            codecs[cls.name] = cls()
+        except ImportError:
+            continue
+    return codecs
+
+
+def _select_codec():
+    codecs = available_codecs()
+    name = os.environ.get("TODO_JSON_CODEC")
+    if name:
+        if name in codecs:
+            return codecs[name]
+        print(f"JSON 编解码器不可用: {name}，改用 {next(iter(codecs))}")
+    return next(iter(codecs.values()))
+
+
+# 存储后端使用的编解码器
+codec = _select_codec()
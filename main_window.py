@@ -1,5 +1,5 @@
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import threading
 import time
@@ -7,37 +7,48 @@ import time
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from data_manager import DataManager
+from frame_clock import frame_clock
+from phase_timer import PhaseTimer
+from stats_query import build_index, compute_week_report
+from storage import DataFileLocked
 from system_tray import SystemTray
 from utils import create_notebook_icon, create_font
-from widgets import TaskWidget
+from widgets import RunningTask, TaskListModel, TaskListView
 from time_rings import TimeRingWidget
 
+# 报告窗口每秒最多重绘的次数，统计变更会在这个间隔内合并
+REPORT_MAX_FPS = 4
+
+# 运行任务计时显示的刷新间隔（毫秒）
+TIMER_DISPLAY_INTERVAL = 100
+# 有任务计时时自动保存的间隔（毫秒）
+AUTOSAVE_INTERVAL = 1000
+
 
 class MainWindow(QtWidgets.QMainWindow):
-    """应用主窗口"""
-    
-    # 后台更新信号
-    update_report_signal = QtCore.Signal()
+    """应用主窗口
+
+    分阶段启动：构造函数只搭建窗口框架并在后台线程中加载数据，窗口可以立即显示；
+    数据加载完成后填充列表，再创建时间圆环和系统托盘。每个阶段的耗时记录在 startup_timer 中，
+    全部完成后发出 startup_finished。
+    """
 
-    def __init__(self, data_file: str):
+    startup_finished = QtCore.Signal()
+    _data_loaded = QtCore.Signal()
+
+    def __init__(self, data_file: str, startup_timer: Optional[PhaseTimer] = None):
         super().__init__()
+        self.startup_timer = startup_timer or PhaseTimer()
         self.setWindowTitle("ToDo — 任务清单 (Windows)")
         self.resize(900, 600)
         self.setWindowIcon(create_notebook_icon())
 
-        # 数据管理
-        self.data_manager = DataManager(data_file)
-        self.data_manager.load()
-        if not self.data_manager.data:
-            self.data_manager.data = {"我的任务": []}
+        # 数据管理 - 在后台线程中加载，加载完成前界面不可操作，也不会访问数据
+        self.data_manager = DataManager(data_file, autoload=False)
 
         # 当前正在计时的任务 - 全局管理
-        self.current_running_task = None  # 只允许一个任务运行
-        self.current_running_task_list = None  # 记录运行任务所属的列表名
+        self.current_running_task: Optional[RunningTask] = None  # 只允许一个任务运行
         self.current_list_name = None  # 记录当前显示的列表名
-        
-        # 后台更新信号连接
-        self.update_report_signal.connect(self._update_reports)
 
         # 延迟保存定时器
         self.save_timer = QtCore.QTimer()
@@ -45,31 +56,80 @@ class MainWindow(QtWidgets.QMainWindow):
         self.save_timer.timeout.connect(self._save_data_immediate)
         self.pending_save = False
         
-        # UI数据同步定时器 - 在主线程中定期从UI读取数据
-        self.sync_timer = QtCore.QTimer()
-        self.sync_timer.timeout.connect(self._sync_ui_data_to_storage)
-        self.sync_timer.start(500)  # 每500ms同步一次UI数据
+        # 计时显示刷新 - 有任务运行时订阅全局帧时钟，没有任务运行时不产生任何唤醒
+        # 任务模型直接绑定数据管理器中的记录，界面修改即时写入，不需要周期性同步
 
-        # 全局计时器 - 每100ms更新一次计时显示，确保足够的刷新频率
-        self.global_timer = QtCore.QTimer()
-        self.global_timer.timeout.connect(self._update_all_timers)
-        self.global_timer.start(100)  # 每100ms更新一次，提供更流畅的显示效果
-
-        # 系统托盘
-        self.system_tray = SystemTray(self)
-
-        # 报告窗口
+        # 系统托盘、时间圆环在数据加载后创建，报告窗口在第一次打开时创建
+        self.system_tray: Optional[SystemTray] = None
+        self.time_ring_widget: Optional[TimeRingWidget] = None
         self.report_window = None
 
-        # 构建 UI
+        # 构建窗口框架
         self._setup_ui()
+        self._content.setEnabled(False)
+        self.status.showMessage("正在加载数据…")
+        self.startup_timer.mark("窗口框架")
+
+        self._load_error: Optional[str] = None  # 数据文件被其他进程使用时的提示
+        self._load_ms = 0.0  # 后台线程中 DataManager.load() 的实际耗时
+        self._data_loaded.connect(self._on_data_loaded)
+        self._load_thread = threading.Thread(target=self._load_data, name="DataLoader", daemon=True)
+        self._load_thread.start()
+
+    def _load_data(self):
+        """后台线程：读取并解析数据文件（此时主线程不访问数据管理器）"""
+        start = time.perf_counter()
+        try:
+            self.data_manager.load()
+        except DataFileLocked as e:
+            self._load_error = str(e)
+        finally:
+            self._load_ms = (time.perf_counter() - start) * 1000
+            # 跨线程发射的信号在主线程中排队执行
+            self._data_loaded.emit()
+
+    def _on_data_loaded(self):
+        """数据加载完成：填充列表，恢复计时，然后创建其余组件"""
+        self._load_thread.join()
+        if self._load_error is not None:
+            # 另一个实例（或命令行）正在使用数据文件：不保存任何内容，直接退出
+            QtWidgets.QMessageBox.critical(self, "无法打开数据文件", self._load_error)
+            QtWidgets.QApplication.exit(1)
+            return
+        # 主线程等待的时间只是加载在窗口显示之后剩下的部分，加载本身的耗时单独登记
+        self.startup_timer.mark("等待数据")
+        self.startup_timer.record("数据加载", self._load_ms)
         self._populate_lists()
-        
-        # 初始化运行标志
-        self.running = True
-        
-        # 启动后台更新线程
-        self._start_background_update_thread()
+        self._report_damaged_segments()
+        # 恢复上次（或命令行中）开始、尚未停止的计时
+        if self.data_manager.timer is not None:
+            self._resume_running_task()
+        self._content.setEnabled(True)
+        self.status.clearMessage()
+        self.startup_timer.mark("列表填充")
+        # 先让列表完成绘制，再创建不影响首屏内容的组件
+        QtCore.QTimer.singleShot(0, self._build_deferred_components)
+
+    def _build_deferred_components(self):
+        """创建时间圆环和系统托盘"""
+        self.time_ring_widget = TimeRingWidget()
+        self.time_ring_widget.set_working_mode(self.working_mode)
+        # 添加点击事件以切换工作/休息状态
+        self.time_ring_widget.mousePressEvent = self._toggle_working_mode
+        self.time_ring_widget.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
+        self._ring_slot.layout().addWidget(self.time_ring_widget)
+        self._update_working_visuals()
+        self.startup_timer.mark("时间圆环")
+
+        self._ensure_system_tray()
+        self.startup_timer.mark("系统托盘")
+        self.startup_finished.emit()
+
+    def _ensure_system_tray(self) -> SystemTray:
+        """获取系统托盘（尚未创建时立即创建）"""
+        if self.system_tray is None:
+            self.system_tray = SystemTray(self)
+        return self.system_tray
 
     def _create_right_panel_no_header(self) -> QtWidgets.QWidget:
         """创建右侧面板（任务管理）- 不含顶部标题栏"""
@@ -92,18 +152,16 @@ class MainWindow(QtWidgets.QMainWindow):
         add_layout.addWidget(btn_add_task)
         right_layout.addLayout(add_layout)
 
-        # 任务滚动区域
-        self.scroll: QtWidgets.QScrollArea = QtWidgets.QScrollArea()
-        self.scroll.setWidgetResizable(True)
-        self.tasks_container: QtWidgets.QWidget = QtWidgets.QWidget()
-        self.tasks_layout: QtWidgets.QVBoxLayout = QtWidgets.QVBoxLayout(self.tasks_container)
-        self.tasks_layout.setContentsMargins(6, 6, 6, 6)
-        self.tasks_layout.setSpacing(6)
-        self.tasks_layout.addStretch()
-        
-        # 设置滚动区域的组件
-        self.scroll.setWidget(self.tasks_container)
-        right_layout.addWidget(self.scroll)
+        # 任务列表 - 模型保存当前列表的数据，视图只绘制可见行
+        self.task_model = TaskListModel(self.data_manager, self)
+        self.task_view = TaskListView()
+        self.task_view.setModel(self.task_model)
+        delegate = self.task_view.task_delegate
+        delegate.clicked.connect(self._handle_task_clicked)
+        delegate.toggled.connect(self.on_task_toggled)
+        delegate.edit_requested.connect(self.edit_task)
+        delegate.delete_requested.connect(self.on_task_removed)
+        right_layout.addWidget(self.task_view)
 
         # 添加当前列表标签，放置在输入框上方
         self.current_list_label = QtWidgets.QLabel("")
@@ -120,12 +178,12 @@ class MainWindow(QtWidgets.QMainWindow):
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(0)
 
-        # 添加时间圆环组件 - 放在最顶部
-        self.time_ring_widget = TimeRingWidget()
-        # 添加点击事件以切换工作/休息状态
-        self.time_ring_widget.mousePressEvent = self._toggle_working_mode
-        self.time_ring_widget.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-        main_layout.addWidget(self.time_ring_widget)
+        # 时间圆环放在最顶部 - 先占位，启动后期再创建，避免布局跳动
+        self._ring_slot = QtWidgets.QWidget()
+        self._ring_slot.setMinimumSize(350, 350)
+        ring_layout = QtWidgets.QVBoxLayout(self._ring_slot)
+        ring_layout.setContentsMargins(0, 0, 0, 0)
+        main_layout.addWidget(self._ring_slot)
 
         # 创建分割器用于左右面板
         splitter = QtWidgets.QSplitter()
@@ -141,6 +199,7 @@ class MainWindow(QtWidgets.QMainWindow):
         splitter.addWidget(right)
 
         main_layout.addWidget(splitter)
+        self._content = splitter
 
         self.setCentralWidget(main_widget)
 
@@ -156,7 +215,7 @@ class MainWindow(QtWidgets.QMainWindow):
         """切换工作/休息模式"""
         if event.button() == QtCore.Qt.MouseButton.LeftButton:
             self.working_mode = not self.working_mode
-            self.time_ring_widget.set_working_mode(self.working_mode)
+            self.time_ring_widget.set_working_mode(self.working_mode) # type: ignore
             self._update_working_visuals()
             if self.working_mode:
                 self.status.showMessage("进入工作模式", 2000)
@@ -165,6 +224,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def _update_working_visuals(self):
         """更新工作模式下的视觉效果"""
+        if self.time_ring_widget is None:
+            return
         if self.working_mode:
             # 工作模式：圆环更鲜艳，背景稍暗
             self.time_ring_widget.setStyleSheet("")
@@ -231,74 +292,37 @@ class MainWindow(QtWidgets.QMainWindow):
         else:
             self.report_window.activateWindow()
 
-    def _update_reports(self):
-        """更新统计报告"""
-        if self.report_window and self.report_window.isVisible():
-            self.report_window.update_data() # type: ignore
     def _update_all_timers(self):
-        """全局更新所有计时器显示 - 每100ms调用一次，确保及时刷新"""
-        # 检查是否有正在运行的任务
-        has_running_task = False
-        
-        # 更新当前运行任务的显示
-        if self.current_running_task:
-            has_running_task = True
-            # 立即更新计时显示
-            self.current_running_task.update_timer_display()
-            # 强制重绘当前任务所有组件
-            self.current_running_task.repaint()
-            self.current_running_task.timer_label.repaint()
-        
-        # 如果有当前运行的任务，需要持续更新数据管理器中的数据
-        # 这样可以确保累积时长不断刷新
-        if self.current_running_task and self.current_list_name:
-            # 直接更新任务数据（不需要遍历，因为我们有direct引用）
-            tasks = self.data_manager.data.get(self.current_list_name, [])
-            for idx, task_data in enumerate(tasks):
-                if task_data['text'] == self.current_running_task.text:
-                    # 计算当前实时总时长
-                    current_total = self.current_running_task.total_elapsed
-                    if self.current_running_task.is_running and self.current_running_task.start_time is not None:
-                        current_total += time.time() - self.current_running_task.start_time
-                    task_data['total_elapsed'] = current_total
-                    break
-        
-        # 定期刷新整个任务布局（每5次调用，即每500ms）
-        # 这防止了绘制脏区域和布局问题
-        if has_running_task:
-            if not hasattr(self, '_timer_update_counter'):
-                self._timer_update_counter = 0
-            self._timer_update_counter += 1
-            
-            if self._timer_update_counter >= 5:
-                self._timer_update_counter = 0
-                # 刷新整个任务容器
-                self.tasks_container.update()
-                self.scroll.viewport().update()
-        
-        # 更新报告窗口（保持2秒更新频率）
-        self.update_report_signal.emit()
-    
-    def _sync_ui_data_to_storage(self):
-        """在主线程中同步UI数据到存储 - 这是后台线程和UI之间的唯一通道"""
-        try:
-            # 只有当有当前列表且窗口可见时才同步
-            # 注意：这里检查的是内部状态，不通过UI标签
-            if self.current_list_name and self.isVisible():
-                # 读取当前在UI中显示的任务
-                tasks = []
-                for i in range(self.tasks_layout.count() - 1):
-                    item = self.tasks_layout.itemAt(i)
-                    if item:
-                        w = item.widget()
-                        if isinstance(w, TaskWidget):
-                            tasks.append(w.to_dict())
-                
-                # 只更新当前列表的数据，不覆盖其他列表
-                # 这样即使sync_timer触发，也只会同步当前显示的列表
-                self.data_manager.data[self.current_list_name] = tasks
-        except Exception as e:
-            print(f"UI数据同步错误: {e}")
+        """全局更新运行任务的计时 - 有任务运行时每100ms调用一次，确保及时刷新"""
+        running = self.current_running_task
+        # 没有正在运行的任务时退订帧时钟
+        if running is None:
+            frame_clock().unsubscribe(self._update_all_timers)
+            return
+
+        # 更新运行任务的显示（计时文本变化时才会重绘该行）
+        self.task_model.refresh_running()
+
+        # 持续更新数据管理器中的数据，确保累积时长不断刷新
+        # 连续的计时更新会在日志中合并为一条记录
+        self.data_manager.update_task(running.task_id, total_elapsed=running.elapsed())
+
+    def _update_clock_throttle(self):
+        """窗口隐藏或最小化时，帧时钟节流到 1Hz"""
+        frame_clock().set_throttled(not self.isVisible() or self.isMinimized())
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+        self._update_clock_throttle()
+
+    def hideEvent(self, event: QtGui.QHideEvent):
+        super().hideEvent(event)
+        self._update_clock_throttle()
+
+    def changeEvent(self, event: QtCore.QEvent):
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.Type.WindowStateChange:
+            self._update_clock_throttle()
 
     def _format_duration(self, seconds):
         """格式化时长显示"""
@@ -315,100 +339,58 @@ class MainWindow(QtWidgets.QMainWindow):
     # ========== 数据管理
     def _save_data_immediate(self):
         """立即保存数据"""
-        # 在保存之前，确保所有正在计时的任务都被正确处理
-        self._update_all_running_tasks()
+        # 在保存之前，写入运行任务的实时累计时间
+        self._flush_running_elapsed()
         
-        if self.data_manager.save():
-            self.status.showMessage("已保存", 1000)
-        else:
+        # 写盘在数据管理器的写盘线程中进行，这里显示的是之前写盘的结果
+        failed = self.data_manager.flush_failed
+        self.data_manager.save_async()
+        if failed:
             self.status.showMessage("保存失败", 3000)
+        else:
+            self.status.showMessage("已保存", 1000)
         self.pending_save = False
+        self._report_damaged_segments()
+
+    def _report_damaged_segments(self):
+        """提示读取时发现的损坏统计分段（已改名保留，不会被覆盖）"""
+        damaged = self.data_manager.take_damaged_segments()
+        if damaged:
+            QtWidgets.QMessageBox.warning(
+                self, "统计数据损坏",
+                "以下统计分段无法读取，已改名保留，相应月份的旧统计暂不显示：\n" + "\n".join(damaged))
 
     def save_data(self):
         """触发延迟保存"""
         self.pending_save = True
         self.save_timer.start(500)
 
-    def _update_all_running_tasks(self):
-        """更新所有正在运行的任务数据"""
-        # 遍历所有列表，保存每个列表的任务
-        for list_name in self.data_manager.data:
-            # 如果当前列表是当前显示的列表，我们直接从界面获取数据
-            if list_name == self.current_list_label.text():
-                # 从当前界面获取任务数据
-                tasks = []
-                for i in range(self.tasks_layout.count() - 1):
-                    w = self.tasks_layout.itemAt(i).widget()
-                    if isinstance(w, TaskWidget):
-                        tasks.append(w.to_dict())
-                self.data_manager.data[list_name] = tasks
-            else:
-                # 如果不是当前显示的列表，我们需要临时加载其原始数据
-                # 这里我们可以保留原始数据，因为这些列表没有在界面上显示
-                pass  # 数据已经在data_manager中保存
-
-    def _start_background_update_thread(self):
-        """启动后台更新线程 - 完全独立于UI，仅处理纯数据"""
-        def background_worker():
-            """后台工作线程 - 完全不触及任何Qt对象"""
-            save_counter = 0
-            while self.running:
-                try:
-                    # 每200ms更新一次统计数据
-                    time.sleep(0.2)
-                    
-                    # 每1秒（5 * 0.2s）保存一次数据
-                    save_counter += 1
-                    if save_counter >= 5:
-                        save_counter = 0
-                        try:
-                            # 直接保存数据管理器中的数据，不访问UI
-                            self.data_manager.save()
-                        except Exception as e:
-                            print(f"自动保存错误: {e}")
-                    
-                    # 定期（每2秒）触发报告更新信号
-                    # 注意：emit()是线程安全的，会在主线程中执行槽函数
-                    if save_counter % 2 == 0:
-                        self.update_report_signal.emit()
-                
-                except Exception as e:
-                    print(f"后台更新线程错误: {e}")
-        
-        # 创建并启动后台线程
-        self.background_thread = threading.Thread(target=background_worker, daemon=True)
-        self.background_thread.start()
+    def _flush_running_elapsed(self):
+        """把运行任务的实时累计时间写入数据管理器（其他修改在发生时已经写入）"""
+        running = self.current_running_task
+        if running is not None:
+            self.data_manager.update_task(running.task_id, total_elapsed=running.elapsed())
+
+    def _autosave(self):
+        """有任务计时时定期保存 - 主线程只提交保存，写盘在数据管理器的写盘线程中进行"""
+        self._flush_running_elapsed()
+        self.data_manager.save_async()
 
     def quit_application(self):
         """退出应用，确保数据被保存"""
-        # 停止全局定时器
-        self.global_timer.stop()
+        # 数据仍在加载时等待加载完成，之后才能安全地访问数据管理器
+        self._load_thread.join()
+        # 停止计时显示刷新
+        frame_clock().unsubscribe(self._update_all_timers)
         
         # 如果有正在运行的任务，先停止它并更新数据
-        if self.current_running_task:
-            self.current_running_task.stop_timer()
-            self.current_running_task = None
-            self.current_running_task_list = None
-        
-        # 停止后台线程
-        if self.background_thread:
-            self.running = False
-            self.background_thread.join(timeout=2)  # 等待后台线程结束
-        
-        # 保存当前列表的任务状态
-        if self.current_list_name:
-            self._save_current_tasks_state()
+        self._stop_running_task()
+        self.task_view.stop_animation()
         
-        # 停止UI同步定时器
-        self.sync_timer.stop()
-        
-        if self.pending_save:
-            self.save_timer.stop()
-            self._save_data_immediate()
-        else:
-            # 即使没有pending_save，也要最后保存一次
-            self._update_all_running_tasks()
-            self.data_manager.save()
+        # 最后保存一次，等待写盘线程写完并结束
+        self.save_timer.stop()
+        self.pending_save = False
+        self.data_manager.close()
         
         QtWidgets.QApplication.quit()
 
@@ -429,9 +411,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.hide()
         
         # 显示悬浮圆环
-        self.system_tray._hide_window()
+        system_tray = self._ensure_system_tray()
+        system_tray._hide_window()
         
-        self.system_tray.show_message(
+        system_tray.show_message(
             "ToDo 任务清单",
             "程序已最小化到系统托盘，时间圆环已悬浮显示"
         )
@@ -452,20 +435,13 @@ class MainWindow(QtWidgets.QMainWindow):
         if not items:
             # 清空标签和任务显示
             self.current_list_label.setText("")
-            # 保存当前列表状态
-            if self.current_list_name:
-                self._save_current_tasks_state()
             self._clear_tasks()
             self.current_list_name = None
             return
         
         new_list_name = items[0].text()
         
-        # 如果切换到不同列表，先保存旧列表
-        if self.current_list_name and self.current_list_name != new_list_name:
-            self._save_current_tasks_state()
-        
-        # 更新当前列表名称 - 这会影响sync_timer的行为
+        # 更新当前列表名称
         self.current_list_name = new_list_name
         
         # 更新标签显示
@@ -474,18 +450,6 @@ class MainWindow(QtWidgets.QMainWindow):
         # 加载新列表的任务
         self._load_tasks(new_list_name)
 
-    def _save_current_tasks_state(self):
-        """保存当前显示的任务状态到数据管理器"""
-        if self.current_list_name:
-            tasks = []
-            for i in range(self.tasks_layout.count() - 1):
-                w = self.tasks_layout.itemAt(i).widget()
-                if isinstance(w, TaskWidget):
-                    tasks.append(w.to_dict())
-            self.data_manager.data[self.current_list_name] = tasks
-            # 保存数据
-            self.save_data()
-
     def add_list(self):
         """添加新列表"""
         name, ok = QtWidgets.QInputDialog.getText(self, "新建列表", "列表名称:")
@@ -493,7 +457,7 @@ class MainWindow(QtWidgets.QMainWindow):
             if name in self.data_manager.data:
                 QtWidgets.QMessageBox.warning(self, "已存在", "已存在同名列表。")
                 return
-            self.data_manager.data[name] = []
+            self.data_manager.add_list(name)
             self._populate_lists()
             items = self.list_widget.findItems(name, QtCore.Qt.MatchExactly) # type: ignore
             if items:
@@ -513,7 +477,7 @@ class MainWindow(QtWidgets.QMainWindow):
             if new in self.data_manager.data:
                 QtWidgets.QMessageBox.warning(self, "已存在", "已存在同名列表。")
                 return
-            self.data_manager.data[new] = self.data_manager.data.pop(old)
+            self.data_manager.rename_list(old, new)
             self._populate_lists()
             items = self.list_widget.findItems(new, QtCore.Qt.MatchExactly) # type: ignore
             if items:
@@ -530,63 +494,22 @@ class MainWindow(QtWidgets.QMainWindow):
             self, "删除列表", f"确定要删除列表 '{name}' 吗？此操作不可撤销。"
         )
         if ans == QtWidgets.QMessageBox.StandardButton.Yes:
-            self.data_manager.data.pop(name, None)
+            running = self.current_running_task
+            if running is not None and self.data_manager.task_list_name(running.task_id) == name:
+                self._stop_running_task()
+            self.data_manager.delete_list(name)
             self._populate_lists()
             self.save_data()
 
     # ========== 任务管理
     def _clear_tasks(self):
         """清空任务显示 - 注意：不停止计时任务，保持后台运行"""
-        # 不停止当前运行的任务，让它在后台继续运行
-        # 我们只需要从UI上移除任务组件
-        
-        while self.tasks_layout.count() > 1:
-            item = self.tasks_layout.takeAt(0)
-            w = item.widget()
-            if w:
-                if isinstance(w, TaskWidget):
-                    w.cleanup()  # 清理资源
-                w.setParent(None)
+        self.task_model.set_list(None)
 
     def _load_tasks(self, list_name: str):
         """加载指定列表的任务"""
-        # 清空当前任务显示，但不中断正在运行的任务
-        self._clear_tasks()
-        
-        # 从数据管理器获取列表的任务
-        tasks = self.data_manager.data.get(list_name, [])
-        
-        # 为每个任务创建UI组件
-        for t in tasks:
-            widget = TaskWidget(t.get("text", ""), checked=bool(t.get("checked", False)))
-            # 加载任务的累计时间
-            widget.load_from_dict(t)
-            
-            # 检查这个任务是否是全局正在运行的任务
-            # 必须同时检查：任务名称相同 + 任务属于同一列表 + 任务正在运行
-            if (self.current_running_task and 
-                self.current_running_task.text == widget.text and 
-                self.current_running_task_list == list_name and
-                self.current_running_task.is_running):
-                
-                # 恢复运行状态
-                widget.is_running = True
-                widget.start_time = self.current_running_task.start_time
-                widget.total_elapsed = self.current_running_task.total_elapsed
-                widget._start_rgb_animation()
-                widget.update_style()
-                widget.update_timer_display()
-                # 关键：更新current_running_task指向新的widget对象
-                # 这样才能保证计时继续进行，不会被中断
-                self.current_running_task = widget
-            
-            # 连接信号
-            widget.changed.connect(self._handle_task_clicked)
-            widget.removed.connect(self.on_task_removed)
-            # 连接计时相关信号
-            widget.changed.connect(self._update_reports)
-            # 添加到布局
-            self.tasks_layout.insertWidget(self.tasks_layout.count() - 1, widget)
+        # 模型直接绑定该列表的数据，视图按需绘制可见行；运行中的任务由模型按 id 自动高亮
+        self.task_model.set_list(list_name)
 
     def add_task_from_input(self):
         """从输入框添加任务"""
@@ -597,99 +520,162 @@ class MainWindow(QtWidgets.QMainWindow):
         if not items:
             QtWidgets.QMessageBox.warning(self, "未选择列表", "请先选择一个列表。")
             return
-        list_name = items[0].text()
-        widget = TaskWidget(txt)
-        widget.changed.connect(self._handle_task_clicked)
-        widget.removed.connect(self.on_task_removed)
-        # 连接计时相关信号
-        widget.changed.connect(self._update_reports)
-        self.tasks_layout.insertWidget(self.tasks_layout.count() - 1, widget)
-        self.data_manager.data[list_name].append(widget.to_dict())
+        self.task_model.append_task({"text": txt, "checked": False, "total_elapsed": 0})
         self.input_task.clear()
         self.save_data()
 
-    def _handle_task_clicked(self):
-        """处理任务点击事件 - 统一管理计时，一次点击启动/停止"""
-        sender = self.sender()
-        if not isinstance(sender, TaskWidget):
+    def _start_running_task(self, row: int):
+        """开始为当前列表中的一行任务计时"""
+        self.data_manager.start_timer(self.task_model.task(row).id)
+        self._resume_running_task()
+
+    def _resume_running_task(self):
+        """按数据管理器中的计时状态显示运行任务并开始刷新"""
+        timer = self.data_manager.timer
+        self.current_running_task = RunningTask(timer["id"], timer["base"], timer["start"]) # type: ignore
+        self.task_model.set_running(self.current_running_task)
+        frame_clock().subscribe(self._update_all_timers, TIMER_DISPLAY_INTERVAL)
+        frame_clock().subscribe(self._autosave, AUTOSAVE_INTERVAL)
+
+    def _stop_running_task(self):
+        """停止当前计时，并把累计时间写回数据"""
+        running = self.current_running_task
+        if running is None:
             return
-        
+        self.current_running_task = None
+        self.data_manager.stop_timer()
+        self.task_model.set_running(None)
+        frame_clock().unsubscribe(self._update_all_timers)
+        frame_clock().unsubscribe(self._autosave)
+        self.save_data()
+
+    def _handle_task_clicked(self, row: int):
+        """处理任务点击事件 - 统一管理计时，一次点击启动/停止"""
         # 如果点击的任务已完成，则不处理
-        if sender.toggle.isChecked():
+        if self.task_model.task(row).checked:
             return
-        
+
         # 关键逻辑：如果点击的是当前运行任务，则停止它；否则启动新任务
         # 这确保了"一次点击启动/停止"的用户体验
-        
-        if self.current_running_task == sender:
+        if self.task_model.running_row() == row:
             # 情况1：点击当前运行任务 → 停止计时
-            self.current_running_task.stop_timer() # type: ignore
-            self.current_running_task = None
-            self.current_running_task_list = None
-            
+            self._stop_running_task()
         else:
-            # 情况2：点击新任务 → 先停止旧任务，再启动新任务
-            # 这样可以防止两个任务同时闪烁
-            
-            # 先停止旧任务（如果有）
-            if self.current_running_task:
-                self.current_running_task.stop_timer()
-            
-            # 启动新任务
-            self.current_running_task = sender
-            self.current_running_task_list = self.current_list_name
-            self.current_running_task.start_timer()
-
-    def on_task_changed(self):
-        """任务状态变化处理"""
-        items = self.list_widget.selectedItems()
-        if not items:
-            return
-        name = items[0].text()
-        arr = []
-        for i in range(self.tasks_layout.count() - 1):
-            w = self.tasks_layout.itemAt(i).widget()
-            if isinstance(w, TaskWidget):
-                # 如果任务完成且正在计时，则停止计时并记录
-                if w.toggle.isChecked() and w.is_running:
-                    # 如果这是当前运行任务，停止它并清除引用
-                    if self.current_running_task == w:
-                        w.stop_timer()
-                        self.current_running_task = None
-                        self.current_running_task_list = None
-                    # 记录任务完成数据
-                    duration = w.total_elapsed
-                    if duration > 0:  # 只记录有时间投入的任务
-                        self.data_manager.record_task_completion(w.text, duration)
-                        self._update_reports()
-                
-                arr.append(w.to_dict())
-        self.data_manager.data[name] = arr
-        self.save_data()  # 确保实时保存
-
-    def on_task_removed(self, widget: TaskWidget):
+            # 情况2：点击新任务 → 先停止旧任务（如果有），再启动新任务
+            self._stop_running_task()
+            self._start_running_task(row)
+
+    def on_task_toggled(self, row: int, checked: bool):
+        """切换任务完成状态"""
+        # 如果任务完成且正在计时，则停止计时（这段计时会话计入统计）
+        # 报告窗口通过数据管理器的变更通知自行刷新
+        if checked and self.task_model.running_row() == row:
+            self._stop_running_task()
+        self.task_model.set_field(row, "checked", checked)
+        self.save_data()
+
+    def edit_task(self, row: int):
+        """编辑任务内容"""
+        text, ok = QtWidgets.QInputDialog.getText(
+            self, "编辑任务", "任务内容:", text=self.task_model.task(row).text
+        )
+        if ok:
+            self.task_model.set_field(row, "text", text)
+            self.save_data()
+
+    def on_task_removed(self, row: int):
         """任务删除处理"""
-        # 如果删除的是当前运行的任务，停止计时并清除引用
-        if self.current_running_task == widget:
-            self.current_running_task.stop_timer() # type: ignore
-            self.current_running_task = None
-            self.current_running_task_list = None
-        
-        # 从布局中移除组件
-        for i in range(self.tasks_layout.count()):
-            item = self.tasks_layout.itemAt(i)
-            if item and item.widget() is widget:
-                widget.cleanup()  # 确保释放所有资源
-                widget.setParent(None)
-                break
-                
-        # 触发数据同步和保存
-        self.on_task_changed()
+        if self.task_model.running_row() == row:
+            # 如果删除的是当前运行的任务，停止计时
+            self._stop_running_task()
+
+        self.task_model.remove_task(row)
+        self.save_data()
+
+
+class _ReportJobSignals(QtCore.QObject):
+    """后台计算完成的信号（属于主线程，跨线程发出时自动排队到主线程）"""
+    finished = QtCore.Signal(int, object)  # 请求号, 结果（被取消时为 None）
+    failed = QtCore.Signal(int, str)  # 请求号, 错误信息
+
+
+class _ReportJob(QtCore.QRunnable):
+    """线程池中的一次报告计算"""
+    def __init__(self, request_id: int, func, signals: _ReportJobSignals):
+        super().__init__()
+        # 由 ReportWorker 持有到计算结束，取消排队时才能安全地从线程池取回
+        self.setAutoDelete(False)
+        self.request_id = request_id
+        self.func = func
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.func()
+        except Exception as e:
+            print(f"计算报告失败: {e}")
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, result)
+
+
+class ReportWorker(QtCore.QObject):
+    """在后台线程中计算报告，结果通过 finished 信号交回主线程
+
+    计算函数只能读取提交时准备好的快照，不能访问数据管理器。新的请求会取代旧的请求：
+    还在排队的旧请求直接取消，正在计算的旧请求通过 cancelled() 提前结束，结果被丢弃。
+    最新的请求计算出错时发出 failed（错误信息）。
+    """
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._signals = _ReportJobSignals(self)
+        self._signals.finished.connect(self._on_job_finished)
+        self._signals.failed.connect(self._on_job_failed)
+        self._latest = 0  # 最新的请求号
+        self._jobs: Dict[int, _ReportJob] = {}  # 已提交、尚未结束的计算
+
+    def submit(self, func):
+        """提交计算 func(cancelled)，cancelled() 在有更新的请求后返回 True"""
+        self._latest += 1
+        request_id = self._latest
+        for job in list(self._jobs.values()):
+            if self._pool.tryTake(job):
+                del self._jobs[job.request_id]
+        job = _ReportJob(request_id, lambda: func(lambda: request_id != self._latest), self._signals)
+        self._jobs[request_id] = job
+        self._pool.start(job)
+
+    @property
+    def busy(self) -> bool:
+        """是否有尚未交回结果的请求"""
+        return self._latest in self._jobs
+
+    def shutdown(self):
+        """取消全部请求并等待正在进行的计算结束"""
+        self._latest += 1
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._jobs.clear()
+
+    def _on_job_finished(self, request_id: int, result):
+        self._jobs.pop(request_id, None)
+        if request_id == self._latest and result is not None:
+            self.finished.emit(result)
+
+    def _on_job_failed(self, request_id: int, message: str):
+        self._jobs.pop(request_id, None)
+        if request_id == self._latest:
+            self.failed.emit(message)
 
 
 class ReportWindow(QtWidgets.QWidget):
-    """报告窗口 - 包含周度直方图和任务时间统计"""
-    def __init__(self, data_manager):
+    """报告窗口 - 周报（周度直方图和任务时间统计）与区间分析两个页面"""
+    def __init__(self, data_manager, max_fps: float = REPORT_MAX_FPS):
         super().__init__()
         self.data_manager = data_manager
         self.setWindowTitle("任务统计报告")
@@ -700,8 +686,18 @@ class ReportWindow(QtWidgets.QWidget):
         self.current_start_date = self._get_monday_for_current_week()
         self.animation = None  # 存储过渡动画
 
-        # 主布局
-        main_layout = QtWidgets.QVBoxLayout(self)
+        window_layout = QtWidgets.QVBoxLayout(self)
+        window_layout.setContentsMargins(0, 0, 0, 0)
+        self.tabs = QtWidgets.QTabWidget()
+        window_layout.addWidget(self.tabs)
+        week_page = QtWidgets.QWidget()
+        self.tabs.addTab(week_page, "周报")
+        # 区间分析页第一次显示时才构建查询索引
+        self.range_view = RangeReportView(data_manager, max_fps)
+        self.tabs.addTab(self.range_view, "区间分析")
+
+        # 周报页布局
+        main_layout = QtWidgets.QVBoxLayout(week_page)
         main_layout.setContentsMargins(20, 20, 20, 20)
         main_layout.setSpacing(15)
 
@@ -732,7 +728,7 @@ class ReportWindow(QtWidgets.QWidget):
         main_layout.addLayout(header_layout)
 
         # 直方图区域
-        self.histogram_widget = HistogramWidget(self.current_start_date, self.data_manager)
+        self.histogram_widget = HistogramWidget(self.current_start_date)
         main_layout.addWidget(self.histogram_widget)
 
         # 本周任务列表标题
@@ -748,6 +744,9 @@ class ReportWindow(QtWidgets.QWidget):
         self.tasks_layout = QtWidgets.QVBoxLayout(self.tasks_container)
         self.tasks_layout.setContentsMargins(0, 0, 0, 0)
         self.tasks_layout.setSpacing(8)
+        self.tasks_layout.addStretch()
+        # 任务行缓存：任务名 → (行组件, 时长标签)，刷新时只修改有变化的行
+        self._task_rows: Dict[str, Tuple[QtWidgets.QWidget, QtWidgets.QLabel]] = {}
         self.tasks_scroll_area.setWidget(self.tasks_container)
         self.tasks_scroll_area.setMaximumHeight(200)
         main_layout.addWidget(self.tasks_scroll_area)
@@ -767,6 +766,17 @@ class ReportWindow(QtWidgets.QWidget):
 
         main_layout.addLayout(bottom_layout)
 
+        # 报告在后台线程中基于统计快照计算，每次刷新只计算一次，直方图、任务列表和总计共用
+        self.report_worker = ReportWorker(self)
+        self.report_worker.finished.connect(self._show_report)
+
+        # 统计变更合并：刷新间隔内的变更只触发一次重新计算
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(int(1000 / max_fps))
+        self._refresh_timer.timeout.connect(self._flush_pending_changes)
+        self.data_manager.add_listener(self._on_stats_changed)
+
         # 更新数据显示
         self._update_display()
 
@@ -774,6 +784,32 @@ class ReportWindow(QtWidgets.QWidget):
         """外部调用更新数据的方法"""
         self._update_display()
 
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        """关闭时取消订阅统计变更"""
+        self.data_manager.remove_listener(self._on_stats_changed)
+        self._refresh_timer.stop()
+        self.report_worker.shutdown()
+        self.range_view.detach()
+        super().closeEvent(event)
+
+    def _week_dates(self) -> List[str]:
+        """当前显示周的七个日期字符串"""
+        return [(self.current_start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
+
+    def _on_stats_changed(self, dates, tasks):
+        """数据管理器的统计变更通知 - 只处理与当前视图相关的变更"""
+        if dates is not None:
+            current_month = datetime.now().strftime("%Y-%m")
+            week_dates = self._week_dates()
+            if not any(d in week_dates or d.startswith(current_month) for d in dates):
+                return
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def _flush_pending_changes(self):
+        """合并后的统计变更：重新计算当前报告"""
+        self._request_report()
+
     def _get_monday_for_current_week(self):
         """获取当前周的周一日期"""
         today = datetime.now()
@@ -794,10 +830,12 @@ class ReportWindow(QtWidgets.QWidget):
 
     def _animate_transition(self, direction='left'):
         """执行横向过渡动画"""
-        # 创建淡入淡出动画
-        opacity_effect = QtWidgets.QGraphicsOpacityEffect()
-        self.histogram_widget.setGraphicsEffect(opacity_effect)
-        
+        # 创建淡入淡出动画（复用同一个效果：快速翻周时替换效果会删除仍在动画中的旧效果）
+        opacity_effect = self.histogram_widget.graphicsEffect()
+        if opacity_effect is None:
+            opacity_effect = QtWidgets.QGraphicsOpacityEffect()
+            self.histogram_widget.setGraphicsEffect(opacity_effect)
+
         anim = QtCore.QPropertyAnimation(opacity_effect, b"opacity")
         anim.setDuration(200)
         anim.setStartValue(1.0)
@@ -820,56 +858,266 @@ class ReportWindow(QtWidgets.QWidget):
         # 更新周期标签
         end_date = self.current_start_date + timedelta(days=6)
         self.lbl_week_range.setText(f"{self.current_start_date.strftime('%m月%d日')} - {end_date.strftime('%m月%d日')}")
+        self._request_report()
+
+    def _request_report(self):
+        """在后台计算当前周和本月的报告；快速翻周时旧的计算会被取消"""
+        self._refresh_timer.stop()
+        monday = self.current_start_date
+        month = datetime.now().strftime("%Y-%m")
+        months = {(monday + timedelta(days=i)).strftime("%Y-%m") for i in range(7)} | {month}
+        # 快照在主线程中准备：内存中的分区复制一份，其余由后台线程从分段文件读入
+        sources = self.data_manager.stats_snapshot(sorted(months))
+        self.report_worker.submit(lambda cancelled: compute_week_report(sources, monday, month, cancelled))
+
+    def _show_report(self, report):
+        """显示后台计算完成的报告"""
+        if report.monday != self.current_start_date:
+            return
+        self.histogram_widget.set_data(report.monday, report.days)
+        self._update_tasks_list(report.tasks)
+        self.lbl_week_total.setText(f"本周总计: {self._format_duration(report.week_total)}")
+        self.lbl_month_total.setText(f"本月总计: {self._format_duration(report.month_total)}")
+
+    def _update_tasks_list(self, weekly_stats: Dict[str, float]):
+        """更新本周任务列表 - 复用已有的行，只修改时长有变化的行"""
+        # 移除本周已没有记录的任务行
+        for task_name in list(self._task_rows):
+            if task_name not in weekly_stats:
+                row, _ = self._task_rows.pop(task_name)
+                row.setParent(None)
+
+        # 按时间排序，必要时移动行的位置
+        sorted_tasks = sorted(weekly_stats.items(), key=lambda x: x[1], reverse=True)
+        for position, (task_name, duration) in enumerate(sorted_tasks):
+            if task_name in self._task_rows:
+                row, lbl_task_duration = self._task_rows[task_name]
+                text = self._format_duration(duration)
+                if lbl_task_duration.text() != text:
+                    lbl_task_duration.setText(text)
+            else:
+                row, lbl_task_duration = self._create_task_row(task_name, duration)
+                self._task_rows[task_name] = (row, lbl_task_duration)
+                self.tasks_layout.insertWidget(position, row)
+                continue
+            if self.tasks_layout.indexOf(row) != position:
+                self.tasks_layout.removeWidget(row)
+                self.tasks_layout.insertWidget(position, row)
+
+    def _create_task_row(self, task_name: str, duration: float) -> Tuple[QtWidgets.QWidget, QtWidgets.QLabel]:
+        """创建一行任务统计"""
+        row = QtWidgets.QWidget()
+        task_row = QtWidgets.QHBoxLayout(row)
+        task_row.setContentsMargins(0, 0, 0, 0)
+        lbl_task_name = QtWidgets.QLabel(task_name)
+        lbl_task_name.setFont(create_font(10))
+        lbl_task_duration = QtWidgets.QLabel(self._format_duration(duration))
+        lbl_task_duration.setFont(create_font(10))
+        lbl_task_duration.setStyleSheet("color: #666666;")
+        task_row.addWidget(lbl_task_name)
+        task_row.addStretch()
+        task_row.addWidget(lbl_task_duration)
+        return row, lbl_task_duration
 
-        # 更新直方图
-        self.histogram_widget.update_data(self.current_start_date)
+    def _format_duration(self, seconds):
+        """格式化时长显示"""
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        if hours > 0:
+            return f"{hours}小时 {minutes}分钟"
+        elif minutes > 0:
+            return f"{minutes}分钟"
+        else:
+            return f"{int(seconds)}秒"
 
-        # 更新任务列表
-        self._update_tasks_list()
 
-        # 更新底部统计
-        self._update_bottom_stats()
+class RangeReportView(QtWidgets.QWidget):
+    """区间分析 - 任意日期区间按任务 / 列表 / 星期 / 小时 / 日期分组，取前 N 项
 
-    def _update_tasks_list(self):
-        """更新本周任务列表"""
-        # 清空现有内容
-        for i in reversed(range(self.tasks_layout.count())):
-            widget = self.tasks_layout.itemAt(i).widget()
-            if widget is not None:
-                widget.setParent(None)
+    查询走数据管理器的前缀和索引，多年的区间也能即时刷新；统计变更按刷新间隔合并，只在可见时重新查询。
+    索引第一次需要时在后台线程中基于统计快照构建，构建完成前显示提示。
+    """
 
-        # 获取本周统计数据
-        week_start_str = self.current_start_date.strftime("%Y-%m-%d")
-        weekly_stats = self.data_manager.get_weekly_stats(week_start_str)
+    GROUPS = [("task", "任务"), ("list", "列表"), ("weekday", "星期"), ("hour", "小时"), ("day", "日期")]
+    WEEKDAY_NAMES = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+    DEFAULT_TOP = 10
 
-        # 按时间排序添加任务
-        sorted_tasks = sorted(weekly_stats.items(), key=lambda x: x[1], reverse=True)
+    def __init__(self, data_manager, max_fps: float = REPORT_MAX_FPS):
+        super().__init__()
+        self.data_manager = data_manager
+        self._stale = True  # 数据或条件变化后尚未重新查询
+        self._select_all = False  # 索引构建完成后把区间设为全部
+        self.index_worker = ReportWorker(self)
+        self.index_worker.finished.connect(self._on_index_built)
+        self.index_worker.failed.connect(self._on_index_failed)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        # 区间和快捷选择
+        range_row = QtWidgets.QHBoxLayout()
+        today = QtCore.QDate.currentDate()
+        self.date_from = QtWidgets.QDateEdit(QtCore.QDate(today.year(), 1, 1))
+        self.date_to = QtWidgets.QDateEdit(today)
+        for edit in (self.date_from, self.date_to):
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("yyyy-MM-dd")
+            edit.dateChanged.connect(self._mark_stale)
+        range_row.addWidget(QtWidgets.QLabel("从"))
+        range_row.addWidget(self.date_from)
+        range_row.addWidget(QtWidgets.QLabel("到"))
+        range_row.addWidget(self.date_to)
+        range_row.addStretch()
+        for text, days in (("近 7 天", 7), ("近 30 天", 30), ("近一年", 365)):
+            button = QtWidgets.QPushButton(text)
+            button.clicked.connect(lambda _=False, d=days: self._set_recent(d))
+            range_row.addWidget(button)
+        button = QtWidgets.QPushButton("全部")
+        button.clicked.connect(self._set_all)
+        range_row.addWidget(button)
+        layout.addLayout(range_row)
+
+        # 分组和前 N 项
+        group_row = QtWidgets.QHBoxLayout()
+        group_row.addWidget(QtWidgets.QLabel("分组"))
+        self.group_combo = QtWidgets.QComboBox()
+        for key, label in self.GROUPS:
+            self.group_combo.addItem(label, key)
+        self.group_combo.currentIndexChanged.connect(self._mark_stale)
+        group_row.addWidget(self.group_combo)
+        group_row.addWidget(QtWidgets.QLabel("显示前"))
+        self.top_spin = QtWidgets.QSpinBox()
+        self.top_spin.setRange(0, 1000)
+        self.top_spin.setSpecialValueText("全部")
+        self.top_spin.setValue(self.DEFAULT_TOP)
+        self.top_spin.valueChanged.connect(self._mark_stale)
+        group_row.addWidget(self.top_spin)
+        group_row.addWidget(QtWidgets.QLabel("项"))
+        group_row.addStretch()
+        layout.addLayout(group_row)
+
+        # 结果
+        self.bar_list = BarListWidget()
+        scroll = QtWidgets.QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.bar_list)
+        layout.addWidget(scroll, 1)
+
+        self.lbl_total = QtWidgets.QLabel()
+        self.lbl_total.setFont(create_font(10, bold=True))
+        self.lbl_total.setStyleSheet("color: #333333;")
+        layout.addWidget(self.lbl_total)
+
+        # 统计变更和条件变化都合并到刷新间隔内处理
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(int(1000 / max_fps))
+        self._refresh_timer.timeout.connect(self._refresh_if_visible)
+        self.data_manager.add_listener(self._on_stats_changed)
+
+    def detach(self):
+        """取消订阅统计变更，放弃进行中的索引构建"""
+        self.data_manager.remove_listener(self._on_stats_changed)
+        self._refresh_timer.stop()
+        self.index_worker.shutdown()
+        self.data_manager.cancel_index_build()
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        super().showEvent(event)
+        if self._stale:
+            self.refresh()
+
+    def _on_stats_changed(self, dates, tasks):
+        """统计变更：只处理与当前区间相关的日期"""
+        if dates is not None:
+            first = self.date_from.date().toString("yyyy-MM-dd")
+            last = self.date_to.date().toString("yyyy-MM-dd")
+            if not any(first <= d <= last for d in dates):
+                return
+        self._mark_stale()
+
+    def _mark_stale(self, *args):
+        self._stale = True
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
 
-        for task_name, duration in sorted_tasks:
-            task_row = QtWidgets.QHBoxLayout()
-            lbl_task_name = QtWidgets.QLabel(task_name)
-            lbl_task_name.setFont(create_font(10))
-            lbl_task_duration = QtWidgets.QLabel(self._format_duration(duration))
-            lbl_task_duration.setFont(create_font(10))
-            lbl_task_duration.setStyleSheet("color: #666666;")
-            task_row.addWidget(lbl_task_name)
-            task_row.addStretch()
-            task_row.addWidget(lbl_task_duration)
-            self.tasks_layout.addLayout(task_row)
-
-    def _update_bottom_stats(self):
-        """更新底部统计信息"""
-        # 本周统计
-        week_start_str = self.current_start_date.strftime("%Y-%m-%d")
-        weekly_stats = self.data_manager.get_weekly_stats(week_start_str)
-        total_week_seconds = sum(weekly_stats.values())
-        self.lbl_week_total.setText(f"本周总计: {self._format_duration(total_week_seconds)}")
-
-        # 本月统计
-        current_month = datetime.now().strftime("%Y-%m")
-        monthly_stats = self.data_manager.get_monthly_stats(current_month)
-        total_month_seconds = sum(monthly_stats.values())
-        self.lbl_month_total.setText(f"本月总计: {self._format_duration(total_month_seconds)}")
+    def _refresh_if_visible(self):
+        if self.isVisible():
+            self.refresh()
+
+    def _set_recent(self, days: int):
+        today = QtCore.QDate.currentDate()
+        self.date_from.setDate(today.addDays(1 - days))
+        self.date_to.setDate(today)
+
+    def _build_index(self):
+        """在后台构建区间查询索引（已在构建时不重复提交）"""
+        if self.index_worker.busy:
+            return
+        load_count, sources = self.data_manager.begin_index_build()
+        self.index_worker.submit(lambda cancelled: (load_count, build_index(sources, cancelled)))
+
+    def _on_index_built(self, result):
+        load_count, index = result
+        if index is None or not self.data_manager.adopt_stats_index(load_count, index):
+            # 构建期间数据被重新加载，基于旧数据的索引作废
+            if not self.data_manager.stats_index_ready:
+                self._build_index()
+                return
+        if self._select_all:
+            self._select_all = False
+            self._set_all()
+        self._mark_stale()
+
+    def _on_index_failed(self, message: str):
+        """索引构建出错：显示错误，条件变化或重新显示时再试"""
+        self.data_manager.cancel_index_build()
+        self._select_all = False
+        self.bar_list.set_items([])
+        self.lbl_total.setText(f"建立统计索引失败: {message}")
+
+    def _set_all(self):
+        if not self.data_manager.stats_index_ready:
+            self._select_all = True
+            self._build_index()
+            return
+        date_range = self.data_manager.stats_date_range()
+        if date_range is None:
+            return
+        self.date_from.setDate(QtCore.QDate.fromString(date_range[0], "yyyy-MM-dd"))
+        self.date_to.setDate(QtCore.QDate.fromString(date_range[1], "yyyy-MM-dd"))
+
+    def _label(self, group_by: str, key) -> str:
+        """分组键的显示文字"""
+        if group_by == "weekday":
+            return self.WEEKDAY_NAMES[key]
+        if group_by == "hour":
+            return f"{key:02d}:00 - {key + 1:02d}:00"
+        if group_by == "list" and key is None:
+            return "(已删除的任务)"
+        return str(key)
+
+    def refresh(self):
+        """按当前条件重新查询并显示"""
+        self._stale = False
+        first = self.date_from.date().toString("yyyy-MM-dd")
+        last = self.date_to.date().toString("yyyy-MM-dd")
+        group_by = self.group_combo.currentData()
+        top = self.top_spin.value() or None
+        if first > last:
+            self.bar_list.set_items([])
+            self.lbl_total.setText("开始日期晚于结束日期")
+            return
+        if not self.data_manager.stats_index_ready:
+            self._stale = True
+            self.lbl_total.setText("正在建立统计索引…")
+            self._build_index()
+            return
+        results = self.data_manager.query_stats(first, last, group_by, top)
+        self.bar_list.set_items([(self._label(group_by, key), seconds) for key, seconds in results.items()])
+        total = self.data_manager.total_time(first, last)
+        self.lbl_total.setText(f"区间总计: {self._format_duration(total)}")
 
     def _format_duration(self, seconds):
         """格式化时长显示"""
@@ -883,24 +1131,78 @@ class ReportWindow(QtWidgets.QWidget):
             return f"{int(seconds)}秒"
 
 
+class BarListWidget(QtWidgets.QWidget):
+    """横向条形列表：每行一个名称、按比例的条形和时长"""
+
+    ROW_HEIGHT = 26
+    LABEL_WIDTH = 180
+    VALUE_WIDTH = 110
+
+    def __init__(self):
+        super().__init__()
+        self._items: List[Tuple[str, float]] = []
+
+    def set_items(self, items: List[Tuple[str, float]]):
+        """设置 (名称, 秒数) 列表，按给定顺序显示"""
+        if items == self._items:
+            return
+        self._items = items
+        self.setMinimumHeight(len(items) * self.ROW_HEIGHT)
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        if not self._items:
+            painter.setPen(QtGui.QColor(150, 150, 150))
+            painter.drawText(self.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, "没有统计数据")
+            return
+        max_value = max(seconds for _, seconds in self._items) or 1
+        bar_space = max(self.width() - self.LABEL_WIDTH - self.VALUE_WIDTH - 20, 10)
+        bar_color = QtGui.QColor(40, 120, 220)
+        first_row = max(event.rect().top() // self.ROW_HEIGHT, 0)
+        last_row = min(event.rect().bottom() // self.ROW_HEIGHT + 1, len(self._items))
+        for i in range(first_row, last_row):
+            label, seconds = self._items[i]
+            y = i * self.ROW_HEIGHT
+            painter.setPen(QtGui.QColor(50, 50, 50))
+            painter.drawText(QtCore.QRect(0, y, self.LABEL_WIDTH - 10, self.ROW_HEIGHT),
+                             QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter, label)
+            painter.setPen(QtCore.Qt.PenStyle.NoPen)
+            painter.setBrush(bar_color)
+            painter.drawRect(self.LABEL_WIDTH, y + 5, max(int(bar_space * seconds / max_value), 1), self.ROW_HEIGHT - 10)
+            painter.setPen(QtGui.QColor(100, 100, 100))
+            painter.drawText(QtCore.QRect(self.width() - self.VALUE_WIDTH, y, self.VALUE_WIDTH, self.ROW_HEIGHT),
+                             QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter,
+                             self._format_duration(seconds))
+
+    def _format_duration(self, seconds):
+        """格式化时长显示"""
+        hours = int(seconds // 3600)
+        minutes = int((seconds % 3600) // 60)
+        if hours > 0:
+            return f"{hours}h {minutes}m"
+        elif minutes > 0:
+            return f"{minutes}m"
+        else:
+            return f"{int(seconds)}s"
+
+
 class HistogramWidget(QtWidgets.QWidget):
     """周度时间直方图组件"""
-    def __init__(self, start_date, data_manager):
+    def __init__(self, start_date):
         super().__init__()
         self.start_date = start_date
-        self.data_manager = data_manager
         self.setMinimumHeight(250)
         self.days_data = [0] * 7  # 存储每天的时间数据
         self.day_names = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
 
-    def update_data(self, start_date):
-        """更新直方图数据"""
+    def set_data(self, start_date, days_data: List[float]):
+        """设置一周七天的总秒数，没有变化时不重绘"""
+        if start_date == self.start_date and list(days_data) == self.days_data:
+            return
         self.start_date = start_date
-        for i in range(7):
-            day_date = start_date + timedelta(days=i)
-            day_str = day_date.strftime("%Y-%m-%d")
-            daily_stats = self.data_manager.get_daily_stats(day_str)
-            self.days_data[i] = sum(daily_stats.values())  # 总秒数
+        self.days_data = list(days_data)
         self.update()  # 触发重绘
 
     def paintEvent(self, event):
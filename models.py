@@ -0,0 +1,90 @@
+"""领域模型 - 任务
+
+DataManager.data 中的任务是带 __slots__ 的 Task 对象，界面模型和命令行直接读取它的属性；
+存储后端、日志记录和导入导出仍使用 JSON 对象 {"text", "checked", "total_elapsed", "id", 其他字段…}，
+由 load_tasks / dump_tasks 在两者之间转换。固定字段以外的字段（例如导入时带来的备注）保存在 extra 中，原样读写。
+
+统计记录不建对象：统计历史按列保存在数组中（见 stats_store.py），每条记录只占几十个字节。
+
+快照中的 "schema" 是任务数据格式的版本号，没有该字段的旧文件视为版本 0（字段可能缺失，按默认值补齐）；
+读到比 SCHEMA_VERSION 更新的版本时照常加载，不认识的字段保存在 extra 中原样写回。
+"""
+from typing import Any, Dict, List, Optional
+
+SCHEMA_VERSION = 1
+
+# 任务的固定字段（JSON 中的键）
+TASK_FIELDS = ("text", "checked", "total_elapsed", "id")
+_TASK_FIELD_SET = frozenset(TASK_FIELDS)
+
+
+class Task:
+    """任务"""
+
+    __slots__ = ("id", "text", "checked", "total_elapsed", "extra")
+
+    def __init__(self, id: str = "", text: str = "", checked: bool = False, total_elapsed: float = 0.0,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.text = text
+        self.checked = checked
+        self.total_elapsed = total_elapsed  # 累计计时（秒）
+        self.extra = extra  # 固定字段以外的字段，没有时为 None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Task":
+        """JSON 对象 → 任务（缺失的字段取默认值）"""
+        task = cls.__new__(cls)
+        get = data.get
+        task.id = get("id") or ""
+        task.text = get("text") or ""
+        task.checked = bool(get("checked", False))
+        task.total_elapsed = float(get("total_elapsed") or 0)
+        # 绝大多数任务只有固定字段，先用集合比较排除，不逐个检查键
+        if data.keys() <= _TASK_FIELD_SET:
+            task.extra = None
+        else:
+            task.extra = {key: value for key, value in data.items() if key not in _TASK_FIELD_SET}
+        return task
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务 → JSON 对象"""
+        data = {"text": self.text, "checked": self.checked, "total_elapsed": self.total_elapsed, "id": self.id}
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """按 JSON 中的字段名取值"""
+        if field in TASK_FIELDS:
+            return getattr(self, field)
+        return self.extra.get(field, default) if self.extra else default
+
+    def update(self, fields: Dict[str, Any]):
+        """按 JSON 中的字段名更新（日志中的 update_task 记录）"""
+        for field, value in fields.items():
+            if field in TASK_FIELDS:
+                setattr(self, field, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[field] = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Task):
+            return NotImplemented
+        return (self.id == other.id and self.text == other.text and self.checked == other.checked
+                and self.total_elapsed == other.total_elapsed and (self.extra or None) == (other.extra or None))
+
+    def __repr__(self) -> str:
+        return f"Task({self.id!r}, {self.text!r}, checked={self.checked}, total_elapsed={self.total_elapsed})"
+
+
+def load_tasks(raw: Dict[str, List[Dict]]) -> Dict[str, List[Task]]:
+    """{列表名: [JSON 对象]} → {列表名: [任务]}"""
+    return {name: [Task.from_dict(task) for task in tasks] for name, tasks in raw.items()}
+
+
+def dump_tasks(data: Dict[str, List[Task]]) -> Dict[str, List[Dict]]:
+    """{列表名: [任务]} → {列表名: [JSON 对象]}（新对象，可以交给写盘线程）"""
+    return {name: [task.to_dict() for task in tasks] for name, tasks in data.items()}
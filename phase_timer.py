@@ -0,0 +1,40 @@
+"""分阶段计时模块 - 记录启动等流程中每个阶段的耗时"""
+import time
+from typing import List, Optional, Tuple
+
+
+class PhaseTimer:
+    """依次标记阶段结束，记录每个阶段的耗时（毫秒）
+
+    在后台线程中与这些阶段并行的工作由 record 单独登记，不计入合计。
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        # start 为 time.perf_counter() 的读数，可以从进程更早的时刻开始计时
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.phases: List[Tuple[str, float]] = []
+        self.background: List[Tuple[str, float]] = []  # 后台工作的 (名称, 耗时)
+
+    def mark(self, name: str):
+        """结束当前阶段"""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def record(self, name: str, ms: float):
+        """登记一项后台工作的实际耗时（由调用方在后台线程中测量）"""
+        self.background.append((name, ms))
+
+    @property
+    def total_ms(self) -> float:
+        """从开始到最后一个阶段结束的总耗时"""
+        return (self._last - self.start) * 1000
+
+    def report(self) -> str:
+        """每个阶段一行的耗时报告"""
+        width = max([len(name) for name, _ in self.phases + self.background] + [4])
+        lines = [f"{name:<{width}} {ms:>9.1f} ms" for name, ms in self.phases]
+        lines.append(f"{'合计':<{width}} {self.total_ms:>9.1f} ms")
+        lines.extend(f"{name:<{width}} {ms:>9.1f} ms（后台）" for name, ms in self.background)
+        return "\n".join(lines)
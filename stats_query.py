@@ -0,0 +1,230 @@
+"""统计查询模块 - 任意日期区间的分组统计
+
+统计索引 (StatsIndex) 为每个分组维度（任务、任务 id、星期、小时）以及总计维护前缀和序列：
+按日期排序的日期序数数组 + 累计秒数数组。任意区间 [开始, 结束] 的总时长用两次二分查找得到，
+按任务分组的区间查询为 O(任务数 × log 天数)，与区间长短无关，多年的年度报告也能即时完成。
+
+索引在第一次查询时从统计历史逐月构建，之后随新的统计记录增量更新。
+
+周报 (compute_week_report) 和索引构建 (build_index) 也可以在后台线程中基于统计历史的快照
+（StatsHistory.snapshot）完成，不访问数据管理器。不依赖 Qt。
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date as Date, datetime, timedelta
+from heapq import nlargest
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from stats_store import StatsStore, open_source
+
+# 支持的分组维度
+GROUP_BY = ("task", "list", "weekday", "hour", "day")
+
+
+class PrefixSeries:
+    """一个分组的每日时长前缀和：days[i] 为日期序数（升序），prefix[i + 1] - prefix[i] 为当天秒数"""
+
+    __slots__ = ("days", "prefix")
+
+    def __init__(self):
+        self.days = array("i")
+        self.prefix = array("d", [0.0])
+
+    def add(self, ordinal: int, seconds: float):
+        """累加某天的时长；按时间顺序追加时为 O(1)，补录更早的日期时为 O(天数)"""
+        days, prefix = self.days, self.prefix
+        if days and ordinal == days[-1]:
+            prefix[-1] += seconds
+            return
+        if not days or ordinal > days[-1]:
+            days.append(ordinal)
+            prefix.append(prefix[-1] + seconds)
+            return
+        i = bisect_left(days, ordinal)
+        if days[i] != ordinal:
+            days.insert(i, ordinal)
+            prefix.insert(i + 1, prefix[i])
+        for j in range(i + 1, len(prefix)):
+            prefix[j] += seconds
+
+    def total(self, first: int, last: int) -> float:
+        """日期序数区间 [first, last] 内的总秒数"""
+        return self.prefix[bisect_right(self.days, last)] - self.prefix[bisect_left(self.days, first)]
+
+    def daily(self, first: int, last: int) -> Iterator[Tuple[int, float]]:
+        """区间内有记录的每一天 (日期序数, 秒数)"""
+        lo, hi = bisect_left(self.days, first), bisect_right(self.days, last)
+        prefix = self.prefix
+        for i in range(lo, hi):
+            yield self.days[i], prefix[i + 1] - prefix[i]
+
+
+def _hour_pieces(start: float, seconds: float) -> Iterator[Tuple[int, float]]:
+    """把从 start 开始的 seconds 秒按本地时间的整点切开，产生 (小时, 秒数)；最多到当天结束"""
+    moment = datetime.fromtimestamp(start)
+    hour = moment.hour
+    remaining = seconds
+    into_hour = moment.minute * 60 + moment.second + moment.microsecond / 1e6
+    while remaining > 0 and hour < 24:
+        piece = min(remaining, 3600 - into_hour)
+        yield hour, piece
+        remaining -= piece
+        hour += 1
+        into_hour = 0.0
+
+
+class StatsIndex:
+    """统计记录的多维前缀和索引"""
+
+    def __init__(self):
+        self.overall = PrefixSeries()
+        self.tasks: Dict[str, PrefixSeries] = {}
+        self.task_ids: Dict[Optional[str], PrefixSeries] = {}  # None: 没有关联任务 id 的记录
+        self.weekdays = [PrefixSeries() for _ in range(7)]
+        self.hours = [PrefixSeries() for _ in range(24)]
+
+    def add(self, date: str, task: str, seconds: float, start: float = 0.0, task_id: Optional[str] = None):
+        """登记一条统计记录（start 为开始时间戳，0 表示未知，不计入按小时的统计）"""
+        day = Date.fromisoformat(date)
+        ordinal = day.toordinal()
+        self.overall.add(ordinal, seconds)
+        series = self.tasks.get(task)
+        if series is None:
+            series = self.tasks[task] = PrefixSeries()
+        series.add(ordinal, seconds)
+        series = self.task_ids.get(task_id)
+        if series is None:
+            series = self.task_ids[task_id] = PrefixSeries()
+        series.add(ordinal, seconds)
+        self.weekdays[day.weekday()].add(ordinal, seconds)
+        if start:
+            for hour, piece in _hour_pieces(start, seconds):
+                self.hours[hour].add(ordinal, piece)
+
+    def add_day(self, date: str, rows: Iterator[Tuple[str, float, float, Optional[str]]]):
+        """批量登记某一天的记录 (任务名, 秒数, 开始时间戳, 任务 id)，每个分组每天只更新一次"""
+        day = Date.fromisoformat(date)
+        ordinal = day.toordinal()
+        by_task: Dict[str, float] = {}
+        by_task_id: Dict[Optional[str], float] = {}
+        by_hour: Dict[int, float] = {}
+        for task, seconds, start, task_id in rows:
+            by_task[task] = by_task.get(task, 0) + seconds
+            by_task_id[task_id] = by_task_id.get(task_id, 0) + seconds
+            if start:
+                for hour, piece in _hour_pieces(start, seconds):
+                    by_hour[hour] = by_hour.get(hour, 0) + piece
+        for groups, totals in ((self.tasks, by_task), (self.task_ids, by_task_id)):
+            for key, seconds in totals.items():
+                series = groups.get(key) # type: ignore
+                if series is None:
+                    series = groups[key] = PrefixSeries() # type: ignore
+                series.add(ordinal, seconds)
+        for hour, seconds in by_hour.items():
+            self.hours[hour].add(ordinal, seconds)
+        day_total = sum(by_task.values())
+        self.overall.add(ordinal, day_total)
+        self.weekdays[day.weekday()].add(ordinal, day_total)
+
+    def total(self, first: Date, last: Date) -> float:
+        """区间总时长（秒）"""
+        return self.overall.total(first.toordinal(), last.toordinal())
+
+    def group(self, first: Date, last: Date, group_by: str, list_of=None) -> Dict:
+        """区间内按 group_by 分组的时长，只包含非零的分组
+
+        task / list 的键为任务名 / 列表名（list_of: 任务 id → 列表名，找不到时为 None）；
+        weekday 为 0（周一）～ 6，hour 为 0 ～ 23，day 为 YYYY-MM-DD，这三种按键的顺序排列。
+        """
+        lo, hi = first.toordinal(), last.toordinal()
+        if group_by == "task":
+            items = ((name, series.total(lo, hi)) for name, series in self.tasks.items())
+        elif group_by == "list":
+            totals: Dict[Optional[str], float] = {}
+            for task_id, series in self.task_ids.items():
+                seconds = series.total(lo, hi)
+                if seconds:
+                    name = list_of(task_id) if (list_of is not None and task_id is not None) else None
+                    totals[name] = totals.get(name, 0) + seconds
+            items = iter(totals.items())
+        elif group_by == "weekday":
+            items = ((i, series.total(lo, hi)) for i, series in enumerate(self.weekdays))
+        elif group_by == "hour":
+            items = ((i, series.total(lo, hi)) for i, series in enumerate(self.hours))
+        elif group_by == "day":
+            items = ((Date.fromordinal(o).isoformat(), s) for o, s in self.overall.daily(lo, hi))
+        else:
+            raise ValueError(f"不支持的分组: {group_by}（可选: {', '.join(GROUP_BY)}）")
+        return {key: seconds for key, seconds in items if seconds > 0}
+
+
+def top_n(totals: Dict, n: Optional[int]) -> List[Tuple[object, float]]:
+    """按时长降序排列，n 不为 None 时只取前 n 项"""
+    if n is None:
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return nlargest(n, totals.items(), key=lambda item: item[1])
+
+
+def _never() -> bool:
+    return False
+
+
+class WeekReport:
+    """一周的报告数据：每天的总时长、本周各任务的时长、本周和本月的总时长"""
+
+    __slots__ = ("monday", "month", "days", "tasks", "week_total", "month_total")
+
+    def __init__(self, monday: Date, month: str):
+        self.monday = monday
+        self.month = month
+        self.days: List[float] = [0.0] * 7
+        self.tasks: Dict[str, float] = {}
+        self.week_total = 0.0
+        self.month_total = 0.0
+
+
+def compute_week_report(sources: Dict, monday: Date, month: str,
+                        cancelled: Callable[[], bool] = _never) -> Optional[WeekReport]:
+    """从快照计算 monday 所在一周和 month（YYYY-MM）的报告；cancelled() 为真时中途放弃并返回 None
+
+    sources 为 StatsHistory.snapshot 的结果，需包含这一周和 month 涉及的月份。
+    """
+    report = WeekReport(monday, month)
+    opened: Dict[str, Optional[StatsStore]] = {}
+
+    def partition(key: str) -> Optional[StatsStore]:
+        if key not in opened:
+            source = sources.get(key)
+            opened[key] = open_source(source) if source is not None else None
+        return opened[key]
+
+    for i in range(7):
+        if cancelled():
+            return None
+        date = (monday + timedelta(days=i)).isoformat()
+        store = partition(date[:7])
+        if store is None:
+            continue
+        totals = store.totals_by_task(date)
+        for task, seconds in totals.items():
+            report.tasks[task] = report.tasks.get(task, 0) + seconds
+        report.days[i] = sum(totals.values())
+    report.week_total = sum(report.days)
+    if cancelled():
+        return None
+    store = partition(month)
+    if store is not None:
+        report.month_total = sum(store.day_total(date) for date in store.dates() if date.startswith(month))
+    return report
+
+
+def build_index(sources: Dict, cancelled: Callable[[], bool] = _never) -> Optional[StatsIndex]:
+    """从快照（全部月份）构建统计索引；cancelled() 为真时中途放弃并返回 None"""
+    index = StatsIndex()
+    for month in sorted(sources):
+        if cancelled():
+            return None
+        store = open_source(sources[month])
+        for date in store.dates():
+            index.add_day(date, store.rows(date))
+    return index
@@ -0,0 +1,481 @@
+"""统计历史的列式存储
+
+每天的完成记录按列保存在 array 中：任务名编号、时长（秒）、完成时间戳（epoch 秒）、任务 id 编号。
+任务名和任务 id 各有一张去重的字符串表，重复的名字只保存一次。
+
+统计历史按月分区 (StatsHistory)：每个月一个分段文件 todo_data.history/YYYY-MM.stats，
+查询到某个月时才读入内存，常驻的分区由 LRU 管理，启动开销和内存占用与历史长短无关。
+其他存储后端通过子类替换分区的来源（见 storage_sqlite.SqliteHistory）。
+
+分段文件格式（小端序）：
+    头部       魔数 b"TDSTATS1"，版本，快照代号，各部分数量
+    字符串表   任务名、任务 id，每项为 u32 字节数 + UTF-8 字节
+    日期索引   每天 (日期序数 i32, 起始行 u32, 行数 u32)
+    数据列     按日期排序后连续存放：时长 f64[]、时间戳 f64[]、任务名编号 u32[]、任务 id 编号 i32[]
+数据列按 8 字节对齐，可以直接对 mmap 做 memoryview.cast 读取。
+
+分段读入时通过 mmap 解析后复制到 array 中，不保持映射，分段文件随时可以被原子替换（Windows 上也是如此）。
+
+用法（把旧版本的统计数据转换为按月分区的存储）:
+    python stats_store.py convert [todo_data.json]
+"""
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from datetime import date as Date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from atomic_io import atomic_write
+
+MAGIC = b"TDSTATS1"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIqIIII")  # 魔数, 版本, 代号, 任务名数, 任务 id 数, 天数, 总行数
+_DAY_INDEX = struct.Struct("<iII")  # 日期序数, 起始行, 行数
+_LENGTH = struct.Struct("<I")
+
+# 没有任务 id 的记录在任务 id 列中的编号
+NO_TASK_ID = -1
+
+# 常驻内存的月分区数上限（有未写入磁盘的记录的分区不计入淘汰）
+RESIDENT_MONTHS = 12
+SEGMENT_SUFFIX = ".stats"
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """ISO 时间字符串 → epoch 秒（缺失或无法解析时为 0）"""
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def day_pieces(start: float, end: float) -> Iterator[Tuple[str, float, float]]:
+    """把时间段 [start, end) 在本地时间的零点处切开，产生 (日期, 开始时间戳, 秒数)"""
+    while start < end:
+        day = datetime.fromtimestamp(start).date()
+        midnight = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+        piece_end = min(end, midnight) if midnight > start else end
+        yield day.isoformat(), start, piece_end - start
+        start = piece_end
+
+
+class DayColumns:
+    """一天的完成记录（列式）"""
+
+    __slots__ = ("name_ids", "durations", "timestamps", "task_refs")
+
+    def __init__(self):
+        self.name_ids = array("I")
+        self.durations = array("d")
+        self.timestamps = array("d")
+        self.task_refs = array("i")
+
+    def __len__(self):
+        return len(self.durations)
+
+    def copy(self) -> "DayColumns":
+        day = DayColumns()
+        day.name_ids = array("I", self.name_ids)
+        day.durations = array("d", self.durations)
+        day.timestamps = array("d", self.timestamps)
+        day.task_refs = array("i", self.task_refs)
+        return day
+
+
+class _StringTable:
+    """去重的字符串表：字符串 ↔ 编号"""
+
+    __slots__ = ("values", "_ids")
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = values or []
+        self._ids: Dict[str, int] = {value: i for i, value in enumerate(self.values)}
+
+    def intern(self, value: str) -> int:
+        index = self._ids.get(value)
+        if index is None:
+            index = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+
+class StatsStore:
+    """统计历史：日期 → 列式记录"""
+
+    def __init__(self):
+        self._names = _StringTable()
+        self._task_ids = _StringTable()
+        self._days: Dict[str, DayColumns] = {}
+        self._rows = 0
+
+    def __len__(self):
+        return self._rows
+
+    @property
+    def names(self) -> List[str]:
+        """任务名表（编号即列表下标）"""
+        return self._names.values
+
+    def append(self, date: str, task: str, duration: float, timestamp: float = 0.0,
+               task_id: Optional[str] = None):
+        """追加一条完成记录"""
+        day = self._days.get(date)
+        if day is None:
+            day = self._days[date] = DayColumns()
+        day.name_ids.append(self._names.intern(task))
+        day.durations.append(duration)
+        day.timestamps.append(timestamp)
+        day.task_refs.append(self._task_ids.intern(task_id) if task_id else NO_TASK_ID)
+        self._rows += 1
+
+    def dates(self) -> List[str]:
+        """有记录的日期（升序）"""
+        return sorted(self._days)
+
+    def day(self, date: str) -> Optional[DayColumns]:
+        """某天的列式记录"""
+        return self._days.get(date)
+
+    def totals_by_task(self, date: str) -> Dict[str, float]:
+        """某天每个任务的总时长"""
+        day = self._days.get(date)
+        if day is None:
+            return {}
+        totals: Dict[int, float] = {}
+        for name_id, duration in zip(day.name_ids, day.durations):
+            totals[name_id] = totals.get(name_id, 0) + duration
+        names = self._names.values
+        return {names[name_id]: seconds for name_id, seconds in totals.items()}
+
+    def rows(self, date: str) -> Iterator[Tuple[str, float, float, Optional[str]]]:
+        """逐条产生某天的记录 (任务名, 时长, 时间戳, 任务 id)"""
+        day = self._days.get(date)
+        if day is None:
+            return
+        names, task_ids = self._names.values, self._task_ids.values
+        for name_id, duration, timestamp, task_ref in zip(day.name_ids, day.durations, day.timestamps, day.task_refs):
+            yield names[name_id], duration, timestamp, (task_ids[task_ref] if task_ref != NO_TASK_ID else None)
+
+    def day_total(self, date: str) -> float:
+        """某天的总时长"""
+        day = self._days.get(date)
+        return sum(day.durations) if day is not None else 0.0
+
+    def entries(self, date: str) -> Iterator[Dict]:
+        """按旧版格式逐条产生某天的记录 {"task", "duration", "timestamp"[, "task_id"]}"""
+        for task, duration, timestamp, task_id in self.rows(date):
+            entry = {
+                "task": task,
+                "duration": duration,
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+            }
+            if task_id is not None:
+                entry["task_id"] = task_id
+            yield entry
+
+    def copy(self) -> "StatsStore":
+        """复制一份（交给写盘线程；数组复制只是内存拷贝）"""
+        store = StatsStore()
+        store._names = _StringTable(list(self._names.values))
+        store._task_ids = _StringTable(list(self._task_ids.values))
+        store._days = {date: day.copy() for date, day in self._days.items()}
+        store._rows = self._rows
+        return store
+
+    # ========== 磁盘格式
+    def to_bytes(self, generation: int) -> bytes:
+        """序列化为二进制格式"""
+        dates = self.dates()
+        parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, generation, len(self._names.values),
+                              len(self._task_ids.values), len(dates), self._rows)]
+        for value in self._names.values + self._task_ids.values:
+            encoded = value.encode("utf-8")
+            parts.append(_LENGTH.pack(len(encoded)))
+            parts.append(encoded)
+        row = 0
+        for date in dates:
+            count = len(self._days[date])
+            parts.append(_DAY_INDEX.pack(Date.fromisoformat(date).toordinal(), row, count))
+            row += count
+        size = sum(len(part) for part in parts)
+        parts.append(b"\0" * (-size % 8))  # 数据列 8 字节对齐
+        for column in ("durations", "timestamps", "name_ids", "task_refs"):
+            for date in dates:
+                values = getattr(self._days[date], column)
+                if sys.byteorder != "little":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                parts.append(values.tobytes())
+        return b"".join(parts)
+
+    def save(self, path: str, generation: int):
+        """写入文件：先写临时文件并刷到磁盘，再原子替换"""
+        atomic_write(path, self.to_bytes(generation))
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["StatsStore", int]:
+        """从文件加载，返回 (统计数据, 快照代号)"""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("统计文件为空")
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return cls.from_buffer(mm)
+
+    @classmethod
+    def from_buffer(cls, buffer) -> Tuple["StatsStore", int]:
+        """从二进制数据解析，返回 (统计数据, 快照代号)"""
+        view = memoryview(buffer)
+        try:
+            magic, version, generation, n_names, n_task_ids, n_days, n_rows = _HEADER.unpack_from(view, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError("不是可识别的统计文件")
+            offset = _HEADER.size
+            strings = []
+            for _ in range(n_names + n_task_ids):
+                (length,) = _LENGTH.unpack_from(view, offset)
+                offset += _LENGTH.size
+                strings.append(bytes(view[offset:offset + length]).decode("utf-8"))
+                offset += length
+            index = list(_DAY_INDEX.iter_unpack(view[offset:offset + n_days * _DAY_INDEX.size]))
+            offset += n_days * _DAY_INDEX.size
+            offset += -offset % 8
+
+            columns = {}
+            for column, typecode, itemsize in (("durations", "d", 8), ("timestamps", "d", 8),
+                                               ("name_ids", "I", 4), ("task_refs", "i", 4)):
+                end = offset + n_rows * itemsize
+                if end > len(view):
+                    raise ValueError("统计文件不完整")
+                values = array(typecode)
+                values.frombytes(view[offset:end])
+                if sys.byteorder != "little":
+                    values.byteswap()
+                columns[column] = values
+                offset = end
+
+            store = cls()
+            store._names = _StringTable(strings[:n_names])
+            store._task_ids = _StringTable(strings[n_names:])
+            for ordinal, start, count in index:
+                day = DayColumns()
+                for column, values in columns.items():
+                    setattr(day, column, values[start:start + count])
+                store._days[Date.fromordinal(ordinal).isoformat()] = day
+            store._rows = n_rows
+            return store, generation
+        finally:
+            view.release()
+
+
+class StatsHistory:
+    """按月分区的统计历史：月 (YYYY-MM) → StatsStore，按需从分段文件读入
+
+    分区中的记录在写入磁盘前不会被淘汰：新增记录的分区标记为"未保存"，
+    交给快照写入时记下快照代号，直到确认该代号的快照写入成功后才解除固定。
+    分段文件存在却无法读取时改名为 YYYY-MM.stats.corrupt 保留（之后该月从空分区开始），记入 damaged 由调用方提示，
+    不会用空分区写回覆盖原来的文件。
+    """
+
+    _UNSAVED = math.inf
+
+    def __init__(self, directory: str, capacity: int = RESIDENT_MONTHS):
+        self.directory = directory
+        self.capacity = capacity
+        self._resident: "OrderedDict[str, StatsStore]" = OrderedDict()
+        self._generations: Dict[str, int] = {}  # 已读入分区的分段文件代号，没有文件时为 0
+        self._pins: Dict[str, float] = {}  # 月 → 固定到的快照代号（_UNSAVED 表示还没有交给快照）
+        self._on_disk: Optional[Set[str]] = None  # 磁盘上已有分段的月份，第一次需要时才列目录
+        self.damaged: List[str] = []  # 改名保留的损坏分段文件，由调用方取走并提示
+
+    def reset(self, ignore_disk: bool = False):
+        """丢弃内存中的全部分区；ignore_disk=True 时视磁盘上的分段为不存在（整体迁移旧数据时使用）"""
+        self._resident.clear()
+        self._generations.clear()
+        self._pins.clear()
+        self._on_disk = set() if ignore_disk else None
+
+    def segment_path(self, month: str) -> str:
+        return os.path.join(self.directory, month + SEGMENT_SUFFIX)
+
+    def _disk_months(self) -> Set[str]:
+        if self._on_disk is None:
+            self._on_disk = self._scan_months()
+        return self._on_disk
+
+    # ========== 分区来源（子类可以替换）
+    def _scan_months(self) -> Set[str]:
+        """已保存的月份"""
+        if not os.path.isdir(self.directory):
+            return set()
+        return {name[:-len(SEGMENT_SUFFIX)] for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)}
+
+    def _load(self, month: str) -> Tuple[StatsStore, int]:
+        """读入已保存的分区，返回 (分区, 代号)"""
+        return StatsStore.load(self.segment_path(month))
+
+    def _set_aside_damaged(self, month: str, error: Exception):
+        """分段文件无法读取：改名为 .corrupt 保留；改名失败时抛出，该月不会被写回覆盖"""
+        path = self.segment_path(month)
+        os.replace(path, path + ".corrupt")
+        self._disk_months().discard(month)
+        self.damaged.append(f"{path}.corrupt ({error})")
+
+    def _source(self, month: str) -> Union[StatsStore, str, Callable[[], StatsStore]]:
+        """已保存分区在其他线程中的读取方式（见 open_source）"""
+        return self.segment_path(month)
+
+    def months(self) -> List[str]:
+        """有记录的月份（升序）"""
+        return sorted(self._disk_months() | set(self._resident))
+
+    def partition(self, month: str) -> StatsStore:
+        """取某个月的分区，不在内存中时从分段文件读入"""
+        store = self._resident.get(month)
+        if store is not None:
+            self._resident.move_to_end(month)
+            return store
+        store, generation = StatsStore(), 0
+        if month in self._disk_months():
+            try:
+                store, generation = self._load(month)
+            except Exception as e:
+                self._set_aside_damaged(month, e)
+        self._resident[month] = store
+        self._generations[month] = generation
+        self._evict()
+        return store
+
+    def segment_generation(self, month: str) -> int:
+        """某个月分段文件的快照代号（没有文件时为 0）"""
+        self.partition(month)
+        return self._generations[month]
+
+    def is_resident(self, month: str) -> bool:
+        """某个月的分区是否在内存中"""
+        return month in self._resident
+
+    def has_unsaved(self, month: str) -> bool:
+        """某个月是否有尚未确认写入的记录"""
+        return month in self._pins
+
+    def resident_months(self) -> List[str]:
+        """当前在内存中的月份（最近使用的在后）"""
+        return list(self._resident)
+
+    def _evict(self):
+        """淘汰最久未使用、且已经写入磁盘的分区（不淘汰刚刚使用的分区）"""
+        excess = len(self._resident) - self.capacity
+        if excess <= 0:
+            return
+        for month in list(self._resident)[:-1]:
+            if month not in self._pins:
+                del self._resident[month]
+                del self._generations[month]
+                excess -= 1
+                if excess == 0:
+                    return
+
+    def append(self, date: str, task: str, duration: float, timestamp: float = 0.0,
+               task_id: Optional[str] = None):
+        """追加一条完成记录，所在分区固定在内存中直到写入磁盘"""
+        month = date[:7]
+        self._pins[month] = self._UNSAVED
+        self.partition(month).append(date, task, duration, timestamp, task_id)
+
+    def totals_by_task(self, date: str) -> Dict[str, float]:
+        """某天每个任务的总时长（该月没有记录时不读盘）"""
+        month = date[:7]
+        if month not in self._resident and month not in self._disk_months():
+            return {}
+        return self.partition(month).totals_by_task(date)
+
+    def dates(self) -> Iterator[str]:
+        """逐月读入，按日期顺序产生有记录的日期"""
+        for month in self.months():
+            yield from self.partition(month).dates()
+
+    def entries(self, date: str) -> Iterator[Dict]:
+        """按旧版格式逐条产生某天的记录"""
+        return self.partition(date[:7]).entries(date)
+
+    def snapshot(self, months: Iterable[str]) -> Dict:
+        """供其他线程读取的快照：在内存中的分区复制一份，其余给出读取方式（没有记录的月份省略）
+
+        不在内存中的分区都已写入磁盘且之后没有新记录，分段文件只会被原子替换，其他线程可以直接读取。
+        """
+        sources: Dict = {}
+        for month in months:
+            store = self._resident.get(month)
+            if store is not None:
+                sources[month] = store.copy()
+            elif month in self._disk_months():
+                sources[month] = self._source(month)
+        return sources
+
+    # ========== 与写盘的配合（只在主线程调用）
+    def mark_saving(self, generation: int) -> List[str]:
+        """把所有未保存的分区交给代号为 generation 的写入，返回这些月份"""
+        months = [month for month, pin in self._pins.items() if pin == self._UNSAVED]
+        for month in months:
+            self._pins[month] = generation
+        return months
+
+    def take_unsaved(self, generation: int) -> Dict[str, StatsStore]:
+        """复制所有未保存的分区交给代号为 generation 的快照写入"""
+        return {month: self._resident[month].copy() for month in self.mark_saving(generation)}
+
+    def release(self, written_generation: int):
+        """代号不超过 written_generation 的快照已写入磁盘，解除相应分区的固定"""
+        for month, pin in list(self._pins.items()):
+            if pin <= written_generation:
+                del self._pins[month]
+                self._disk_months().add(month)
+        self._evict()
+
+    def unsave_failed(self, written_generation: int):
+        """快照写入失败：尚未确认写入的分区重新标记为未保存"""
+        for month, pin in self._pins.items():
+            if pin > written_generation:
+                self._pins[month] = self._UNSAVED
+
+
+def open_source(source: Union[StatsStore, str, Callable[[], StatsStore]]) -> StatsStore:
+    """打开快照中的一个分区：分区本身、分段文件路径，或读取分区的函数（在这里才读入）"""
+    if isinstance(source, StatsStore):
+        return source
+    if callable(source):
+        return source()
+    return StatsStore.load(source)[0]
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != "convert":
+        print(__doc__)
+        return 1
+    from data_manager import DataManager
+    from todolist import DATA_FILE
+
+    data_file = argv[1] if len(argv) > 1 else DATA_FILE
+    before = sum(os.path.getsize(path) for path in (data_file, os.path.splitext(data_file)[0] + ".stats")
+                 if os.path.exists(path))
+    dm = DataManager(data_file)
+    ok = dm.compact()
+    dm.close()
+    if not ok:
+        print("转换失败")
+        return 1
+    months = dm.history.months()
+    after = os.path.getsize(data_file) + sum(os.path.getsize(dm.history.segment_path(m)) for m in months)
+    print(f"已转换 {len(months)} 个月的统计记录: {before / 1024:.1f} KB → {after / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
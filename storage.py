@@ -0,0 +1,667 @@
+"""存储后端 - DataManager 的持久化层
+
+数据管理器在内存中维护任务列表、计时状态和统计历史，每次变更生成一条变更记录；
+存储后端负责把数据读入内存，并把变更记录（或完整数据）写到磁盘。
+按数据文件的扩展名选择后端 (open_backend)：
+
+- JSON（默认，.json）：快照文件 + 追加式日志 + 按月分段的统计历史，见 JsonBackend
+- SQLite（.db / .sqlite / .sqlite3）：单个数据库文件，WAL 模式，每次保存一个事务，
+  统计查询用 GROUP BY 聚合，适合上百万条的统计历史，见 storage_sqlite.py
+
+后端接口 (StorageBackend) 的方法都在主线程中调用；写盘在后端自己的写盘线程中完成，
+写盘函数只访问交给它的数据。
+
+用法（在两种后端之间迁移数据，目标文件必须不存在）:
+    python storage.py migrate todo_data.json todo_data.db
+"""
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from atomic_io import atomic_write, fsync_directory, fsync_file
+from json_codec import codec
+from models import SCHEMA_VERSION, Task, dump_tasks
+from stats_store import SEGMENT_SUFFIX, StatsHistory, StatsStore, parse_timestamp
+
+# 日志记录数超过该值时，下一次保存会压缩为快照
+COMPACT_THRESHOLD = 500
+# 日志追加的组提交间隔（秒）：距上次 fsync 不到该间隔的追加只写入系统缓存，
+# 由之后的保存一起刷盘；0 表示每次保存都刷盘
+SYNC_INTERVAL = 1.0
+# 保留的旧快照份数 (todo_data.json.1 为最近的一份)
+BACKUP_GENERATIONS = 3
+# 快照默认写成紧凑的 JSON；设置环境变量 TODO_PRETTY_JSON=1 时缩进输出，便于手工查看
+PRETTY_JSON = os.environ.get("TODO_PRETTY_JSON") == "1"
+
+# 使用 SQLite 后端的数据文件扩展名
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+class DataFileLocked(Exception):
+    """数据文件正被另一个进程使用"""
+
+
+# 本进程持有的数据文件锁：锁文件的绝对路径 → [文件描述符, 引用数]
+_HELD_LOCKS: Dict[str, List] = {}
+_HELD_LOCKS_GUARD = threading.Lock()
+
+
+def _lock_file(path: str) -> Optional[int]:
+    """打开锁文件并加排他锁（不等待），锁被其他进程持有时抛出 DataFileLocked"""
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError as e:
+        # 只读目录等情况下无法加锁，照常读取
+        print(f"创建锁文件失败: {e}")
+        return None
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        raise DataFileLocked(f"数据文件正被另一个进程使用（例如正在运行的图形界面）: {path}")
+    return fd
+
+
+def _unlock_file(fd: Optional[int]):
+    if fd is None:
+        return
+    if os.name == "nt":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)
+
+
+class DataFileLock:
+    """数据文件锁 - 同一时刻只有一个进程读写某个数据文件
+
+    图形界面和命令行各自在内存中维护数据，一方压缩快照时会覆盖另一方追加的日志，
+    所以后端在 load() 时锁住数据文件旁的锁文件 (todo_data.json.lock)，close() 时释放；
+    锁被其他进程持有时 load() 抛出 DataFileLocked。锁由操作系统随进程释放，异常退出不会残留。
+    同一进程内打开同一数据文件的多个后端共用一把锁（按引用数释放）。
+    """
+
+    def __init__(self, data_file: str):
+        self.path = os.path.abspath(data_file + ".lock")
+        self._held = False
+
+    def acquire(self):
+        if self._held:
+            return
+        with _HELD_LOCKS_GUARD:
+            entry = _HELD_LOCKS.get(self.path)
+            if entry is None:
+                entry = _HELD_LOCKS[self.path] = [_lock_file(self.path), 0]
+            entry[1] += 1
+        self._held = True
+
+    def release(self):
+        if not self._held:
+            return
+        self._held = False
+        with _HELD_LOCKS_GUARD:
+            entry = _HELD_LOCKS[self.path]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _HELD_LOCKS[self.path]
+                _unlock_file(entry[0])
+
+
+class PersistWriter:
+    """写盘线程 - 按提交顺序执行写盘任务（首次提交时启动）"""
+
+    def __init__(self):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, job: Callable[[], None]):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="DataManagerWriter", daemon=True)
+            self._thread.start()
+        self._queue.put(job)
+
+    def flush(self):
+        """等待已提交的写盘任务全部完成"""
+        self._queue.join()
+
+    def stop(self):
+        """完成剩余任务后结束线程"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                job()
+            finally:
+                self._queue.task_done()
+
+
+class StorageBackend:
+    """存储后端接口
+
+    加载：load() 返回快照中的 (任务列表, 计时状态) 并准备好 history，
+    之后数据管理器回放 replay() 产生的变更记录（stat_saved(日期) 为真的统计记录已包含在统计历史中，跳过）。
+    保存：save() 把自上次保存以来的变更记录交给写盘线程；需要时（schedule_rewrite、写入失败后）改为写入完整数据。
+    从 load() 到 close() 期间持有数据文件锁 (DataFileLock)，其他进程无法同时打开同一个数据文件。
+    """
+
+    history: StatsHistory
+
+    def load(self) -> Tuple[Dict[str, List[Dict]], Optional[Dict]]:
+        """读入数据，返回 (任务列表, 计时状态)；数据文件被其他进程使用时抛出 DataFileLocked"""
+        raise NotImplementedError
+
+    def replay(self) -> Iterator[Dict]:
+        """快照之后尚未合并的变更记录"""
+        return iter(())
+
+    def stat_saved(self, date: str) -> bool:
+        """回放的变更记录中，某天的统计是否已经包含在统计历史中"""
+        return False
+
+    @property
+    def needs_save(self) -> bool:
+        """即使没有新的变更也需要保存（要重写完整数据，或之前的写入失败）"""
+        raise NotImplementedError
+
+    @property
+    def write_failed(self) -> bool:
+        """已完成的写盘中是否有失败"""
+        raise NotImplementedError
+
+    def schedule_rewrite(self):
+        """下一次保存写入完整数据"""
+        raise NotImplementedError
+
+    def begin_save(self):
+        """保存之前：处理已完成的写盘（解除已写入分区的固定，写入失败时安排重写完整数据）"""
+        raise NotImplementedError
+
+    def save(self, records: List[Dict], tasks: Dict[str, List[Task]], timer: Optional[Dict]):
+        """提交保存：records 为自上次保存以来的变更记录，tasks / timer 为当前数据（写完整数据时转换为 JSON 对象）"""
+        raise NotImplementedError
+
+    def flush(self) -> bool:
+        """等待已提交的写盘全部完成，返回是否全部成功"""
+        raise NotImplementedError
+
+    def close(self):
+        """结束写盘线程，释放文件和数据文件锁"""
+        raise NotImplementedError
+
+    def totals_by_task(self, first: str, last: str) -> Optional[Dict[str, float]]:
+        """日期区间 [first, last] 每个任务的总时长；后端不支持，或从内存汇总更合适时返回 None"""
+        return None
+
+    def write_all(self, tasks: Dict[str, List[Task]], timer: Optional[Dict],
+                  partitions: Iterable[Tuple[str, StatsStore]]):
+        """在当前线程中写入完整数据，替换已有的全部内容（迁移数据时使用）"""
+        raise NotImplementedError
+
+
+class JsonBackend(StorageBackend):
+    """JSON 存储：快照文件 + 日志 + 按月分段的统计历史
+
+    - 快照文件 (todo_data.json)：任务列表和计时状态
+    - 统计历史 (todo_data.history/YYYY-MM.stats)：按月分段的列式二进制文件（见 stats_store.py），
+      写快照时只重写有新记录的月份；查询到某个月时才读入内存
+    - 日志文件 (todo_data.journal)：快照之后的每一次变更，按行追加的 JSON 记录
+    旧版本的统计历史（快照中的 "stats"，或单个 todo_data.stats 文件）加载时自动转换，下一次保存即写成新格式。
+
+    保存时只把新增的变更追加到日志末尾，开销与变更量成正比；
+    日志记录数超过阈值时再压缩为新的快照并清空日志。
+    快照和统计分段都先写入临时文件并 fsync，再原子替换，不会留下写了一半的文件；
+    替换快照前把旧快照保留为备份 (todo_data.json.1 … .N，硬链接，不复制数据)。
+    加载时快照损坏（或丢失而备份还在）则从最新的可读备份恢复，损坏的快照和无法回放的日志改名为 .corrupt 保留。
+    日志追加按组提交：距上次 fsync 超过 sync_interval 的保存才刷盘，其余的只写入系统缓存，
+    由下一次保存（或 flush / close）一起刷盘。进程被杀不会丢数据，断电最多丢失最近 sync_interval 秒的变更。
+    快照和日志都经 json_codec 序列化为一整块字节后一次写入（快照默认紧凑格式，pretty=True 时缩进）。
+    写快照时先记下要重写的月份 (todo_data.history/pending.json)，再写统计分段，最后写快照文件；
+    加载时发现比快照新的 pending.json 说明写快照时被中断：代号比快照大 1 的分段已包含日志中该月的统计记录，
+    回放时跳过，并在下一次保存时重写快照。
+    """
+
+    def __init__(self, data_file: str, compact_threshold: int = COMPACT_THRESHOLD,
+                 sync_interval: float = SYNC_INTERVAL, backups: int = BACKUP_GENERATIONS,
+                 pretty: bool = PRETTY_JSON):
+        self.data_file = data_file
+        self.journal_file = os.path.splitext(data_file)[0] + ".journal"
+        self.history_dir = os.path.splitext(data_file)[0] + ".history"
+        self.pending_file = os.path.join(self.history_dir, "pending.json")  # 正在重写的统计分段
+        self.stats_file = os.path.splitext(data_file)[0] + ".stats"  # 旧版本的单个统计文件
+        self.compact_threshold = compact_threshold
+        self.sync_interval = sync_interval
+        self.backups = backups
+        self.pretty = pretty
+        self.history = StatsHistory(self.history_dir)  # 统计数据（按月分区，按需读入）
+        self._lock = DataFileLock(data_file)
+        self._writer = PersistWriter()
+        self._generation = 0  # 快照代号，日志只有与快照代号一致时才会被回放
+        self._journal_count = 0  # 日志文件中已有的记录数
+        self._needs_compact = False  # 下一次保存是否必须重写快照
+        self._skip_journal_stats = False  # 旧版统计文件已包含日志中的统计记录（压缩过程中被中断）
+        self._written_generation = 0  # 已确认写入磁盘的快照代号（由写盘线程更新）
+        self._write_failed = False  # 写盘线程报告的失败，由主线程在下一次保存时处理
+        # 组提交状态（由写盘线程更新）：日志中是否有尚未 fsync 的追加、上次 fsync 的时刻
+        self._journal_unsynced = False
+        self._journal_created = False  # 新建的日志文件，刷盘时还要刷所在目录
+        self._last_sync = 0.0
+        # 整体迁移旧版统计数据：下一次快照写入全部分区并删除其他分段；迁移快照的代号
+        self._replace_segments = False
+        self._replace_generation: Optional[int] = None
+
+    # ========== 加载
+    def load(self) -> Tuple[Dict[str, List[Dict]], Optional[Dict]]:
+        """读取快照（以及旧版本的统计数据）"""
+        self._lock.acquire()
+        self._writer.flush()
+        self._write_failed = False
+        self.history.reset()
+        self._generation = 0
+        self._journal_count = 0
+        self._needs_compact = False
+        self._skip_journal_stats = False
+        self._replace_segments = False
+        self._replace_generation = None
+        tasks: Dict[str, List[Dict]] = {}
+        timer = None
+
+        legacy_stats = False
+        loaded_data = self._read_snapshot()
+        if loaded_data is not None:
+            try:
+                # 兼容性处理：如果数据格式较老
+                if isinstance(loaded_data, list):
+                    # 老格式：直接是任务列表
+                    tasks = {"我的任务": loaded_data}
+                    self._needs_compact = True
+                else:
+                    # 新格式：包含任务列表和统计数据
+                    tasks = loaded_data.get("tasks", {})
+                    timer = loaded_data.get("timer")
+                    self._generation = loaded_data.get("generation", 0)
+                    if loaded_data.get("schema", 0) > SCHEMA_VERSION:
+                        print(f"数据文件来自更新的版本 (schema {loaded_data['schema']})，不认识的字段将原样保留")
+                    if "stats" in loaded_data:
+                        # 旧格式：统计历史保存在快照中，转换为按月分区的存储
+                        self._begin_stats_migration()
+                        self._import_legacy_stats(loaded_data["stats"])
+                        legacy_stats = True
+            except Exception as e:
+                print(f"加载数据失败: {e}")
+                tasks = {}
+                self.history.reset()
+        self._written_generation = self._generation
+
+        if not legacy_stats and os.path.exists(self.stats_file):
+            self._load_legacy_stats_file()
+        self._check_pending_segments()
+        return tasks, timer
+
+    def backup_file(self, index: int) -> str:
+        """第 index 份旧快照（1 为最近的一份）"""
+        return f"{self.data_file}.{index}"
+
+    def _read_snapshot(self):
+        """读取快照；快照损坏或丢失时依次尝试备份，都不可用时返回 None"""
+        candidates = [self.data_file] + [self.backup_file(i) for i in range(1, self.backups + 1)]
+        for path in candidates:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    loaded_data = codec.loads(f.read())
+            except Exception as e:
+                print(f"加载数据失败: {path}: {e}")
+                continue
+            if path != self.data_file:
+                print(f"已从备份恢复数据: {path}")
+                self._set_aside_damaged()
+            return loaded_data
+        if os.path.exists(self.data_file):
+            self._set_aside_damaged()
+        return None
+
+    def _set_aside_damaged(self):
+        """把损坏的快照和无法回放的日志改名为 .corrupt 保留，下一次保存写新快照，旧文件不会被覆盖"""
+        for path in (self.data_file, self.journal_file):
+            if os.path.exists(path):
+                try:
+                    os.replace(path, path + ".corrupt")
+                except Exception as e:
+                    print(f"保留损坏的数据文件失败: {e}")
+        self._needs_compact = True
+
+    def _begin_stats_migration(self):
+        """整体迁移旧版统计数据：忽略磁盘上已有的分段，下一次快照写入全部分区"""
+        self.history.reset(ignore_disk=True)
+        self._replace_segments = True
+        self._needs_compact = True
+
+    def _import_legacy_stats(self, stats: Dict[str, List[Dict]]):
+        """把旧格式的统计数据 {日期: [记录]} 导入按月分区的存储"""
+        for date, entries in stats.items():
+            for entry in entries:
+                self.history.append(date, entry["task"], entry["duration"],
+                                    parse_timestamp(entry.get("timestamp")), entry.get("task_id"))
+
+    def _load_legacy_stats_file(self):
+        """迁移旧版本的单个统计文件 (todo_data.stats)"""
+        try:
+            store, generation = StatsStore.load(self.stats_file)
+        except Exception as e:
+            print(f"加载统计数据失败: {e}")
+            self._needs_compact = True
+            return
+        if generation < self._generation:
+            # 已经迁移过（删除旧文件之前被中断），下一次快照时删除
+            self._needs_compact = True
+            return
+        self._begin_stats_migration()
+        for date in store.dates():
+            for task, duration, timestamp, task_id in store.rows(date):
+                self.history.append(date, task, duration, timestamp, task_id)
+        if generation == self._generation + 1:
+            # 统计文件已经写入而快照没有（压缩过程中被中断）：日志中的统计记录已包含在统计文件里
+            self._skip_journal_stats = True
+
+    def replay(self) -> Iterator[Dict]:
+        """日志中与当前快照代号一致的变更记录"""
+        if not os.path.exists(self.journal_file):
+            return
+        try:
+            with open(self.journal_file, 'rb') as f:
+                header = f.readline()
+                if not header:
+                    return
+                if codec.loads(header).get("generation") != self._generation:
+                    # 快照已经包含了这份日志（压缩过程中被中断），丢弃旧日志
+                    self._needs_compact = True
+                    return
+                for line in f:
+                    try:
+                        record = codec.loads(line)
+                    except ValueError:
+                        # 末尾的半行记录（写入时被中断），之后的追加必须从新快照开始
+                        self._needs_compact = True
+                        break
+                    yield record
+                    self._journal_count += 1
+        except Exception as e:
+            print(f"回放日志失败: {e}")
+            self._needs_compact = True
+
+    def _check_pending_segments(self):
+        """上一次写快照在写统计分段之后、写快照文件之前被中断时，下一次保存必须重写快照"""
+        if not os.path.exists(self.pending_file):
+            return
+        try:
+            with open(self.pending_file, 'rb') as f:
+                generation = codec.loads(f.read())["generation"]
+        except Exception:
+            generation = None
+        if generation is None or generation > self._generation:
+            self._needs_compact = True
+
+    def stat_saved(self, date: str) -> bool:
+        """日志中某天的统计记录是否已包含在统计分段中（写快照时在分段和快照之间被中断）"""
+        return self._skip_journal_stats or self.history.segment_generation(date[:7]) == self._generation + 1
+
+    # ========== 保存
+    @property
+    def needs_save(self) -> bool:
+        return self._needs_compact or self._write_failed
+
+    @property
+    def write_failed(self) -> bool:
+        return self._write_failed
+
+    def schedule_rewrite(self):
+        self._needs_compact = True
+
+    def begin_save(self):
+        if self._journal_unsynced and time.monotonic() - self._last_sync >= self.sync_interval:
+            # 空闲时不会再有追加带上这些记录，单独刷盘
+            self._writer.submit(self._sync_journal)
+        if self._write_failed:
+            # 之前的写入失败，日志可能不完整，改为重写完整快照（连同尚未确认写入的统计分段）
+            self._write_failed = False
+            self._needs_compact = True
+            self.history.unsave_failed(self._written_generation)
+            if self._replace_generation is not None and self._replace_generation > self._written_generation:
+                self._replace_segments = True
+        self.history.release(self._written_generation)
+
+    def save(self, records: List[Dict], tasks: Dict[str, List[Task]], timer: Optional[Dict]):
+        """追加日志；需要重写或日志过长时改为写新快照"""
+        if self._needs_compact or self._journal_count + len(records) >= self.compact_threshold:
+            self._submit_snapshot(tasks, timer)
+            return
+        new_journal = self._journal_count == 0
+        generation = self._generation
+        self._journal_count += len(records)
+        self._writer.submit(lambda: self._write_journal(generation, records, new_journal))
+
+    def flush(self) -> bool:
+        self._drain_journal()
+        self.history.release(self._written_generation)
+        return not self._write_failed
+
+    def close(self):
+        self._drain_journal()
+        self._writer.stop()
+        self._lock.release()
+
+    def _drain_journal(self):
+        """等待写盘线程完成已提交的写入，再让它把组提交中尚未刷盘的日志追加刷到磁盘
+
+        fsync 只在写盘线程中进行，调用方（界面线程）只等待；没有未刷盘的追加时不提交，也不会启动写盘线程。
+        """
+        self._writer.flush()
+        # 写盘线程已空闲，可以直接读取它维护的组提交状态
+        if self._journal_unsynced:
+            self._writer.submit(self._sync_journal)
+            self._writer.flush()
+
+    def _submit_snapshot(self, tasks: Dict[str, List[Task]], timer: Optional[Dict]):
+        """复制当前数据交给写盘线程写成新快照（交出的记录之后不再被修改）"""
+        self._generation += 1
+        snapshot = {
+            "schema": SCHEMA_VERSION,
+            "tasks": dump_tasks(tasks),
+            "timer": dict(timer) if timer else None,
+            "generation": self._generation
+        }
+        # 只复制有新记录的月份，列式数据的复制只是几次内存拷贝
+        segments = self.history.take_unsaved(self._generation)
+        replace_segments = self._replace_segments
+        if replace_segments:
+            self._replace_segments = False
+            self._replace_generation = self._generation
+        self._journal_count = 0
+        self._needs_compact = False
+        self._skip_journal_stats = False
+        self._writer.submit(lambda: self._write_snapshot(snapshot, segments, replace_segments))
+
+    def write_all(self, tasks: Dict[str, List[Task]], timer: Optional[Dict],
+                  partitions: Iterable[Tuple[str, StatsStore]]):
+        """逐月写入统计分段（不需要同时读入全部月份），再写快照"""
+        os.makedirs(self.history_dir, exist_ok=True)
+        generation = self._generation + 1
+        months = set()
+        for month, store in partitions:
+            store.save(os.path.join(self.history_dir, month + SEGMENT_SUFFIX), generation)
+            months.add(month)
+        for name in os.listdir(self.history_dir):
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)] not in months:
+                os.remove(os.path.join(self.history_dir, name))
+        snapshot = {"schema": SCHEMA_VERSION, "tasks": dump_tasks(tasks), "timer": timer, "generation": generation}
+        self._write_snapshot(snapshot, {}, False)
+        if self._write_failed:
+            raise OSError(f"写入 {self.data_file} 失败")
+
+    # ========== 写盘（在写盘线程中执行，只访问交给它的数据）
+    def _write_journal(self, generation: int, records: List[Dict], new_journal: bool):
+        """把变更记录追加到日志"""
+        if self._write_failed:
+            return  # 前面的记录没有写入，不在缺口之后继续追加，等待重写快照
+        try:
+            lines = b"".join(codec.dumps(record) + b"\n" for record in records)
+            if new_journal:
+                # 新日志：先写入代号头
+                lines = codec.dumps({"generation": generation}) + b"\n" + lines
+                self._journal_created = True
+            with open(self.journal_file, 'wb' if new_journal else 'ab') as f:
+                f.write(lines)
+                f.flush()
+                self._journal_unsynced = True
+                if time.monotonic() - self._last_sync >= self.sync_interval:
+                    os.fsync(f.fileno())
+                    self._journal_synced()
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            self._write_failed = True
+
+    def _sync_journal(self):
+        """把日志中尚未刷盘的追加刷到磁盘（组提交）"""
+        if not self._journal_unsynced or self._write_failed:
+            return
+        try:
+            fsync_file(self.journal_file)
+            self._journal_synced()
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            self._write_failed = True
+
+    def _journal_synced(self):
+        if self._journal_created:
+            fsync_directory(os.path.dirname(self.journal_file))
+            self._journal_created = False
+        self._journal_unsynced = False
+        self._last_sync = time.monotonic()
+
+    def _keep_backup(self):
+        """把当前快照保留为 .1，更早的备份依次后移，超出份数的删除"""
+        if self.backups <= 0 or not os.path.exists(self.data_file):
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(self.backup_file(index)):
+                os.replace(self.backup_file(index), self.backup_file(index + 1))
+        backup = self.backup_file(1)
+        if os.path.exists(backup):
+            os.remove(backup)
+        try:
+            os.link(self.data_file, backup)
+        except OSError:
+            shutil.copy2(self.data_file, backup)  # 不支持硬链接的文件系统
+
+    def _write_snapshot(self, snapshot: Dict, segments: Dict[str, StatsStore], replace_segments: bool):
+        """写入快照：先写统计分段，再写快照，最后删除旧日志；文件都是先写临时文件再原子替换
+
+        replace_segments 为 True 时（整体迁移旧数据）segments 是全部分区，删除其他月份的分段文件。
+        """
+        generation = snapshot["generation"]
+        try:
+            os.makedirs(self.history_dir, exist_ok=True)
+            if segments:
+                manifest = {"generation": generation, "months": sorted(segments)}
+                atomic_write(self.pending_file, codec.dumps(manifest))
+            for month, store in segments.items():
+                store.save(os.path.join(self.history_dir, month + SEGMENT_SUFFIX), generation)
+            if replace_segments:
+                for name in os.listdir(self.history_dir):
+                    if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)] not in segments:
+                        os.remove(os.path.join(self.history_dir, name))
+            # 旧版统计文件已迁移到分段中，先于快照删除，避免与新快照一起被再次迁移
+            if os.path.exists(self.stats_file):
+                os.remove(self.stats_file)
+            atomic_write(self.data_file, codec.dumps(snapshot, self.pretty), before_replace=self._keep_backup)
+            # 快照写入后，旧日志的代号不再匹配，即使删除失败也不会被重复回放
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._journal_unsynced = False
+            self._journal_created = False
+            if os.path.exists(self.pending_file):
+                os.remove(self.pending_file)
+            self._written_generation = generation
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            self._write_failed = True
+
+
+def open_backend(data_file: str, compact_threshold: int = COMPACT_THRESHOLD,
+                 sync_interval: float = SYNC_INTERVAL) -> StorageBackend:
+    """按数据文件的扩展名选择存储后端"""
+    if os.path.splitext(data_file)[1].lower() in SQLITE_SUFFIXES:
+        from storage_sqlite import SqliteBackend
+        return SqliteBackend(data_file, full_sync=sync_interval == 0)
+    return JsonBackend(data_file, compact_threshold, sync_interval)
+
+
+def migrate(source: str, target: str) -> Tuple[int, int]:
+    """把 source 中的全部数据写入新的 target（两者的后端可以不同），返回 (任务数, 统计记录数)"""
+    from data_manager import DataManager
+
+    if os.path.exists(target):
+        raise FileExistsError(f"目标文件已存在: {target}")
+    src = DataManager(source)
+    dst = open_backend(target)
+    stat_count = 0
+
+    def partitions() -> Iterator[Tuple[str, StatsStore]]:
+        # 逐月交给目标后端，读过的月份由 LRU 淘汰，内存占用与历史长短无关
+        nonlocal stat_count
+        for month in months:
+            store = src.history.partition(month)
+            stat_count += len(store)
+            yield month, store
+
+    months = src.history.months()
+    task_count = sum(len(tasks) for tasks in src.data.values())
+    try:
+        dst.load()
+        dst.write_all(src.data, src.timer, partitions())
+    finally:
+        dst.close()
+        src.backend.close()  # 不保存：源数据保持原样
+    # 重新打开目标，确认任务和统计月份都已写入
+    check = DataManager(target)
+    try:
+        if sum(len(tasks) for tasks in check.data.values()) != task_count or check.history.months() != months:
+            raise RuntimeError(f"迁移后的数据与 {source} 不一致")
+    finally:
+        check.close()
+    return task_count, stat_count
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] != "migrate":
+        print(__doc__)
+        return 1
+    try:
+        task_count, stat_count = migrate(argv[1], argv[2])
+    except Exception as e:
+        print(f"迁移失败: {e}")
+        return 1
+    print(f"已迁移到 {argv[2]}: {task_count} 个任务，{stat_count} 条统计记录")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+"""SQLite 存储后端
+
+全部数据保存在一个 SQLite 数据库文件中（WAL 模式，写盘线程写入的同时主线程和报告线程可以读取）：
+- lists：列表名和顺序
+- tasks：每个任务一行（按 id 唯一），text / checked / total_elapsed 为列，其余字段以 JSON 保存在 extra 中；
+  按 (list, position) 建索引
+- stats：每条统计记录一行 (日期, 任务名, 秒数, 开始时间戳, 任务 id)；
+  按 (date, task, duration) 建覆盖索引，区间聚合只读索引，另有按任务名、任务 id 的索引
+  （迁移等整体写入时先删除索引，插入完再重建）
+- meta：结构版本、计时状态
+
+每次保存是一个事务：变更记录逐条转换为单行的 UPSERT / UPDATE / DELETE，统计记录逐行插入，
+提交的开销与变更量成正比，不需要日志和快照压缩。
+写入失败时（事务回滚）下一次保存改为重写全部任务，以及尚未确认写入的月份的统计记录。
+
+统计历史仍按月读入内存（SqliteHistory，与 JSON 后端相同的 LRU 分区）；
+周 / 月 / 日统计在涉及的月份都已写入数据库、且不全在内存中时，直接用 GROUP BY 聚合。
+"""
+import json
+import sqlite3
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from models import Task, dump_tasks
+from stats_store import StatsHistory, StatsStore, day_pieces, parse_timestamp
+from storage import DataFileLock, PersistWriter, StorageBackend
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS lists (name TEXT PRIMARY KEY, position INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    list TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT,
+    checked INTEGER,
+    total_elapsed REAL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS tasks_by_list ON tasks (list, position);
+CREATE TABLE IF NOT EXISTS stats (
+    date TEXT NOT NULL,
+    task TEXT NOT NULL,
+    duration REAL NOT NULL,
+    start REAL NOT NULL DEFAULT 0,
+    task_id TEXT
+);
+"""
+
+# stats 表的索引（整体写入时先删除，插入完再重建，比逐行维护索引快得多）
+_STATS_INDEXES = {
+    "stats_by_date": "stats (date, task, duration)",
+    "stats_by_task": "stats (task, date)",
+    "stats_by_task_id": "stats (task_id)",
+}
+
+# tasks 表中单独成列的任务字段，其余字段保存在 extra 中
+_TASK_COLUMNS = ("text", "checked", "total_elapsed")
+
+_ENSURE_LIST = ("INSERT INTO lists (name, position) VALUES (?, (SELECT COALESCE(MAX(position) + 1, 0) FROM lists)) "
+                "ON CONFLICT (name) DO NOTHING")
+_UPSERT_TASK = ("INSERT INTO tasks (id, list, position, text, checked, total_elapsed, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET list = excluded.list, position = excluded.position, "
+                "text = excluded.text, checked = excluded.checked, total_elapsed = excluded.total_elapsed, "
+                "extra = excluded.extra")
+_NEXT_POSITION = "SELECT COALESCE(MAX(position) + 1, 0) FROM tasks WHERE list = ?"
+_INSERT_STAT = "INSERT INTO stats (date, task, duration, start, task_id) VALUES (?, ?, ?, ?, ?)"
+_DROP_ORPHAN_TIMER = ("DELETE FROM meta WHERE key = 'timer' "
+                      "AND json_extract(value, '$.id') NOT IN (SELECT id FROM tasks)")
+
+
+def connect(path: str, read_only: bool = False, full_sync: bool = False) -> sqlite3.Connection:
+    """打开数据库（WAL 模式）；read_only 时以只读方式打开，供报告线程读取"""
+    if read_only:
+        return sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    # 连接可能在后台加载线程中打开、之后交给主线程使用（同一时刻只有一个线程使用）
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    # WAL 模式下 NORMAL 不会损坏数据库，只有断电时可能丢失最近的几次提交（相当于组提交）；
+    # full_sync 时每次提交都刷盘
+    conn.execute(f"PRAGMA synchronous = {'FULL' if full_sync else 'NORMAL'}")
+    return conn
+
+
+def _month_range(month: str) -> Tuple[str, str]:
+    """某个月 (YYYY-MM) 所有日期都落在其中的比较区间"""
+    return month + "-00", month + "-99"
+
+
+def _months_between(first: str, last: str) -> Iterator[str]:
+    """日期 first ~ last 涉及的月份"""
+    year, month = int(first[:4]), int(first[5:7])
+    while f"{year:04d}-{month:02d}" <= last[:7]:
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def read_month(conn: sqlite3.Connection, month: str) -> StatsStore:
+    """读入某个月的统计记录（同一天内保持写入顺序）"""
+    store = StatsStore()
+    rows = conn.execute("SELECT date, task, duration, start, task_id FROM stats WHERE date BETWEEN ? AND ? "
+                        "ORDER BY date, rowid", _month_range(month))
+    for date, task, duration, start, task_id in rows:
+        store.append(date, task, duration, start, task_id)
+    return store
+
+
+def _read_month_from(path: str, month: str) -> StatsStore:
+    """在其他线程中用只读连接读入某个月的统计记录"""
+    conn = connect(path, read_only=True)
+    try:
+        return read_month(conn, month)
+    finally:
+        conn.close()
+
+
+def _task_row(list_name: str, position: int, task: Dict) -> Tuple:
+    """任务 → tasks 表的一行"""
+    extra = {key: value for key, value in task.items() if key not in _TASK_COLUMNS and key != "id"}
+    checked = task.get("checked")
+    return (task["id"], list_name, position, task.get("text"), None if checked is None else int(checked),
+            task.get("total_elapsed"), json.dumps(extra, ensure_ascii=False))
+
+
+def _task_from_row(task_id: str, text, checked, total_elapsed, extra: str) -> Dict:
+    """tasks 表的一行 → 任务（NULL 的列表示没有该字段）"""
+    task: Dict = {}
+    if text is not None:
+        task["text"] = text
+    if checked is not None:
+        task["checked"] = bool(checked)
+    if total_elapsed is not None:
+        task["total_elapsed"] = total_elapsed
+    task.update(json.loads(extra))
+    task["id"] = task_id
+    return task
+
+
+class SqliteHistory(StatsHistory):
+    """从数据库按月读入的统计历史"""
+
+    def __init__(self, data_file: str, connection: Callable[[], sqlite3.Connection]):
+        super().__init__(data_file)
+        self.data_file = data_file
+        self._connection = connection  # 主线程的连接
+
+    def _scan_months(self) -> Set[str]:
+        # 沿日期索引逐月跳跃：每个月一次索引查找，与记录数无关
+        conn = self._connection()
+        months = set()
+        date = conn.execute("SELECT MIN(date) FROM stats").fetchone()[0]
+        while date is not None:
+            month = date[:7]
+            months.add(month)
+            date = conn.execute("SELECT MIN(date) FROM stats WHERE date > ?", (_month_range(month)[1],)).fetchone()[0]
+        return months
+
+    def _load(self, month: str) -> Tuple[StatsStore, int]:
+        return read_month(self._connection(), month), 0
+
+    def _set_aside_damaged(self, month: str, error: Exception):
+        # 统计记录在数据库中，没有可以单独保留的文件：读取失败直接报告给调用方
+        raise error
+
+    def _source(self, month: str) -> Callable[[], StatsStore]:
+        return partial(_read_month_from, self.data_file, month)
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite 存储：主线程的连接用于读取，写盘线程有自己的连接"""
+
+    def __init__(self, data_file: str, full_sync: bool = False):
+        self.data_file = data_file
+        self.full_sync = full_sync
+        self.history = SqliteHistory(data_file, self._connection)
+        self._lock = DataFileLock(data_file)
+        self._writer = PersistWriter()
+        self._conn: Optional[sqlite3.Connection] = None  # 主线程的连接
+        self._writer_conn: Optional[sqlite3.Connection] = None  # 写盘线程的连接（在写盘线程中打开）
+        self._sequence = 0  # 已提交的写入批次
+        self._written_sequence = 0  # 已确认写入的批次（由写盘线程更新）
+        self._needs_rewrite = False  # 下一次保存是否重写全部任务和未确认的统计
+        self._write_failed = False  # 写盘线程报告的失败，由主线程在下一次保存时处理
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.data_file, full_sync=self.full_sync)
+            self._conn.executescript(_SCHEMA)
+            for name, columns in _STATS_INDEXES.items():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+            with self._conn:
+                self._conn.execute("INSERT INTO meta (key, value) VALUES ('schema_version', ?) "
+                                   "ON CONFLICT (key) DO NOTHING", (str(SCHEMA_VERSION),))
+        return self._conn
+
+    # ========== 加载
+    def load(self) -> Tuple[Dict[str, List[Dict]], Optional[Dict]]:
+        self._lock.acquire()
+        self._writer.flush()
+        self._write_failed = False
+        self._needs_rewrite = False
+        self._written_sequence = self._sequence
+        self.history.reset()
+        tasks: Dict[str, List[Dict]] = {}
+        timer = None
+        try:
+            conn = self._connection()
+            for (name,) in conn.execute("SELECT name FROM lists ORDER BY position"):
+                tasks[name] = []
+            rows = conn.execute("SELECT list, id, text, checked, total_elapsed, extra FROM tasks "
+                                "ORDER BY list, position")
+            for list_name, *row in rows:
+                tasks.setdefault(list_name, []).append(_task_from_row(*row))
+            row = conn.execute("SELECT value FROM meta WHERE key = 'timer'").fetchone()
+            timer = json.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"加载数据失败: {e}")
+            tasks, timer = {}, None
+        return tasks, timer
+
+    # ========== 保存
+    @property
+    def needs_save(self) -> bool:
+        return self._needs_rewrite or self._write_failed
+
+    @property
+    def write_failed(self) -> bool:
+        return self._write_failed
+
+    def schedule_rewrite(self):
+        self._needs_rewrite = True
+
+    def begin_save(self):
+        if self._write_failed:
+            # 失败的事务已回滚，之后的批次也没有写入：重写全部任务，以及尚未确认写入的月份
+            self._write_failed = False
+            self._needs_rewrite = True
+            self.history.unsave_failed(self._written_sequence)
+        self.history.release(self._written_sequence)
+
+    def save(self, records: List[Dict], tasks: Dict[str, List[Task]], timer: Optional[Dict]):
+        self._sequence += 1
+        sequence = self._sequence
+        if self._needs_rewrite:
+            self._needs_rewrite = False
+            rows = dump_tasks(tasks)
+            timer = dict(timer) if timer else None
+            months = self.history.take_unsaved(sequence)
+            self._writer.submit(lambda: self._write_full(sequence, rows, timer, months))
+            return
+        self.history.mark_saving(sequence)
+        self._writer.submit(lambda: self._write_records(sequence, records))
+
+    def flush(self) -> bool:
+        self._writer.flush()
+        self.history.release(self._written_sequence)
+        return not self._write_failed
+
+    def close(self):
+        self._writer.submit(self._close_writer_connection)
+        self._writer.stop()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._lock.release()
+
+    def totals_by_task(self, first: str, last: str) -> Optional[Dict[str, float]]:
+        """涉及的月份都已写入数据库、且不全在内存中时，用 GROUP BY 聚合"""
+        months = list(_months_between(first, last))
+        if any(self.history.has_unsaved(month) for month in months):
+            return None
+        if all(self.history.is_resident(month) for month in months):
+            return None
+        rows = self._connection().execute(
+            "SELECT task, SUM(duration) FROM stats WHERE date BETWEEN ? AND ? GROUP BY task", (first, last))
+        return dict(rows)
+
+    def write_all(self, tasks: Dict[str, List[Task]], timer: Optional[Dict],
+                  partitions: Iterable[Tuple[str, StatsStore]]):
+        """一个事务写入全部数据：统计记录逐月插入，插入完再建索引"""
+        conn = self._connection()
+        with conn:
+            for name in _STATS_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+            conn.execute("DELETE FROM stats")
+            self._write_tasks(conn, dump_tasks(tasks), timer)
+            for _, store in partitions:
+                self._insert_store(conn, store)
+            for name, columns in _STATS_INDEXES.items():
+                conn.execute(f"CREATE INDEX {name} ON {columns}")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # ========== 写盘（在写盘线程中执行，只访问交给它的数据）
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._writer_conn is None:
+            self._writer_conn = connect(self.data_file, full_sync=self.full_sync)
+        return self._writer_conn
+
+    def _close_writer_connection(self):
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
+
+    def _write_records(self, sequence: int, records: List[Dict]):
+        """一个事务写入一批变更记录"""
+        if self._write_failed:
+            return  # 前面的批次没有写入，等待重写
+        try:
+            conn = self._writer_connection()
+            with conn:
+                for record in records:
+                    self._apply_record(conn, record)
+            self._written_sequence = sequence
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            self._write_failed = True
+
+    def _write_full(self, sequence: int, tasks: Dict[str, List[Dict]], timer: Optional[Dict],
+                    months: Dict[str, StatsStore]):
+        """一个事务重写全部任务和计时状态，以及 months 中各月的统计记录，然后合并 WAL"""
+        try:
+            conn = self._writer_connection()
+            with conn:
+                self._write_tasks(conn, tasks, timer)
+                for month, store in months.items():
+                    conn.execute("DELETE FROM stats WHERE date BETWEEN ? AND ?", _month_range(month))
+                    self._insert_store(conn, store)
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._written_sequence = sequence
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            self._write_failed = True
+
+    @staticmethod
+    def _write_tasks(conn: sqlite3.Connection, tasks: Dict[str, List[Dict]], timer: Optional[Dict]):
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM lists")
+        conn.executemany("INSERT INTO lists (name, position) VALUES (?, ?)",
+                         ((name, position) for position, name in enumerate(tasks)))
+        conn.executemany(_UPSERT_TASK, (_task_row(name, position, task)
+                                        for name, items in tasks.items() for position, task in enumerate(items)))
+        if timer:
+            conn.execute("INSERT INTO meta (key, value) VALUES ('timer', ?) "
+                         "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (json.dumps(timer),))
+        else:
+            conn.execute("DELETE FROM meta WHERE key = 'timer'")
+
+    @staticmethod
+    def _insert_store(conn: sqlite3.Connection, store: StatsStore):
+        conn.executemany(_INSERT_STAT, ((date, task, duration, start, task_id)
+                                        for date in store.dates() for task, duration, start, task_id in store.rows(date)))
+
+    @staticmethod
+    def _apply_record(conn: sqlite3.Connection, record: Dict):
+        """把一条变更记录转换为 SQL（与 DataManager._apply 对内存数据的修改一一对应）"""
+        op = record["op"]
+        if op == "add_list":
+            conn.execute(_ENSURE_LIST, (record["list"],))
+        elif op == "rename_list":
+            # 与内存中一致：重命名后的列表排到最后，同名的列表被替换
+            old, new = record["old"], record["new"]
+            conn.execute("DELETE FROM tasks WHERE list = ?", (new,))
+            conn.execute("DELETE FROM lists WHERE name = ?", (new,))
+            conn.execute("UPDATE lists SET name = ?, position = (SELECT MAX(position) + 1 FROM lists) WHERE name = ?",
+                         (new, old))
+            conn.execute("UPDATE tasks SET list = ? WHERE list = ?", (new, old))
+        elif op == "delete_list":
+            conn.execute("DELETE FROM tasks WHERE list = ?", (record["list"],))
+            conn.execute("DELETE FROM lists WHERE name = ?", (record["list"],))
+            conn.execute(_DROP_ORPHAN_TIMER)
+        elif op == "set_list":
+            conn.execute(_ENSURE_LIST, (record["list"],))
+            conn.execute("DELETE FROM tasks WHERE list = ?", (record["list"],))
+            conn.executemany(_UPSERT_TASK, (_task_row(record["list"], position, task)
+                                            for position, task in enumerate(record["tasks"])))
+            conn.execute(_DROP_ORPHAN_TIMER)
+        elif op == "add_task":
+            conn.execute(_ENSURE_LIST, (record["list"],))
+            position = conn.execute(_NEXT_POSITION, (record["list"],)).fetchone()[0]
+            conn.execute(_UPSERT_TASK, _task_row(record["list"], position, record["task"]))
+        elif op == "update_task":
+            fields = record["fields"]
+            assignments, params = [], []
+            for column in _TASK_COLUMNS:
+                if column in fields:
+                    value = fields[column]
+                    assignments.append(f"{column} = ?")
+                    params.append(int(value) if column == "checked" and value is not None else value)
+            extra = {key: value for key, value in fields.items() if key not in _TASK_COLUMNS}
+            if extra:
+                assignments.append("extra = json_patch(extra, ?)")
+                params.append(json.dumps(extra, ensure_ascii=False))
+            if assignments:
+                conn.execute(f"UPDATE tasks SET {', '.join(assignments)} WHERE id = ?", (*params, record["id"]))
+        elif op == "remove_task":
+            conn.execute("DELETE FROM tasks WHERE id = ?", (record["id"],))
+            conn.execute(_DROP_ORPHAN_TIMER)
+        elif op == "start_timer":
+            timer = {"id": record["id"], "start": record["start"], "base": record["base"]}
+            conn.execute("INSERT INTO meta (key, value) VALUES ('timer', ?) "
+                         "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (json.dumps(timer),))
+        elif op == "stop_timer":
+            conn.execute("DELETE FROM meta WHERE key = 'timer'")
+        elif op == "stat":
+            entry = record["entry"]
+            conn.execute(_INSERT_STAT, (record["date"], entry["task"], entry["duration"],
+                                        parse_timestamp(entry.get("timestamp")), entry.get("task_id")))
+        elif op == "session":
+            conn.executemany(_INSERT_STAT, ((date, record["task"], seconds, start, record["id"])
+                                            for date, start, seconds in day_pieces(record["start"], record["end"])))
@@ -2,7 +2,7 @@
 from PySide6 import QtWidgets, QtCore
 
 from utils import create_notebook_icon
-from time_rings import FloatingTimeRings
+from time_rings import FloatingTimeRings, REFRESH_POWER_SAVER, REFRESH_SMOOTH
 
 
 class SystemTray:
@@ -12,6 +12,7 @@ class SystemTray:
         self.main_window = main_window
         self.tray_icon = QtWidgets.QSystemTrayIcon(main_window)
         self.floating_rings = None  # 悬浮时间圆环组件
+        self.ring_refresh_mode = REFRESH_SMOOTH  # 时间圆环的刷新策略
         self._setup_tray()
 
     def _setup_tray(self):
@@ -28,6 +29,16 @@ class SystemTray:
         # toggle_floating_action = tray_menu.addAction("切换悬浮圆环")
         # toggle_floating_action.triggered.connect(self._toggle_floating_rings)
         
+        tray_menu.addSeparator()
+
+        # 时间圆环刷新策略：流畅 / 省电，并显示实际刷新率
+        power_saver_action = tray_menu.addAction("圆环省电模式")
+        power_saver_action.setCheckable(True)
+        power_saver_action.toggled.connect(self._set_ring_power_saver)
+        self.ring_rate_action = tray_menu.addAction("")
+        self.ring_rate_action.setEnabled(False)
+        tray_menu.aboutToShow.connect(self._update_ring_rate)
+
         tray_menu.addSeparator()
         
         quit_action = tray_menu.addAction("退出程序")
@@ -53,6 +64,7 @@ class SystemTray:
         if not self.floating_rings:
             # 创建悬浮圆环
             self.floating_rings = FloatingTimeRings()
+            self.floating_rings.ring_widget.set_refresh_mode(self.ring_refresh_mode)
             self.floating_rings.show()
         else:
             if self.floating_rings.isVisible():
@@ -62,6 +74,26 @@ class SystemTray:
                 # 确保不遮挡其他窗口
                 self.floating_rings.raise_()
 
+    def _ring_widgets(self):
+        """所有已创建的时间圆环组件（主窗口的圆环在数据加载后才创建）"""
+        widgets = []
+        if self.main_window.time_ring_widget is not None:
+            widgets.append(self.main_window.time_ring_widget)
+        if self.floating_rings:
+            widgets.append(self.floating_rings.ring_widget)
+        return widgets
+
+    def _set_ring_power_saver(self, enabled: bool):
+        """切换时间圆环的省电模式"""
+        self.ring_refresh_mode = REFRESH_POWER_SAVER if enabled else REFRESH_SMOOTH
+        for widget in self._ring_widgets():
+            widget.set_refresh_mode(self.ring_refresh_mode)
+
+    def _update_ring_rate(self):
+        """在托盘菜单中显示时间圆环的实际刷新率（只统计可见的圆环）"""
+        rate = sum(widget.repaint_rate for widget in self._ring_widgets() if widget.isVisible())
+        self.ring_rate_action.setText(f"圆环刷新: {rate:.1f} 次/秒")
+
     def _hide_window(self):
         """隐藏主窗口到托盘"""
         self.main_window.hide()
@@ -1,47 +1,128 @@
 from PySide6.QtWidgets import QWidget, QLabel
-from PySide6.QtCore import QTimer, QRectF, Qt, QPoint
-from PySide6.QtGui import QPainter, QPen, QColor, QFont, QMouseEvent
+from PySide6.QtCore import QRectF, Qt, QPoint, QTimer
+from PySide6.QtGui import QPainter, QPen, QColor, QFont, QMouseEvent, QPixmap
+from collections import deque
 import datetime
 import calendar
+import math
+import time
+
+from frame_clock import frame_clock
+
+# 刷新策略：流畅模式按 drawArc 的最小角度（1/16 度）刷新，省电模式只在弧端移动满一个像素时刷新
+REFRESH_SMOOTH = "smooth"
+REFRESH_POWER_SAVER = "power_saver"
+# 两次重绘之间的最短间隔（毫秒）
+MIN_REFRESH_DELAY = 16
+# 统计实际刷新率时保留的最近重绘次数
+RATE_WINDOW = 32
+
+# 四个环：(标签, 颜色)，按 2x2 排列
+RINGS = [
+    ("YEAR", QColor(255, 85, 85)),
+    ("MONTH", QColor(85, 170, 255)),
+    ("DAY", QColor(85, 255, 150)),
+    ("HOUR", QColor(255, 200, 85)),
+]
+
+
+def _seconds_until_step(ratio, period, step):
+    """进度为 ratio、一圈用时 period 秒的环，弧端走到下一个 step 度整数倍还需要的秒数"""
+    degrees = ratio * 360
+    return ((math.floor(degrees / step) + 1) * step - degrees) / 360 * period
+
 
 class TimeRingWidget(QWidget):
+    """时间圆环 - 分层绘制
+
+    - 静态层：轨道和分类标签，按尺寸和工作模式缓存为 QPixmap
+    - 慢变层：YEAR / MONTH / DAY 的进度弧和中心信息，弧度的整数度数或文字变化时才重绘
+    - 只有 HOUR 环在每一帧实时绘制
+
+    刷新不使用固定帧率：每次绘制后计算下一次画面真正会变化的时刻
+    （秒数文字跳变、弧端移动一个刷新步长），用单次定时器在那一刻重绘。
+    定时器到点时如果圆环看不见（控件隐藏、所在窗口最小化或未露出）就不再重绘，定时链停止，
+    窗口重新露出时的绘制事件会恢复刷新。被其他窗口完全遮挡是否算未露出取决于平台，不报告遮挡的平台上照常刷新。
+    帧时钟节流时（主窗口隐藏或最小化，例如只剩悬浮圆环）只在秒数跳变时重绘，即 1Hz。
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumSize(350, 350) 
         self.working_mode = True  # 默认为工作模式
+        self._layout_key = None  # (宽, 高, 设备像素比, 工作模式)
+        self._geometry = []  # 每个环的 (中心x, 中心y, 绘制矩形)
+        self._static_layer = None
+        self._slow_layer = None
+        self._slow_key = None  # 慢变层内容：各环的整数度数和中心信息
+        self.refresh_mode = REFRESH_SMOOTH
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        # 需要在画面变化的时刻准时触发，粗粒度定时器的提前量会导致多余的重绘
+        self._refresh_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._refresh_timer.timeout.connect(self._refresh)
+        self._paint_times = deque(maxlen=RATE_WINDOW)  # 最近几次重绘的时间
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(50) 
+    def _is_exposed(self) -> bool:
+        """圆环是否真的显示在屏幕上：控件可见，所在窗口未最小化且已露出"""
+        if not self.isVisible():
+            return False
+        window = self.window()
+        if window.isMinimized():
+            return False
+        handle = window.windowHandle()
+        return handle is not None and handle.isExposed()
+
+    def _refresh(self):
+        """定时器到点：看不见时不重绘，定时链就此停止"""
+        if self._is_exposed():
+            self.update()
+        else:
+            self._paint_times.clear()
+
+    def showEvent(self, event):
+        """显示后由绘制事件重新启动刷新"""
+        self.update()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """隐藏后（包括主窗口收到托盘）不再重绘"""
+        self._refresh_timer.stop()
+        self._paint_times.clear()
+        super().hideEvent(event)
+
+    def set_refresh_mode(self, mode):
+        """设置刷新策略：REFRESH_SMOOTH 或 REFRESH_POWER_SAVER"""
+        self.refresh_mode = mode
+        self._paint_times.clear()
+        self.update()
+
+    @property
+    def repaint_rate(self) -> float:
+        """最近一段时间实际达到的重绘频率（次/秒）"""
+        if len(self._paint_times) < 2:
+            return 0.0
+        span = self._paint_times[-1] - self._paint_times[0]
+        return (len(self._paint_times) - 1) / span if span > 0 else 0.0
 
     def set_working_mode(self, is_working):
         """设置工作模式状态"""
         self.working_mode = is_working
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-        now = datetime.datetime.now()
-        
-        # --- 进度计算 (保持平滑旋转) ---
-        days_in_mo = calendar.monthrange(now.year, now.month)[1]
-        days_in_yr = 366 if calendar.isleap(now.year) else 365
-        
-        sec_ratio = (now.second + now.microsecond / 1_000_000) / 60
-        min_ratio = (now.minute + sec_ratio) / 60
-        hour_ratio = (now.hour + min_ratio) / 24
-        day_ratio = (now.day - 1 + hour_ratio) / days_in_mo
-        year_ratio = (now.timetuple().tm_yday - 1 + hour_ratio) / days_in_yr
+    def invalidate_layers(self):
+        """丢弃缓存的图层，下一帧全部重绘"""
+        self._layout_key = None
+        self._slow_key = None
 
-        # 定义四个环的信息：(标签, 进度, 颜色, 中心显示的准确信息)
-        rings = [
-            ("YEAR", year_ratio, QColor(255, 85, 85), now.strftime("%Y")),
-            ("MONTH", day_ratio, QColor(85, 170, 255), now.strftime("%b %d")),
-            ("DAY", hour_ratio, QColor(85, 255, 150), now.strftime("%A")),
-            ("HOUR", min_ratio, QColor(255, 200, 85), now.strftime("%H:%M:%S")),
-        ]
+    # ========== 布局与图层缓存
+    def _ensure_layout(self):
+        """尺寸或工作模式变化时重新计算布局、字体、颜色，并重绘静态层"""
+        key = (self.width(), self.height(), self.devicePixelRatioF(), self.working_mode)
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        self._slow_key = None
 
         # --- 2x2 矩阵动态布局 ---
         w = self.width() / 2
@@ -50,56 +131,137 @@ class TimeRingWidget(QWidget):
         # 放大圆环：利用象限最小边的 95%
         cell_size = min(w, h)
         radius = (cell_size * 0.95) / 2 
-        thickness = radius * 0.15  # 调整线条粗细比例
+        self._thickness = radius * 0.15  # 调整线条粗细比例
         
         # 减小圆环绘制区域，防止贴边过紧
-        draw_radius = radius - (thickness / 2) - 5
+        self._draw_radius = radius - (self._thickness / 2) - 5
 
-        for i, (label, ratio, color, info_text) in enumerate(rings):
-            col = i % 2
-            row = i // 2
-            cx = col * w + w / 2
-            cy = row * h + h / 2
-            
-            rect = QRectF(cx - draw_radius, cy - draw_radius, draw_radius * 2, draw_radius * 2)
+        self._geometry = []
+        for i in range(len(RINGS)):
+            cx = (i % 2) * w + w / 2
+            cy = (i // 2) * h + h / 2
+            rect = QRectF(cx - self._draw_radius, cy - self._draw_radius, self._draw_radius * 2, self._draw_radius * 2)
+            self._geometry.append((cx, cy, rect))
 
-            # 根据工作模式决定颜色
+        # 根据工作模式决定颜色
+        self._colors = []
+        for _, color in RINGS:
             if not self.working_mode:
                 # 非工作模式：转换为灰度
                 gray_value = int(0.299 * color.red() + 0.587 * color.green() + 0.114 * color.blue())
                 color = QColor(gray_value, gray_value, gray_value)
-            
+            self._colors.append(color)
+
+        # 缩小字体设定
+        # info_font 对应中间的准确日期/时间，label_font 对应下方的分类标签
+        self._info_font = QFont("Segoe UI", max(1, int(self._draw_radius * 0.22)), QFont.Weight.DemiBold)
+        self._label_font = QFont(self._info_font)
+        self._label_font.setPointSize(max(1, int(self._draw_radius * 0.14)))
+        self._label_font.setBold(False)
+        self._label_font.setLetterSpacing(QFont.SpacingType.AbsoluteSpacing, 2) # 增加字母间距提升质感
+
+        self._static_layer = self._new_layer()
+        painter = QPainter(self._static_layer)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for i, (label, _) in enumerate(RINGS):
+            cx, cy, rect = self._geometry[i]
             # 1. 绘制底色轨道
-            bg_color = QColor(color)
+            bg_color = QColor(self._colors[i])
             if not self.working_mode:
                 bg_color.setAlpha(15)  # 非工作模式更淡
             else:
                 bg_color.setAlpha(30)
-            pen = QPen(bg_color, thickness)
+            pen = QPen(bg_color, self._thickness)
             pen.setCapStyle(Qt.PenCapStyle.RoundCap)
             painter.setPen(pen)
             painter.drawEllipse(rect)
+            # 2. 绘制分类标签 (如 "MONTH")
+            self.draw_label(painter, cx, cy, self._draw_radius, label)
+        painter.end()
 
-            # 2. 绘制进度圆环
-            pen = QPen(color, thickness)
-            pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-            painter.setPen(pen)
-            span_angle = -int(ratio * 360 * 16)
-            painter.drawArc(rect, 90 * 16, span_angle)
+    def _new_layer(self) -> QPixmap:
+        """创建与控件同尺寸的透明图层"""
+        ratio = self.devicePixelRatioF()
+        layer = QPixmap(max(1, round(self.width() * ratio)), max(1, round(self.height() * ratio)))
+        layer.setDevicePixelRatio(ratio)
+        layer.fill(Qt.GlobalColor.transparent)
+        return layer
 
-            # 3. 绘制中心准确信息 (替换了百分比)
-            self.draw_center_info(painter, cx, cy, draw_radius, label, info_text)
+    def _draw_ring(self, painter, i, degrees, info_text):
+        """绘制一个环的进度弧和中心信息"""
+        cx, cy, rect = self._geometry[i]
+        pen = QPen(self._colors[i], self._thickness)
+        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        painter.setPen(pen)
+        painter.drawArc(rect, 90 * 16, -int(degrees * 16))
+        self.draw_center_info(painter, cx, cy, self._draw_radius, info_text)
 
-    def draw_center_info(self, painter, cx, cy, radius, label, info_text):
-        # 缩小字体设定
-        # info_size 对应中间的准确日期/时间
-        # label_size 对应下方的分类标签
-        info_size = int(radius * 0.22) 
-        label_size = int(radius * 0.14)
+    def paintEvent(self, event):
+        now = datetime.datetime.now()
+        
+        # --- 进度计算 (保持平滑旋转) ---
+        days_in_mo = calendar.monthrange(now.year, now.month)[1]
+        days_in_yr = 366 if calendar.isleap(now.year) else 365
         
-        # 绘制主信息 (如 "Oct 26" 或 "14:30")
-        font = QFont("Segoe UI", info_size, QFont.Weight.DemiBold)
-        painter.setFont(font)
+        sec_ratio = (now.second + now.microsecond / 1_000_000) / 60
+        min_ratio = (now.minute + sec_ratio) / 60
+        hour_ratio = (now.hour + min_ratio) / 24
+        day_ratio = (now.day - 1 + hour_ratio) / days_in_mo
+        year_ratio = (now.timetuple().tm_yday - 1 + hour_ratio) / days_in_yr
+
+        self._ensure_layout()
+
+        # 慢变层：(整数度数, 中心的准确信息)，内容不变时直接复用
+        slow_key = (
+            (int(year_ratio * 360), now.year),
+            (int(day_ratio * 360), now.month, now.day),
+            (int(hour_ratio * 360), now.weekday()),
+        )
+        if slow_key != self._slow_key:
+            self._slow_key = slow_key
+            self._slow_layer = self._new_layer()
+            layer_painter = QPainter(self._slow_layer)
+            layer_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            texts = (now.strftime("%Y"), now.strftime("%b %d"), now.strftime("%A"))
+            for i, text in enumerate(texts):
+                self._draw_ring(layer_painter, i, slow_key[i][0], text)
+            layer_painter.end()
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer)
+        painter.drawPixmap(0, 0, self._slow_layer)
+        # HOUR 环每帧实时绘制
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._draw_ring(painter, 3, min_ratio * 360, f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}")
+        painter.end()
+
+        self._paint_times.append(time.monotonic())
+        if not self._is_exposed():
+            return
+        if frame_clock().is_throttled:
+            # 与帧时钟一起节流：只在秒数文字跳变时重绘
+            delay = 1 - now.microsecond / 1_000_000
+        else:
+            # 下一次画面变化：秒数文字跳变，或任一环的弧端走过一个刷新步长
+            delay = min(
+                1 - now.microsecond / 1_000_000,
+                _seconds_until_step(min_ratio, 3600, self._arc_step()),
+                _seconds_until_step(hour_ratio, 86400, 1),
+                _seconds_until_step(day_ratio, days_in_mo * 86400, 1),
+                _seconds_until_step(year_ratio, days_in_yr * 86400, 1),
+            )
+        self._refresh_timer.start(max(MIN_REFRESH_DELAY, math.ceil(delay * 1000)))
+
+    def _arc_step(self) -> float:
+        """HOUR 环的刷新步长（度）"""
+        if self.refresh_mode == REFRESH_POWER_SAVER:
+            # 弧端在设备像素上移动一个像素所对应的角度
+            return max(1 / 16, math.degrees(1 / max(1.0, self._draw_radius * self.devicePixelRatioF())))
+        return 1 / 16
+
+    def draw_center_info(self, painter, cx, cy, radius, info_text):
+        """绘制中心的准确信息 (如 "Oct 26" 或 "14:30")"""
+        painter.setFont(self._info_font)
         
         # 根据工作模式决定文本颜色
         if self.working_mode:
@@ -110,12 +272,10 @@ class TimeRingWidget(QWidget):
         # 稍微上移一点点，为下方的标签留出空间
         painter.drawText(QRectF(cx - radius, cy - radius * 0.3, radius * 2, radius * 0.4), 
                          Qt.AlignmentFlag.AlignCenter, info_text)
-        
-        # 绘制分类标签 (如 "MONTH")
-        font.setPointSize(label_size)
-        font.setBold(False)
-        font.setLetterSpacing(QFont.SpacingType.AbsoluteSpacing, 2) # 增加字母间距提升质感
-        painter.setFont(font)
+
+    def draw_label(self, painter, cx, cy, radius, label):
+        """绘制分类标签 (如 "MONTH")"""
+        painter.setFont(self._label_font)
         
         # 分类标签也根据工作模式变化
         if self.working_mode:
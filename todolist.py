@@ -1,12 +1,16 @@
 """
 ToDo 任务清单应用 - 主入口
+
+PySide6 只在启动图形界面时导入，命令行工具 (cli.py) 可以直接复用 DATA_FILE 而不加载 Qt。
+设置环境变量 TODO_STARTUP_REPORT=1 时，启动完成后打印各阶段耗时；
+TODO_DATA_FILE 可以指定数据文件（以 .db 结尾时使用 SQLite 存储）。
 """
 import os
 import sys
+import time
 
-from PySide6 import QtWidgets
-
-from main_window import MainWindow
+# 尽早记录进程启动时刻，启动耗时报告从这里开始计算
+_START = time.perf_counter()
 
 def get_application_path():
     """获取应用程序的实际路径，用于处理PyInstaller打包后的资源定位"""
@@ -15,16 +19,28 @@ def get_application_path():
     else:  # 开发环境
         return os.path.dirname(__file__)
 
-DATA_FILE = os.path.join(get_application_path(), "todo_data.json")
+DATA_FILE = os.environ.get("TODO_DATA_FILE") or os.path.join(get_application_path(), "todo_data.json")
 
 
 def main():
     """应用主函数"""
+    from phase_timer import PhaseTimer
+
+    startup_timer = PhaseTimer(_START)
+    from PySide6 import QtWidgets
+
+    from main_window import MainWindow
+    startup_timer.mark("导入模块")
+
     app = QtWidgets.QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
+    startup_timer.mark("创建应用")
     
-    win = MainWindow(DATA_FILE)
+    win = MainWindow(DATA_FILE, startup_timer)
     win.show()
+    startup_timer.mark("显示窗口")
+    if os.environ.get("TODO_STARTUP_REPORT"):
+        win.startup_finished.connect(lambda: print(startup_timer.report(), flush=True))
     sys.exit(app.exec())
 
 
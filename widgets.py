@@ -1,360 +1,399 @@
-"""UI 组件模块 - 封装所有自定义 UI 控件"""
-from typing import Optional
+"""UI 组件模块 - 封装所有自定义 UI 控件
+
+任务列表采用 model/view 结构：TaskListModel 保存当前列表的任务数据，
+TaskItemDelegate 直接绘制每一行（勾选圆圈、文本、计时、编辑/删除按钮），
+TaskListView 只为可见行绘制，不再为每个任务创建一组子控件。
+"""
+from typing import Dict, List, Optional
 from PySide6 import QtCore, QtGui, QtWidgets
 import time
 
-class CircleToggle(QtWidgets.QPushButton):
-    """圆形切换按钮 - 显示选中/未选中状态"""
-
-    toggled = QtCore.Signal(bool)
-
-    def __init__(self, checked: bool = False, parent=None):
+from frame_clock import frame_clock
+from models import Task
+
+# 运行中任务 RGB 动画的帧间隔（毫秒）
+RGB_FRAME_INTERVAL = 50
+# 每帧色相前进的角度
+RGB_HUE_STEP = 2
+# 点击文本启动/停止计时的防抖时间（秒）
+CLICK_DEBOUNCE = 0.2
+
+_highlight_palette: List[QtGui.QColor] = []
+
+
+def highlight_palette() -> List[QtGui.QColor]:
+    """运行中任务的背景色表 - 按色相预先计算，每帧只需查表"""
+    if not _highlight_palette:
+        for hue in range(360):
+            color = QtGui.QColor.fromHsv(hue, 255, 255)
+            color.setAlpha(50)
+            _highlight_palette.append(color)
+    return _highlight_palette
+
+
+def paint_circle_toggle(p: QtGui.QPainter, rect: QtCore.QRect, checked: bool):
+    """绘制圆形勾选框 - 选中为蓝色实心圆加白色勾号，未选中为空心圆"""
+    r = rect.adjusted(2, 2, -2, -2)
+    if checked:
+        p.setBrush(QtGui.QBrush(QtGui.QColor(40, 120, 220)))
+        p.setPen(QtCore.Qt.PenStyle.NoPen)
+        p.drawEllipse(r)
+
+        # 绘制白色勾号
+        p.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.white, 1.8, QtCore.Qt.PenStyle.SolidLine,
+                           QtCore.Qt.PenCapStyle.RoundCap, QtCore.Qt.PenJoinStyle.RoundJoin))
+        x, y, w, h = rect.x(), rect.y(), rect.width(), rect.height()
+        path = QtGui.QPainterPath()
+        path.moveTo(x + w * 0.25, y + h * 0.5)
+        path.lineTo(x + w * 0.4, y + h * 0.65)
+        path.lineTo(x + w * 0.75, y + h * 0.35)
+        p.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+        p.drawPath(path)
+    else:
+        pen = QtGui.QPen(QtGui.QColor(120, 120, 120))
+        pen.setWidthF(1.5)
+        p.setPen(pen)
+        p.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+        p.drawEllipse(r)
+
+
+def format_time(seconds: float) -> str:
+    """格式化时间显示"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    else:
+        return f"{minutes:02d}:{secs:02d}"
+
+
+class RunningTask:
+    """当前正在计时的任务 - 全局只允许一个"""
+
+    def __init__(self, task_id: str, base_elapsed: float, start_time: Optional[float] = None):
+        self.task_id = task_id
+        self.base_elapsed = base_elapsed  # 本次计时开始前的累计时间（秒）
+        self.start_time = time.time() if start_time is None else start_time
+        self.hue_value = 0  # 高亮动画的色相，范围0-359
+
+    def elapsed(self) -> float:
+        """包含本次计时的累计时间"""
+        return self.base_elapsed + (time.time() - self.start_time)
+
+
+class TaskListModel(QtCore.QAbstractListModel):
+    """当前列表的任务模型 - 直接绑定数据管理器中的任务记录
+
+    模型不复制任务数据：读取时直接访问数据管理器中的记录，
+    修改时通过数据管理器的接口写入（立即生成日志记录），再通知视图重绘。
+    """
+
+    CheckedRole = QtCore.Qt.ItemDataRole.UserRole + 1
+    ElapsedRole = QtCore.Qt.ItemDataRole.UserRole + 2
+    RunningRole = QtCore.Qt.ItemDataRole.UserRole + 3
+
+    running_changed = QtCore.Signal()
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.data_manager = data_manager
+        self.list_name: Optional[str] = None
+        # 绑定列表在数据管理器中的任务记录（同一个列表对象，不是副本）
+        self._tasks: List[Task] = []
+        self.running: Optional[RunningTask] = None
+        self._running_row: Optional[int] = None  # 运行任务在本列表中的行号缓存
+        self._last_elapsed_text = ""
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self._tasks[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return task.text
+        if role == self.CheckedRole:
+            return task.checked
+        if role == self.ElapsedRole:
+            if index.row() == self.running_row():
+                return self.running.elapsed() # type: ignore
+            return task.total_elapsed
+        if role == self.RunningRole:
+            return index.row() == self.running_row()
+        return None
+
+    def set_list(self, list_name: Optional[str]):
+        """切换到另一个列表（或 None 表示不显示任何列表）"""
+        self.beginResetModel()
+        self.list_name = list_name
+        self._tasks = self.data_manager.data.get(list_name, []) if list_name is not None else []
+        self._running_row = self._locate_running()
+        self.endResetModel()
+
+    def task(self, row: int) -> Task:
+        """获取某一行的任务数据（只读，修改请使用 set_field）"""
+        return self._tasks[row]
+
+    def append_task(self, task: Dict) -> str:
+        """在当前列表末尾添加任务，返回任务 id"""
+        row = len(self._tasks)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        task_id = self.data_manager.add_task(self.list_name, task)
+        if self.running is not None and task_id == self.running.task_id:
+            self._running_row = row
+        self.endInsertRows()
+        return task_id
+
+    def remove_task(self, row: int):
+        """删除一行任务"""
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        self.data_manager.remove_task(self._tasks[row].id)
+        self._running_row = self._locate_running()
+        self.endRemoveRows()
+
+    def set_field(self, row: int, key: str, value):
+        """修改一行任务的字段"""
+        self.data_manager.update_task(self._tasks[row].id, **{key: value})
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def row_of(self, task_id: str) -> Optional[int]:
+        """按 id 查找任务所在的行"""
+        for row, task in enumerate(self._tasks):
+            if task.id == task_id:
+                return row
+        return None
+
+    def _locate_running(self) -> Optional[int]:
+        if self.running is None:
+            return None
+        return self.row_of(self.running.task_id)
+
+    def running_row(self) -> Optional[int]:
+        """运行中的任务在本列表中的行号，不在本列表时为 None"""
+        return self._running_row
+
+    def set_running(self, running: Optional[RunningTask]):
+        """设置当前运行的任务（可能属于其他列表）"""
+        old_row = self.running_row()
+        self.running = running
+        self._running_row = self._locate_running()
+        self._last_elapsed_text = ""
+        for row in (old_row, self.running_row()):
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+        self.running_changed.emit()
+
+    def refresh_running(self):
+        """运行任务的计时文本变化时通知视图重绘该行"""
+        row = self.running_row()
+        if row is None:
+            return
+        text = format_time(self.running.elapsed()) # type: ignore
+        if text != self._last_elapsed_text:
+            self._last_elapsed_text = text
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.ElapsedRole])
+
+
+class TaskItemDelegate(QtWidgets.QStyledItemDelegate):
+    """任务行绘制与交互 - 与原先的单任务控件保持相同的布局和行为"""
+
+    clicked = QtCore.Signal(int)  # 点击任务文本：启动/停止计时
+    toggled = QtCore.Signal(int, bool)  # 切换完成状态
+    edit_requested = QtCore.Signal(int)
+    delete_requested = QtCore.Signal(int)
+
+    ROW_HEIGHT = 38
+    BUTTON_WIDTH = 46
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.text_font = QtGui.QFont()
+        self.text_font.setPointSize(12)
+        self.running_font = QtGui.QFont(self.text_font)
+        self.running_font.setBold(True)
+        self.done_font = QtGui.QFont(self.text_font)
+        self.done_font.setStrikeOut(True)
+        self.button_font = QtGui.QFont()
+        self.button_font.setPointSize(10)
+        self.hover_part = None  # (行号, 区域名)
+        self._last_click = 0.0
+
+    def sizeHint(self, option, index) -> QtCore.QSize:
+        return QtCore.QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def part_rects(self, rect: QtCore.QRect, timer_text: str) -> Dict[str, QtCore.QRect]:
+        """计算一行中各区域的位置"""
+        inner = rect.adjusted(6, 4, -6, -4)
+        toggle = QtCore.QRect(inner.left(), inner.center().y() - 9, 20, 20)
+        delete = QtCore.QRect(inner.right() - self.BUTTON_WIDTH + 1, inner.top(), self.BUTTON_WIDTH, inner.height())
+        edit = QtCore.QRect(delete.left() - 2 - self.BUTTON_WIDTH, inner.top(), self.BUTTON_WIDTH, inner.height())
+        timer_width = QtGui.QFontMetrics(self.text_font).horizontalAdvance(timer_text)
+        timer = QtCore.QRect(edit.left() - 10 - timer_width, inner.top(), timer_width, inner.height())
+        text = QtCore.QRect(toggle.right() + 11, inner.top(), timer.left() - 10 - toggle.right() - 11, inner.height())
+        return {"toggle": toggle, "text": text, "timer": timer, "edit": edit, "delete": delete}
+
+    def hit_test(self, rect: QtCore.QRect, index: QtCore.QModelIndex, pos: QtCore.QPoint) -> Optional[str]:
+        """返回位置所在的区域名"""
+        timer_text = format_time(index.data(TaskListModel.ElapsedRole))
+        for name, part in self.part_rects(rect, timer_text).items():
+            if part.contains(pos):
+                return name
+        return None
+
+    def paint(self, painter: QtGui.QPainter, option, index: QtCore.QModelIndex):
+        model = index.model()
+        row = index.row()
+        running = index.data(TaskListModel.RunningRole)
+        checked = index.data(TaskListModel.CheckedRole)
+        timer_text = format_time(index.data(TaskListModel.ElapsedRole))
+        parts = self.part_rects(option.rect, timer_text)
+
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+
+        # 运行中：彩色圆角背景
+        if running:
+            painter.setPen(QtCore.Qt.PenStyle.NoPen)
+            painter.setBrush(highlight_palette()[model.running.hue_value])
+            painter.drawRoundedRect(QtCore.QRectF(option.rect), 5, 5)
+
+        paint_circle_toggle(painter, parts["toggle"], checked)
+
+        # 任务文本
+        if checked:
+            painter.setFont(self.done_font)
+            painter.setPen(QtGui.QColor("#888888"))
+        elif running:
+            painter.setFont(self.running_font)
+            painter.setPen(QtGui.QColor("#FFFFFF"))
+        else:
+            painter.setFont(self.text_font)
+            painter.setPen(QtGui.QColor("#111111"))
+        align = QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter
+        text = painter.fontMetrics().elidedText(index.data(), QtCore.Qt.TextElideMode.ElideRight, parts["text"].width())
+        painter.drawText(parts["text"], align, text)
+
+        # 计时
+        painter.setFont(self.text_font)
+        painter.setPen(QtGui.QColor("#888888"))
+        painter.drawText(parts["timer"], QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter, timer_text)
+        painter.restore()
+
+        # 编辑/删除按钮
+        widget = option.widget
+        style = widget.style() if widget else QtWidgets.QApplication.style()
+        painter.save()
+        painter.setFont(self.button_font)
+        for name, label in (("edit", "编辑"), ("delete", "删除")):
+            button = QtWidgets.QStyleOptionButton()
+            button.rect = parts[name]
+            button.text = label
+            button.fontMetrics = painter.fontMetrics()
+            button.state = QtWidgets.QStyle.StateFlag.State_Enabled | QtWidgets.QStyle.StateFlag.State_Raised
+            if self.hover_part == (row, name):
+                button.state |= QtWidgets.QStyle.StateFlag.State_MouseOver
+            style.drawControl(QtWidgets.QStyle.ControlElement.CE_PushButton, button, painter, widget)
+        painter.restore()
+
+    def editorEvent(self, event: QtCore.QEvent, model, option, index: QtCore.QModelIndex) -> bool:
+        """处理行内点击：文本启动/停止计时，圆圈切换完成状态，按钮编辑/删除"""
+        if event.type() not in (QtCore.QEvent.Type.MouseButtonPress, QtCore.QEvent.Type.MouseButtonRelease):
+            return False
+        if event.button() != QtCore.Qt.MouseButton.LeftButton:
+            return False
+        part = self.hit_test(option.rect, index, event.position().toPoint())
+        row = index.row()
+        if event.type() == QtCore.QEvent.Type.MouseButtonPress:
+            if part == "text":
+                # 防抖处理：如果在防抖时间内，忽略点击
+                now = time.monotonic()
+                if now - self._last_click >= CLICK_DEBOUNCE:
+                    self._last_click = now
+                    self.clicked.emit(row)
+            return part is not None
+        if part == "toggle":
+            self.toggled.emit(row, not index.data(TaskListModel.CheckedRole))
+        elif part == "edit":
+            self.edit_requested.emit(row)
+        elif part == "delete":
+            self.delete_requested.emit(row)
+        return part is not None
+
+
+class TaskListView(QtWidgets.QListView):
+    """任务列表视图 - 只绘制可见行，运行任务的高亮动画只重绘该行"""
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.setCheckable(True)
-        self.setChecked(checked)
-        self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-        self.setFixedSize(20, 20)
-        self.setFlat(True)
+        self.task_delegate = TaskItemDelegate(self)
+        self.setItemDelegate(self.task_delegate)
+        self.setUniformItemSizes(True)
+        self.setSpacing(3)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         self.setFocusPolicy(QtCore.Qt.FocusPolicy.NoFocus)
+        self.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollMode.ScrollPerPixel)
         self.setMouseTracking(True)
 
-    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
-        """绘制圆形按钮"""
-        p = QtGui.QPainter(self)
-        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        r = self.rect().adjusted(2, 2, -2, -2)
-        
-        if self.isChecked():
-            # 选中状态：填充蓝色圆圈 + 白色勾号
-            brush = QtGui.QBrush(QtGui.QColor(40, 120, 220))
-            p.setBrush(brush)
-            p.setPen(QtCore.Qt.PenStyle.NoPen)
-            p.drawEllipse(r)
-            
-            # 绘制白色勾号
-            p.setPen(QtGui.QPen(QtCore.Qt.GlobalColor.white, 1.8, QtCore.Qt.PenStyle.SolidLine, 
-                               QtCore.Qt.PenCapStyle.RoundCap, QtCore.Qt.PenJoinStyle.RoundJoin))
-            w, h = self.width(), self.height()
-            path = QtGui.QPainterPath()
-            path.moveTo(w * 0.25, h * 0.5)
-            path.lineTo(w * 0.4, h * 0.65)
-            path.lineTo(w * 0.75, h * 0.35)
-            p.drawPath(path)
-        else:
-            # 未选中状态：空心圆圈
-            pen = QtGui.QPen(QtGui.QColor(120, 120, 120))
-            pen.setWidthF(1.5)
-            p.setPen(pen)
-            p.setBrush(QtCore.Qt.BrushStyle.NoBrush)
-            p.drawEllipse(r)
-
-    def mouseReleaseEvent(self, event: QtGui.QMouseEvent) -> None:
-        """鼠标释放 - 切换状态"""
-        if event.button() == QtCore.Qt.MouseButton.LeftButton: # type: ignore
-            # 切换按钮状态并发射信号
-            self.toggle()
-            event.accept()
-        else:
-            super().mouseReleaseEvent(event)
-
-    def enterEvent(self, event: QtGui.QEnterEvent) -> None:
-        """鼠标进入 - 视觉反馈"""
-        super().enterEvent(event)
-        self.update()
-
-    def leaveEvent(self, event: QtCore.QEvent) -> None:
-        """鼠标离开 - 更新显示"""
-        super().leaveEvent(event)
-        self.update()
-
-
-class TaskWidget(QtWidgets.QWidget):
-    """单个任务项组件"""
-    
-    changed = QtCore.Signal()
-    removed = QtCore.Signal(object)  # 发出 self 信号以通知父窗口删除该任务
-
-    def __init__(self, text: str, checked: bool = False, parent=None):
-        super().__init__(parent)
-        self.text = text
-        self.checked = checked
-        self.is_running = False  # 是否正在计时
-        self.start_time = None  # 计时开始时间
-        self.elapsed_time = 0  # 已消耗时间（秒）
-        self.total_elapsed = 0  # 总共消耗时间（秒）
-
-        # RGB动画计时器
-        self.rgb_animation_timer = None
-        self.hue_value = 0  # HSV色彩值，范围0-359
-        
-        # 防抖定时器 - 防止快速重复点击
-        self.click_debounce_timer = None
-        self.click_debounce_active = False
-
-        # 创建布局
-        self.main_layout = QtWidgets.QHBoxLayout(self)
-        self.main_layout.setContentsMargins(6, 4, 6, 4)
-        self.main_layout.setSpacing(10)
-
-        self.toggle = CircleToggle(checked)
-        self.toggle.toggled.connect(self.on_toggled)
-        self.main_layout.addWidget(self.toggle, alignment=QtCore.Qt.AlignmentFlag.AlignVCenter)
-
-        # 任务文本标签
-        self.label = QtWidgets.QLabel(self.text)
-        self.label.setTextInteractionFlags(QtCore.Qt.TextInteractionFlag.TextSelectableByMouse)
-        self.label.setSizePolicy(
-            QtWidgets.QSizePolicy.Policy.Expanding, 
-            QtWidgets.QSizePolicy.Policy.Preferred
-        )
-        font = self._create_font(12)
-        self.label.setFont(font)
-        self.update_style()
-        self.main_layout.addWidget(self.label)
-
-        # 计时标签
-        self.timer_label = QtWidgets.QLabel("")
-        self.timer_label.setFont(font)
-        self.timer_label.setStyleSheet("color: #888888;")
-        self.timer_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignRight)
-        self.main_layout.addWidget(self.timer_label)
-
-        # 创建一个按钮容器，整合编辑和删除按钮
-        button_container = QtWidgets.QWidget()
-        button_layout = QtWidgets.QHBoxLayout(button_container)
-        button_layout.setContentsMargins(0, 0, 0, 0)
-        button_layout.setSpacing(2)  # 进一步减少按钮间距
-        
-        # 使用稍小的字体用于按钮
-        button_font = QtGui.QFont()
-        button_font.setPointSize(10)
-        
-        # 编辑按钮
-        btn_edit = QtWidgets.QPushButton("编辑")
-        btn_edit.setFixedWidth(46)
-        btn_edit.setFont(button_font)
-        btn_edit.clicked.connect(self.edit)
-        button_layout.addWidget(btn_edit)
-
-        # 删除按钮
-        btn_del = QtWidgets.QPushButton("删除")
-        btn_del.setFixedWidth(46)
-        btn_del.setFont(button_font)
-        btn_del.clicked.connect(self.delete)
-        button_layout.addWidget(btn_del)
-        
-        # 防止按钮区域被压缩
-        self.main_layout.addWidget(button_container, alignment=QtCore.Qt.AlignmentFlag.AlignVCenter)
-
-        # 安装事件过滤器来处理标签点击事件
-        self.label.installEventFilter(self)
-        self.main_layout.itemAt(1).widget().setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-
-    def eventFilter(self, obj, event):
-        """事件过滤器 - 处理标签点击事件"""
-        if obj is self.label and event.type() == QtCore.QEvent.Type.MouseButtonPress:
-            mouse_event = event
-            if mouse_event.button() == QtCore.Qt.MouseButton.LeftButton:
-                # 防抖处理：如果在防抖时间内，忽略点击
-                if self.click_debounce_active:
-                    return True
-                
-                # 激活防抖，防止快速重复点击
-                self.click_debounce_active = True
-                self.click_debounce_timer = QtCore.QTimer(self)
-                self.click_debounce_timer.setSingleShot(True)
-                self.click_debounce_timer.timeout.connect(self._reset_debounce)
-                self.click_debounce_timer.start(200)  # 200ms 内忽略重复点击
-                
-                # 发送changed信号给主窗口处理，由主窗口统一管理全局计时状态
-                # 这样可以确保只有一个任务计时，且点击一次即可启动/停止
-                self.changed.emit()
-                        
-                return True  # 标记事件已处理，防止进一步传播
-                
-        # 处理鼠标进入/离开事件以提供视觉反馈
-        elif obj is self.label:
-            if event.type() == QtCore.QEvent.Type.Enter:
-                self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-                return True
-            elif event.type() == QtCore.QEvent.Type.Leave:
-                self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.ArrowCursor))
-                return True
-                
-        # 其他事件继续正常处理
-        return super().eventFilter(obj, event)
-    
-    def _reset_debounce(self):
-        """重置防抖标志"""
-        self.click_debounce_active = False
-        
-    def start_timer(self):
-        """开始计时 - 由主窗口控制"""
-        if not self.is_running:
-            self.is_running = True
-            self.start_time = time.time()
-            self.update_style()
-            # 启动RGB动画
-            self._start_rgb_animation()
-            # 立即刷新显示
-            self.repaint()
-
-    def stop_timer(self):
-        """停止计时 - 由主窗口控制"""
-        if self.is_running:
-            self.is_running = False
-            # 计算最终耗时
-            if self.start_time:
-                self.total_elapsed += time.time() - self.start_time
-                self.start_time = None
-            self.update_style()
-            
-            # 停止RGB动画
-            self._stop_rgb_animation()
-            
-            # 立即更新计时显示
-            self.update_timer_display()
-            
-            # 发送changed信号以确保数据保存
-            self.changed.emit()
-    
-    def update_timer_display(self):
-        """更新计时显示 - 由主窗口的全局计时器调用"""
-        if self.is_running and self.start_time is not None:
-            current_elapsed = self.total_elapsed + (time.time() - self.start_time)
-            self.timer_label.setText(self.format_time(current_elapsed))
+    def setModel(self, model: TaskListModel):
+        super().setModel(model)
+        model.running_changed.connect(self._sync_animation)
+        model.modelReset.connect(self._sync_animation)
+        model.rowsRemoved.connect(self._sync_animation)
+        self._sync_animation()
+
+    def _sync_animation(self):
+        """本列表中有运行任务时订阅帧时钟，否则退订"""
+        model = self.model()
+        if model is not None and model.running_row() is not None:
+            frame_clock().subscribe(self._animate_rgb, RGB_FRAME_INTERVAL)
         else:
-            self.timer_label.setText(self.format_time(self.total_elapsed))
-        # 立即更新UI显示 - 使用repaint强制立即刷新，而不是update队列
-        self.timer_label.repaint()
-        self.main_layout.update()  # 同时更新主布局确保布局正确
-
-    def _start_rgb_animation(self):
-        """启动RGB动画效果"""
-        if self.rgb_animation_timer is None:
-            self.rgb_animation_timer = QtCore.QTimer(self)  # 设置 parent，确保线程安全
-            self.rgb_animation_timer.timeout.connect(self._animate_rgb)
-            self.rgb_animation_timer.start(50)  # 每50ms更新一次颜色
-
-    def _stop_rgb_animation(self):
-        """停止RGB动画效果"""
-        if self.rgb_animation_timer is not None:
-            self.rgb_animation_timer.stop()
-            try:
-                self.rgb_animation_timer.timeout.disconnect()
-            except TypeError:
-                # 如果信号没有连接，会抛出TypeError
-                pass
-            self.rgb_animation_timer = None
+            frame_clock().unsubscribe(self._animate_rgb)
 
     def _animate_rgb(self):
-        """RGB动画更新"""
+        """RGB动画更新 - 推进色相并只重绘运行任务所在的行"""
+        model = self.model()
+        row = model.running_row()
+        if row is None:
+            frame_clock().unsubscribe(self._animate_rgb)
+            return
         # 循环更新HSV值中的H（色相），产生彩虹效果
-        self.hue_value = (self.hue_value + 2) % 360
-        color = QtGui.QColor.fromHsv(self.hue_value, 255, 255)
-        self.setStyleSheet(f"background-color: rgba({color.red()}, {color.green()}, {color.blue()}, 50); border-radius: 5px;")
-
-    def format_time(self, seconds):
-        """格式化时间显示"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        if hours > 0:
-            return f"{hours:02d}:{minutes:02d}:{secs:02d}"
-        else:
-            return f"{minutes:02d}:{secs:02d}"
-
-    @staticmethod
-    def _create_font(size: int) -> QtGui.QFont:
-        """创建指定大小的字体"""
-        font = QtGui.QFont()
-        font.setPointSize(size)
-        return font
-
-    def update_style(self):
-        """更新文本样式（删除线和颜色）"""
-        f = self.label.font()
-        if self.toggle.isChecked():
-            f.setStrikeOut(True)
-            self.label.setStyleSheet("color: #888888;")
-            # 停止RGB动画，恢复正常样式
-            if self.rgb_animation_timer:
-                self._stop_rgb_animation()
-            self.setStyleSheet("")
-        elif self.is_running:
-            # 正在运行时的特殊样式 - 由RGB动画处理
-            self.label.setStyleSheet("color: #FFFFFF; font-weight: bold;")
+        model.running.hue_value = (model.running.hue_value + RGB_HUE_STEP) % 360
+        self.viewport().update(self.visualRect(model.index(row)))
+
+    def stop_animation(self):
+        """停止高亮动画（退出前调用）"""
+        frame_clock().unsubscribe(self._animate_rgb)
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent):
+        """鼠标悬停：文本区域显示手形光标，按钮显示悬停效果"""
+        super().mouseMoveEvent(event)
+        pos = event.position().toPoint()
+        index = self.indexAt(pos)
+        hover = None
+        if index.isValid():
+            part = self.task_delegate.hit_test(self.visualRect(index), index, pos)
+            if part is not None:
+                hover = (index.row(), part)
+        if hover != self.task_delegate.hover_part:
+            old = self.task_delegate.hover_part
+            self.task_delegate.hover_part = hover
+            for item in (old, hover):
+                if item is not None:
+                    self.viewport().update(self.visualRect(self.model().index(item[0])))
+        if hover is not None and hover[1] in ("text", "toggle"):
+            self.viewport().setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         else:
-            f.setStrikeOut(False)
-            self.label.setStyleSheet("color: #111111;")
-            # 停止RGB动画，恢复正常样式
-            if self.rgb_animation_timer:
-                self._stop_rgb_animation()
-            self.setStyleSheet("")
-        self.label.setFont(f)
-        self.label.repaint()  # 使用repaint强制立即刷新
-        self.repaint()  # 也刷新整个组件
-
-    def on_toggled(self, checked: bool):
-        """切换状态时的处理"""
-        self.checked = checked
-        # 如果任务完成，停止计时
-        if checked and self.is_running:
-            self.stop_timer()
-        self.update_style()
-        self.changed.emit()
-        self.update()
-
-    def edit(self):
-        """编辑任务内容"""
-        text, ok = QtWidgets.QInputDialog.getText(
-            self, "编辑任务", "任务内容:", text=self.label.text()
-        )
-        if ok:
-            self.label.setText(text)
-            self.text = text
-            self.changed.emit()
-
-    def delete(self):
-        """删除任务"""
-        # 删除前停止计时
-        if self.is_running:
-            self.stop_timer()
-        self.cleanup()
-        self.removed.emit(self)
-
-    def cleanup(self):
-        """清理所有定时器和资源 - 在删除前必须调用"""
-        # 停止RGB动画定时器
-        if self.rgb_animation_timer is not None:
-            self.rgb_animation_timer.stop()
-            try:
-                self.rgb_animation_timer.timeout.disconnect()
-            except TypeError:
-                pass
-            self.rgb_animation_timer = None
-        
-        # 停止防抖定时器
-        if self.click_debounce_timer is not None:
-            self.click_debounce_timer.stop()
-            self.click_debounce_timer = None
-
-    def to_dict(self) -> dict:
-        """转换为字典格式用于数据保存"""
-        # 如果任务正在运行，需要计算当前总时间，但不能改变运行状态
-        current_total = self.total_elapsed
-        if self.is_running and self.start_time is not None:
-            # 临时计算总时间，但不改变实际状态
-            current_total += time.time() - self.start_time
-        
-        return {
-            "text": self.label.text(), 
-            "checked": bool(self.checked),
-            "total_elapsed": current_total
-        }
-
-    def load_from_dict(self, data: dict):
-        """从字典加载数据"""
-        self.total_elapsed = data.get("total_elapsed", 0)
-        # 修复：调用正确的update_timer_display方法
-        self.update_timer_display()
\ No newline at end of file
+            self.viewport().unsetCursor()
+
+    def leaveEvent(self, event: QtCore.QEvent):
+        """鼠标离开 - 清除悬停状态"""
+        super().leaveEvent(event)
+        if self.task_delegate.hover_part is not None:
+            self.task_delegate.hover_part = None
+            self.viewport().update()